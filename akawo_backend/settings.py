@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 """
 import os
+import tempfile
 
 # Paystack Configuration
 PAYSTACK_SECRET_KEY = os.getenv(
@@ -28,9 +29,43 @@ PAYSTACK_CALLBACK_URL = os.getenv(
     "http://127.0.0.1:8000/pay/verify/"  # default for local testing
 )
 
+# Outbound client (point PAYSTACK_BASE_URL at `manage.py paystack_stub` to benchmark)
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")
+PAYSTACK_TIMEOUT = (
+    float(os.getenv("PAYSTACK_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("PAYSTACK_READ_TIMEOUT", "10")),
+)
+PAYSTACK_MAX_RETRIES = int(os.getenv("PAYSTACK_MAX_RETRIES", "2"))
+PAYSTACK_POOL_SIZE = int(os.getenv("PAYSTACK_POOL_SIZE", "10"))
+
+# Outbound guard (core.paystack.OutboundGuard), per process
+PAYSTACK_MAX_CONCURRENCY = int(os.getenv("PAYSTACK_MAX_CONCURRENCY", str(PAYSTACK_POOL_SIZE)))
+PAYSTACK_QUEUE_TIMEOUT = float(os.getenv("PAYSTACK_QUEUE_TIMEOUT", "0.5"))  # seconds
+PAYSTACK_RATE_LIMIT = float(os.getenv("PAYSTACK_RATE_LIMIT", "25"))  # calls/s, 0 = off
+PAYSTACK_RATE_BURST = int(os.getenv("PAYSTACK_RATE_BURST", "50"))
+PAYSTACK_BREAKER_THRESHOLD = int(os.getenv("PAYSTACK_BREAKER_THRESHOLD", "5"))
+PAYSTACK_BREAKER_RESET = float(os.getenv("PAYSTACK_BREAKER_RESET", "30"))  # seconds
+PAYSTACK_SLOW_CALL = float(os.getenv("PAYSTACK_SLOW_CALL", "5"))  # seconds, counts as a failure
+
+# Route checkout and callback to the async views. Only worth it under an
+# ASGI server (akawo_backend.asgi); under WSGI each call gets its own loop.
+ASYNC_PAYMENTS = os.getenv("ASYNC_PAYMENTS", "False") == "True"
+
+# payment_callback short-circuit for references already marked success
+SETTLED_REFERENCE_CACHE_SIZE = 10000
+SETTLED_REFERENCE_CACHE_TTL = 3600  # seconds
+
+# Request profiling (core.profiling): Server-Timing headers, slow-query log
+# and per-endpoint windows for `manage.py hot_endpoints`.
+PROFILING_ENABLED = os.getenv("PROFILING", "False") == "True"
+PROFILING_SLOW_QUERY_MS = float(os.getenv("PROFILING_SLOW_QUERY_MS", "100"))
+PROFILING_SAMPLES = 500  # per URL name, per process
+PROFILING_FLUSH_INTERVAL = 10  # seconds (PROFILING_DIR is set below BASE_DIR)
+
 
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from django.contrib.messages import constants as messages
 import os
 
@@ -40,6 +75,21 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# core.media.serve_media: "" streams from Django, "x-sendfile" (Apache) or
+# "x-accel-redirect" (nginx, internal location at MEDIA_ACCEL_PREFIX) offloads.
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+MEDIA_MAX_AGE = 3600  # seconds, for names without a content hash
+
+# Bulk member import (core.member_import)
+MEMBER_IMPORT_MAX_ROWS = int(os.getenv("MEMBER_IMPORT_MAX_ROWS", "10000"))
+
+# reconcile_payments resume point; outside the source tree so a deploy or a
+# `git clean` neither ships nor deletes it.
+RECONCILE_CHECKPOINT = os.getenv(
+    "RECONCILE_CHECKPOINT",
+    os.path.join(tempfile.gettempdir(), "akawo-reconcile_payments.checkpoint"),
+)
 
 
 
@@ -92,6 +142,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.profiling.ProfilingMiddleware',  # no-op unless PROFILING=True
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -112,6 +163,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.unread_notifications',
             ],
         },
     },
@@ -123,14 +175,76 @@ WSGI_APPLICATION = 'akawo_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite allows one writer at a time. The "concurrent" profile is for several
+# gunicorn workers: WAL lets reads run alongside the writer, busy_timeout
+# makes a blocked writer wait instead of failing with "database is locked",
+# and BEGIN IMMEDIATE takes the write lock when atomic() starts, so a
+# transaction that reads then writes can't fail upgrading its lock.
+# "default" keeps SQLite's own settings. Compare with `manage.py bench_sqlite`.
+# journal_mode is stored in the database file rather than set per connection,
+# so WAL is a one-time, persistent switch: `manage.py sqlite_journal_mode wal`
+# (and `... delete` to go back). The profiles only carry per-connection
+# pragmas; synchronous=NORMAL is meant for WAL, and `migrate` (or `check
+# --database default`) warns when the file's mode doesn't match the profile.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "concurrent")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_JOURNAL_MODES = {"default": "delete", "concurrent": "wal"}
+SQLITE_PROFILES = {
+    "default": {},
+    "concurrent": {
+        "init_command": (
+            f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA mmap_size=134217728;"
+        ),
+        "transaction_mode": "IMMEDIATE",
+    },
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
 
+# Cache
+# Dashboard versions, unread counts and the session's cached role are
+# invalidated by bumping cache keys, so every gunicorn worker must see the
+# same cache: the default is the file backend. LocMem is per process and
+# only right for a single process (runserver); it is refused otherwise.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+
+if CACHE_BACKEND == "locmem" and not DEBUG:
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND=locmem is per process and leaves other workers serving "
+        "stale dashboards; use the file backend, or set DEBUG=True for local dev."
+    )
+
+if CACHE_BACKEND == "file":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv("CACHE_LOCATION", str(BASE_DIR / '.cache')),
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'akawo',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(BASE_DIR / '.profiling'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -176,7 +290,7 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'login'
-LOGIN_REDIRECT_URL = '/role/'
+LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = '/'
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -1,13 +1,16 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from . import balances
 from .models import (
     UserProfile,
     AkawoGroup,
     GroupMember,
+    GroupInvite,
     Contribution,
-    Payout
+    Payout,
+    Withdrawal
 )
 
 # -----------------------------
@@ -18,14 +21,16 @@ class UserProfileInline(admin.StackedInline):
     can_delete = False
     verbose_name_plural = 'User Profile'
     fk_name = 'user'
+    # Maintained by core.roles with F() updates.
+    readonly_fields = ('organized_groups_count', 'memberships_count')
 
 class CustomUserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'get_role', 'is_staff', 'is_active')
-    list_select_related = ('userprofile',)
+    list_select_related = ('profile',)
 
     def get_role(self, instance):
-        return instance.userprofile.role
+        return instance.profile.dashboard_role()
     get_role.short_description = 'Role'
 
 # Unregister default User admin, then register custom
@@ -37,14 +42,14 @@ admin.site.register(User, CustomUserAdmin)
 # -----------------------------
 @admin.register(AkawoGroup)
 class AkawoGroupAdmin(admin.ModelAdmin):
-    list_display = ('group_name', 'organizer', 'contribution_cycle', 'fee_percent', 'created_at')
+    list_display = ('group_name', 'organizer', 'contribution_cycle', 'contribution_amount', 'created_at')
     list_filter = ('contribution_cycle', 'created_at')
     search_fields = ['group_name', 'organizer__username']
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
     fieldsets = (
         ('Basic Info', {
-            'fields': ('group_name', 'organizer', 'description', 'contribution_cycle', 'fee_percent')
+            'fields': ('group_name', 'organizer', 'description', 'contribution_cycle', 'contribution_amount')
         }),
         ('Timestamps', {
             'fields': ('created_at',),
@@ -63,6 +68,13 @@ class GroupMemberAdmin(admin.ModelAdmin):
     ordering = ('-joined_at',)
     readonly_fields = ('joined_at',)
 
+@admin.register(GroupInvite)
+class GroupInviteAdmin(admin.ModelAdmin):
+    list_display = ('user', 'email', 'phone', 'group', 'invited_at')
+    search_fields = ('user__username', 'email', 'phone', 'group__group_name')
+    ordering = ('-invited_at',)
+    readonly_fields = ('invited_at', 'token')
+
 # -----------------------------
 # CONTRIBUTION ADMIN
 # -----------------------------
@@ -76,6 +88,33 @@ class ContributionAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
 
+# -----------------------------
+# WITHDRAWAL ADMIN
+# -----------------------------
+@admin.register(Withdrawal)
+class WithdrawalAdmin(admin.ModelAdmin):
+    list_display = ('member', 'group', 'amount', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('member__user__username', 'group__group_name')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'status')
+    actions = ('approve_withdrawals',)
+
+    @admin.action(description='Approve selected withdrawals')
+    def approve_withdrawals(self, request, queryset):
+        # Route through balances so member totals move with the status.
+        approved = sum(
+            balances.approve_withdrawal(withdrawal)
+            for withdrawal in queryset.filter(status='pending')
+        )
+        self.message_user(request, f"{approved} withdrawal(s) approved.")
+        skipped = queryset.filter(status='pending').count()
+        if skipped:
+            self.message_user(
+                request, f"{skipped} withdrawal(s) left pending: balance too low.",
+                level=messages.WARNING,
+            )
+
 # -----------------------------
 # PAYOUT ADMIN
 # -----------------------------
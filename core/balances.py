@@ -0,0 +1,174 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from . import dashboards, ledger
+from .models import AkawoGroup, Contribution, GroupMember, Withdrawal
+
+
+# ======================
+# BALANCES
+# ======================
+# GroupMember.total_contributed, AkawoGroup.monthly_total and
+# AkawoGroup.unpaid_count are maintained here, in the same transaction as the
+# status change that moves them, so pages read columns instead of SUM()ing
+# Contribution history. Every path that completes a contribution or approves
+# a withdrawal goes through this module.
+#
+# unpaid_count counts members who owe the open cycle and haven't paid it. The
+# organizer is a GroupMember too but collects rather than owes (reminders skip
+# them), so they are never counted.
+
+def _add_by_id(model, field, amounts):
+    # One UPDATE for the whole batch: field = field + CASE id WHEN .. END.
+    if not amounts:
+        return
+    delta = Case(
+        *[When(id=pk, then=Value(amount)) for pk, amount in amounts.items()],
+        default=Value(Decimal("0")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    model.objects.filter(id__in=amounts).update(**{field: F(field) + delta})
+
+
+def contributions_completed(contributions):
+    contributions = [c for c in contributions if c.status == "completed"]
+    if not contributions:
+        return
+
+    by_member = defaultdict(Decimal)
+    for contribution in contributions:
+        by_member[contribution.member_id] += contribution.amount
+
+    members = {}
+    organizers = set()
+    for member_id, group_id, is_organizer in GroupMember.objects.filter(
+        id__in=by_member
+    ).values_list("id", "group_id", Q(user_id=F("group__organizer_id"))):
+        members[member_id] = group_id
+        if is_organizer:
+            organizers.add(member_id)
+
+    by_group = defaultdict(Decimal)
+    for member_id, amount in by_member.items():
+        by_group[members[member_id]] += amount
+
+    # A member leaves the unpaid count on their first completed contribution
+    # of the cycle; later top-ups in the same cycle don't move it again.
+    already_paid = set(
+        Contribution.objects.filter(member_id__in=by_member, status="completed")
+        .filter(
+            Q(member__group__current_cycle_month__isnull=True)
+            | Q(created_at__date__gte=F("member__group__current_cycle_month"))
+        )
+        .exclude(id__in=[c.id for c in contributions])
+        .values_list("member_id", flat=True)
+        .distinct()
+    )
+
+    newly_paid = defaultdict(int)
+    for member_id, group_id in members.items():
+        if member_id not in already_paid and member_id not in organizers:
+            newly_paid[group_id] += 1
+
+    with transaction.atomic():
+        dashboards.bump_groups(by_group)
+        _add_by_id(GroupMember, "total_contributed", by_member)
+        _add_by_id(AkawoGroup, "monthly_total", by_group)
+        for group_id, count in newly_paid.items():
+            AkawoGroup.objects.filter(id=group_id).update(
+                unpaid_count=Greatest(F("unpaid_count") - count, Value(0))
+            )
+
+
+def unpaid_at_open():
+    # unpaid_count for a cycle that is just opening: every member but the
+    # organizer. For AkawoGroup.objects.update().
+    owing = (
+        GroupMember.objects.filter(group=OuterRef("pk"))
+        .exclude(user_id=OuterRef("organizer_id"))
+        .values("group")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(owing), Value(0))
+
+
+def opening_totals(since):
+    # monthly_total and unpaid_count for a cycle that opened at `since` (an
+    # aware datetime) but is only being rolled over now: contributions that
+    # completed in between already belong to it. For
+    # AkawoGroup.objects.update(**opening_totals(since)).
+    completed = Contribution.objects.filter(status="completed", created_at__gte=since)
+    total = (
+        completed.filter(member__group=OuterRef("pk"))
+        .values("member__group")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    owing = (
+        GroupMember.objects.filter(group=OuterRef("pk"))
+        .exclude(user_id=OuterRef("organizer_id"))
+        .exclude(Exists(completed.filter(member=OuterRef("pk"))))
+        .values("group")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return {
+        "monthly_total": Coalesce(
+            Subquery(total), Value(Decimal("0")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+        "unpaid_count": Coalesce(Subquery(owing), Value(0)),
+    }
+
+
+def members_joined(group, user_ids):
+    # New members owe the open cycle.
+    count = len(set(user_ids) - {group.organizer_id})
+    if count:
+        AkawoGroup.objects.filter(id=group.id).update(unpaid_count=F("unpaid_count") + count)
+
+
+def member_leaving(member, group):
+    # Call before the delete: only a member who hadn't paid this cycle was
+    # counted as unpaid.
+    if member.user_id == group.organizer_id:
+        return
+    paid = Contribution.objects.filter(member=member, status="completed")
+    if group.current_cycle_month:
+        paid = paid.filter(created_at__date__gte=group.current_cycle_month)
+    if not paid.exists():
+        AkawoGroup.objects.filter(id=group.id).update(
+            unpaid_count=Greatest(F("unpaid_count") - 1, Value(0))
+        )
+
+
+def approve_withdrawal(withdrawal):
+    with transaction.atomic():
+        # Conditional UPDATE so a double click or two admins can't debit twice.
+        updated = Withdrawal.objects.filter(id=withdrawal.id, status="pending").update(
+            status="approved"
+        )
+        if not updated:
+            return False
+
+        # The amount was checked when requested; the balance may have dropped
+        # since (another approved withdrawal), so check it again here.
+        debited = GroupMember.objects.filter(
+            id=withdrawal.member_id, total_contributed__gte=withdrawal.amount
+        ).update(total_contributed=F("total_contributed") - withdrawal.amount)
+        if not debited:
+            transaction.set_rollback(True)
+            return False
+
+        ledger.record_withdrawal(withdrawal)
+        dashboards.bump_groups([withdrawal.group_id])
+
+    withdrawal.status = "approved"
+    return True
@@ -0,0 +1,103 @@
+import contextlib
+import re
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+# ======================
+# BENCHMARK HELPERS
+# ======================
+# Benchmarks run against a throwaway test database so they never touch
+# db.sqlite3 and always start from the same state. They get a private
+# in-process cache too: the project cache is shared with the running site,
+# and clearing it would drop every live dashboard and version counter.
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmarks",
+    }
+}
+
+
+@contextlib.contextmanager
+def test_database(keepdb=False):
+    old_name = connection.settings_dict["NAME"]
+    with override_settings(CACHES=BENCH_CACHES):
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class Timer:
+    def __init__(self):
+        self.samples = []
+
+    @contextlib.contextmanager
+    def __call__(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+    @property
+    def total(self):
+        return sum(self.samples)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "count": len(self.samples),
+            "total_s": round(self.total, 4),
+            "mean_ms": round(statistics.fmean(self.samples) * 1000, 3) if self.samples else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+        }
+
+
+def measure_url(client, url, requests=20):
+    # The first request runs against a cold cache; the rest show steady state.
+    if settings.CACHES != BENCH_CACHES:
+        raise RuntimeError("measure_url clears the cache; run it inside test_database()")
+    cache.clear()
+    timer = Timer()
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured, timer():
+            response = client.get(url)
+        queries.append(len(captured))
+    return {
+        "url": url,
+        "status": response.status_code,
+        **timer.summary(),
+        "cold_ms": round(timer.samples[0] * 1000, 3),
+        "queries_cold": queries[0],
+        "queries_warm": max(queries[1:], default=queries[0]),
+    }
+
+
+def duplicate_queries(queries):
+    # Group captured SQL by shape (literals stripped) and keep repeats: the
+    # signature of a query issued once per row.
+    shapes = Counter(_LITERALS.sub("?", query["sql"]) for query in queries)
+    return sorted(
+        ((count, sql) for sql, count in shapes.items() if count > 1), reverse=True
+    )
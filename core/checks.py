@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+
+
+# ======================
+# SYSTEM CHECKS
+# ======================
+
+@register(Tags.database)
+def sqlite_journal_mode(app_configs, databases=None, **kwargs):
+    # journal_mode lives in the database file, not in the profile's
+    # per-connection pragmas, so a profile can be switched without it. The
+    # concurrent profile's synchronous=NORMAL is only safe under WAL.
+    # Database checks run on `migrate` and `check --database default`.
+    expected = settings.SQLITE_JOURNAL_MODES.get(settings.SQLITE_PROFILE)
+    warnings = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if not expected or connection.vendor != "sqlite" or connection.is_in_memory_db():
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            mode = cursor.fetchone()[0]
+        if mode != expected:
+            warnings.append(Warning(
+                f'{alias}: journal_mode is {mode}, the "{settings.SQLITE_PROFILE}" '
+                f"SQLite profile expects {expected}.",
+                hint=f"Run `manage.py sqlite_journal_mode {expected}` once.",
+                id="core.W001",
+            ))
+    return warnings
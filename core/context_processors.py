@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import notifications
+
+
+def unread_notifications(request):
+    # Lazy, so pages that never render the badge never touch the cache.
+    if not getattr(request, "user", None) or not request.user.is_authenticated:
+        return {"unread_notifications": 0}
+    return {
+        "unread_notifications": SimpleLazyObject(
+            lambda: notifications.unread_count(request.user)
+        )
+    }
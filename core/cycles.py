@@ -0,0 +1,148 @@
+import calendar
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import balances, dashboards
+from .models import AkawoGroup, Contribution, ContributionHistory, GroupMember
+
+
+# ======================
+# CONTRIBUTION CYCLES
+# ======================
+# current_cycle_month holds the first day of a group's open cycle: the 1st of
+# the month for monthly groups, a Monday for weekly ones. Keeping starts
+# aligned means thousands of groups share a handful of periods and each
+# period closes with a few set-based queries instead of per-group loops.
+
+def cycle_start(cycle, day):
+    if cycle == "weekly":
+        return day - datetime.timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def cycle_end(cycle, start):
+    if cycle == "weekly":
+        return start + datetime.timedelta(days=7)
+    days = calendar.monthrange(start.year, start.month)[1]
+    return start + datetime.timedelta(days=days)
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def open_new_groups():
+    # Groups that never had a cycle start in the one containing their creation.
+    starts = defaultdict(list)
+    for group_id, cycle, created_at in (
+        AkawoGroup.objects.filter(current_cycle_month__isnull=True)
+        .values_list("id", "contribution_cycle", "created_at")
+        .iterator()
+    ):
+        starts[cycle_start(cycle, timezone.localdate(created_at))].append(group_id)
+
+    opened = 0
+    for start, ids in starts.items():
+        opened += AkawoGroup.objects.filter(id__in=ids, current_cycle_month__isnull=True).update(
+            current_cycle_month=start, unpaid_count=balances.unpaid_at_open()
+        )
+    return opened
+
+
+def due_periods(today):
+    # Distinct (cycle, start) pairs whose period has ended by `today`.
+    pairs = (
+        AkawoGroup.objects.filter(current_cycle_month__isnull=False, current_cycle_month__lt=today)
+        .values_list("contribution_cycle", "current_cycle_month")
+        .distinct()
+    )
+    return sorted(
+        (cycle, start) for cycle, start in pairs
+        if cycle_end(cycle, start) <= today
+    )
+
+
+def close_period(cycle, start, chunk_size=500, history_batch=5000):
+    end = cycle_end(cycle, start)
+    group_ids = list(
+        AkawoGroup.objects.filter(contribution_cycle=cycle, current_cycle_month=start)
+        .values_list("id", flat=True)
+    )
+
+    closed = written = 0
+    for i in range(0, len(group_ids), chunk_size):
+        ids = group_ids[i:i + chunk_size]
+
+        with transaction.atomic():
+            # Re-check under the transaction so a concurrent run can't close
+            # the same groups twice.
+            ids = list(
+                AkawoGroup.objects.select_for_update()
+                .filter(id__in=ids, current_cycle_month=start)
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                continue
+
+            paid = dict(
+                Contribution.objects.filter(
+                    member__group_id__in=ids,
+                    status="completed",
+                    created_at__gte=_aware(start),
+                    created_at__lt=_aware(end),
+                )
+                .values("member_id")
+                .annotate(total=Sum("amount"))
+                .values_list("member_id", "total")
+            )
+
+            rows = [
+                ContributionHistory(
+                    group_id=group_id,
+                    member_id=member_id,
+                    amount=paid.get(member_id, 0),
+                    status="paid" if member_id in paid else "unpaid",
+                    period=start,
+                )
+                for member_id, group_id in GroupMember.objects.filter(group_id__in=ids)
+                .values_list("id", "group_id")
+                .iterator(chunk_size=history_batch)
+            ]
+            ContributionHistory.objects.bulk_create(rows, batch_size=history_batch)
+
+            # The new cycle started at `end`, not now: anything paid since
+            # is already in it. Recomputed in this UPDATE rather than reset to
+            # zero, so a payment that lands between period end and this run
+            # isn't lost.
+            dashboards.bump_groups(ids)
+            AkawoGroup.objects.filter(id__in=ids).update(
+                current_cycle_month=end, **balances.opening_totals(_aware(end))
+            )
+
+        closed += len(ids)
+        written += len(rows)
+
+    return closed, written
+
+
+def close_due_cycles(today=None, chunk_size=500):
+    today = today or timezone.localdate()
+    open_new_groups()
+
+    totals = defaultdict(int)
+    # A group that missed several runs is closed one period per pass until it
+    # catches up, so every missed period still gets its history rows.
+    while True:
+        periods = due_periods(today)
+        if not periods:
+            break
+        for cycle, start in periods:
+            closed, written = close_period(cycle, start, chunk_size=chunk_size)
+            totals["periods"] += 1
+            totals["groups"] += closed
+            totals["history_rows"] += written
+    return dict(totals)
@@ -0,0 +1,93 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from . import metrics
+from .models import AkawoGroup
+
+
+# ======================
+# DASHBOARD CACHE
+# ======================
+# Page contexts are cached under a key built from the user's version and
+# the versions of every group they organize or belong to. Nothing is ever
+# deleted: core.signals (and the bulk write paths that bypass signals) bump
+# a version, the key changes, and the old entry ages out.
+#
+# A bump writes a fresh random version rather than incr()ing. The file
+# cache's incr() is a read then a write, not atomic across processes, so
+# two workers bumping at once could both write n + 1 and one bump would be
+# lost. A plain set() can't be lost that way: whichever write lands last
+# is still a value no earlier reader has seen.
+
+CONTEXT_TTL = 5 * 60
+VERSION_TTL = 24 * 60 * 60  # group versions; user versions don't expire
+
+
+def _user_key(user_id):
+    return f"dash:v:user:{user_id}"
+
+
+def _group_key(group_id):
+    return f"dash:v:group:{group_id}"
+
+
+def _bump(keys, timeout=VERSION_TTL):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout)
+
+
+def bump_users(user_ids):
+    # After commit, so a concurrent request can't cache pre-commit data
+    # under the new version.
+    # No timeout: core.roles keeps the version in the session, and a key
+    # that expired back to 0 would make an old entry match again.
+    keys = [_user_key(user_id) for user_id in set(user_ids)]
+    transaction.on_commit(lambda: _bump(keys, timeout=None))
+
+
+def bump_groups(group_ids):
+    keys = [_group_key(group_id) for group_id in set(group_ids)]
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def _group_ids(user_id, user_version):
+    key = f"dash:groups:{user_id}:{user_version}"
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = sorted(
+            AkawoGroup.objects.filter(
+                Q(organizer_id=user_id) | Q(group_members__user_id=user_id)
+            ).values_list("id", flat=True).distinct()
+        )
+        cache.set(key, group_ids, VERSION_TTL)
+    return group_ids
+
+
+def user_version(user_id):
+    return cache.get(_user_key(user_id), 0)
+
+
+def cached_context(page, user, build):
+    version = user_version(user.pk)
+    group_ids = _group_ids(user.pk, version)
+
+    versions = cache.get_many([_group_key(group_id) for group_id in group_ids])
+    fingerprint = hashlib.md5(
+        ",".join(f"{g}:{versions.get(_group_key(g), 0)}" for g in group_ids).encode()
+    ).hexdigest()
+    key = f"dash:ctx:{page}:{user.pk}:{version}:{fingerprint}"
+
+    context = cache.get(key)
+    if context is not None:
+        metrics.incr("dashboards.hit")
+        metrics.incr(f"dashboards.{page}.hit")
+        return context
+
+    metrics.incr("dashboards.miss")
+    metrics.incr(f"dashboards.{page}.miss")
+    context = build()
+    cache.set(key, context, CONTEXT_TTL)
+    return context
@@ -0,0 +1,302 @@
+import csv
+import datetime
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Contribution, Report, Withdrawal
+
+
+# ======================
+# LEDGER EXPORTS
+# ======================
+# Exports stream: rows come from values_list(...).iterator() in chunks of
+# CHUNK_SIZE and are written out a chunk at a time, so memory stays flat
+# whatever the group's size. Rows go out in id order, which follows the
+# primary key and needs no sort. XLSX is written by hand as a streamed zip;
+# a sheet holds at most XLSX_MAX_ROWS rows, and longer ledgers continue on
+# further sheets.
+
+CHUNK_SIZE = 2000
+XLSX_MAX_ROWS = 1048576 - 1  # Excel's limit, less the header row
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ----------------------
+# Filters
+# ----------------------
+
+def _date(value):
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+def filters(params, statuses):
+    # ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive) and ?status=; bad values are ignored.
+    start, end = _date(params.get("from")), _date(params.get("to"))
+    status = params.get("status")
+    return {
+        "start": start and timezone.make_aware(datetime.datetime.combine(start, datetime.time.min)),
+        "end": end and timezone.make_aware(
+            datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min)
+        ),
+        "status": status if status in statuses else None,
+    }
+
+
+def _filter(queryset, field, start=None, end=None, **conditions):
+    if start:
+        queryset = queryset.filter(**{f"{field}__gte": start})
+    if end:
+        queryset = queryset.filter(**{f"{field}__lt": end})
+    return queryset.filter(**{k: v for k, v in conditions.items() if v is not None})
+
+
+def _local(value):
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+def _rows(queryset, columns):
+    # columns: (header, field, formatter or None)
+    fields = [field for _, field, _ in columns]
+    formatters = [(i, fmt) for i, (_, _, fmt) in enumerate(columns) if fmt]
+    for row in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        if formatters:
+            row = list(row)
+            for i, fmt in formatters:
+                row[i] = fmt(row[i])
+        yield row
+
+
+# ----------------------
+# Ledgers
+# ----------------------
+
+CONTRIBUTION_STATUSES = {"pending", "completed"}
+WITHDRAWAL_STATUSES = {"pending", "approved", "rejected"}
+REPORT_STATUSES = {"open", "resolved"}
+
+CONTRIBUTION_COLUMNS = [
+    ("Date", "contributed_at", _local),
+    ("Member", "member__user__username", None),
+    ("Amount", "amount", None),
+    ("Paid by", "paid_by", None),
+    ("Status", "status", None),
+    ("Reference", "payment_reference", None),
+]
+
+WITHDRAWAL_COLUMNS = [
+    ("Date", "created_at", _local),
+    ("Member", "member__user__username", None),
+    ("Amount", "amount", None),
+    ("Status", "status", None),
+    ("Note", "note", None),
+]
+
+REPORT_COLUMNS = [
+    ("Date", "created_at", _local),
+    ("Group", "group__group_name", None),
+    ("Contributor", "contributor__username", None),
+    ("Message", "message", None),
+    ("Resolved", "is_resolved", lambda value: "Yes" if value else "No"),
+]
+
+
+def _headers(columns):
+    return [header for header, _, _ in columns]
+
+
+def contributions(group, start=None, end=None, status=None):
+    queryset = _filter(
+        Contribution.objects.filter(member__group=group), "contributed_at",
+        start, end, status=status,
+    ).order_by("id")
+    return _headers(CONTRIBUTION_COLUMNS), _rows(queryset, CONTRIBUTION_COLUMNS)
+
+
+def withdrawals(group, start=None, end=None, status=None):
+    queryset = _filter(
+        Withdrawal.objects.filter(group=group), "created_at", start, end, status=status,
+    ).order_by("id")
+    return _headers(WITHDRAWAL_COLUMNS), _rows(queryset, WITHDRAWAL_COLUMNS)
+
+
+def reports(organizer, start=None, end=None, status=None):
+    resolved = {"open": False, "resolved": True}.get(status)
+    queryset = _filter(
+        Report.objects.filter(group__organizer=organizer), "created_at",
+        start, end, is_resolved=resolved,
+    ).order_by("id")
+    return _headers(REPORT_COLUMNS), _rows(queryset, REPORT_COLUMNS)
+
+
+# ----------------------
+# CSV
+# ----------------------
+
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value):
+    # Member-typed text (usernames, report messages) must not run as a
+    # spreadsheet formula when the file is opened.
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    buffer = io.StringIO()
+    buffer.write("\ufeff")  # so Excel reads UTF-8 (names, ₦)
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_safe(value) for value in row])
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# ----------------------
+# XLSX
+# ----------------------
+
+class _Sink:
+    # Write-only file for ZipFile; whatever it has collected is handed out
+    # by drain(). No tell(), so ZipFile writes in streaming mode.
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return "<row>" + "".join(_cell(value) for value in values) + "</row>"
+
+
+def _workbook_parts(sheets):
+    names = range(1, sheets + 1)
+    return {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in names
+            )
+            + "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/workbook.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in names)
+            + "</sheets></workbook>"
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                for n in names
+            )
+            + "</Relationships>"
+        ),
+    }
+
+
+def stream_xlsx(header, rows, max_rows=XLSX_MAX_ROWS):
+    # Sheets are written first; the workbook parts that list them go last,
+    # once the sheet count is known. Zip entry order doesn't matter.
+    sink = _Sink()
+    header_row = _row(header)
+    sheets = 0
+    rows = iter(rows)
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        pending = next(rows, None)
+        while sheets == 0 or pending is not None:
+            sheets += 1
+            # force_zip64: the entry size isn't known up front.
+            with archive.open(f"xl/worksheets/sheet{sheets}.xml", "w", force_zip64=True) as sheet:
+                sheet.write((_SHEET_HEAD + header_row).encode())
+                count = 0
+                while pending is not None and count < max_rows:
+                    sheet.write(_row(pending).encode())
+                    count += 1
+                    pending = next(rows, None)
+                    if count % CHUNK_SIZE == 0:
+                        yield sink.drain()
+                sheet.write(_SHEET_TAIL.encode())
+            yield sink.drain()
+
+        for name, body in _workbook_parts(sheets).items():
+            archive.writestr(name, body)
+    yield sink.drain()
+
+
+# ----------------------
+# Response
+# ----------------------
+
+WRITERS = {"csv": stream_csv, "xlsx": stream_xlsx}
+
+
+def response(fmt, filename, header, rows):
+    if fmt not in WRITERS:
+        raise Http404("Unknown export format")
+    res = StreamingHttpResponse(WRITERS[fmt](header, rows), content_type=CONTENT_TYPES[fmt])
+    res["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    res["Cache-Control"] = "private, no-store"
+    return res
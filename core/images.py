@@ -0,0 +1,176 @@
+import io
+import logging
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+# ======================
+# IMAGE VARIANTS
+# ======================
+# Profile and group photos are rendered at 32-64px, so pages link square
+# JPEG/WebP variants instead of the upload. Variants sit next to the original
+# under variants/ with names derived from it, so building a URL never touches
+# the storage. Processing also re-encodes the original without EXIF (GPS,
+# camera serials) after applying its orientation, capped at ORIGINAL_MAX;
+# the rewritten original gets a new content-hashed name (core.uploads).
+# Processing runs on the task queue, never in the request that saved the
+# upload. A "<field>_variants" flag on the row records that the set was
+# built; until then (still queued, processing failed, or an upload predates
+# build_image_variants) pages link the original.
+
+SIZES = {"small": 64, "medium": 192}
+FORMATS = {
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+}
+ORIGINAL_MAX = 1024
+
+
+def variant_name(name, size, ext):
+    path = PurePosixPath(name)
+    return str(path.parent / "variants" / f"{path.stem}_{size}.{ext}")
+
+
+def _flag(field_file):
+    return f"{field_file.field.attname}_variants"
+
+
+def built(field_file):
+    return bool(field_file) and getattr(field_file.instance, _flag(field_file), False)
+
+
+def mark_built(field_file, value):
+    instance = field_file.instance
+    if getattr(instance, _flag(field_file)) != value:
+        setattr(instance, _flag(field_file), value)
+        type(instance)._default_manager.filter(pk=instance.pk).update(**{_flag(field_file): value})
+
+
+def variant_url(field_file, size, ext="jpg"):
+    if not field_file:
+        return ""
+    if not built(field_file):
+        return field_file.url
+    return field_file.storage.url(variant_name(field_file.name, size, ext))
+
+
+def srcset(field_file, ext="jpg"):
+    if not built(field_file):
+        return ""
+    return ", ".join(
+        f"{variant_url(field_file, size, ext)} {px}w" for size, px in SIZES.items()
+    )
+
+
+def _last_variant(name):
+    # Written last, so its presence means the whole set is there.
+    return variant_name(name, list(SIZES)[-1], list(FORMATS)[-1])
+
+
+def has_variants(field_file):
+    return field_file.storage.exists(_last_variant(field_file.name))
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, content)
+
+
+def _rewrite_original(field_file, content):
+    # Saved through the field so a content-hashed name follows the new bytes;
+    # the row is updated directly to keep post_save from running again.
+    old_name = field_file.name
+    field_file.save(PurePosixPath(old_name).name, content, save=False)
+    if field_file.name != old_name:
+        attname = field_file.field.attname
+        manager = type(field_file.instance)._default_manager
+        manager.filter(pk=field_file.instance.pk).update(**{attname: field_file.name})
+        if not manager.filter(**{attname: old_name}).exists():
+            field_file.storage.delete(old_name)
+
+
+def _rgb(image):
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def process(field_file):
+    storage = field_file.storage
+    try:
+        with storage.open(field_file.name, "rb") as fh:
+            image = Image.open(fh)
+            fmt = image.format
+            image.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning("could not read image %s", field_file.name, exc_info=True)
+        return False
+
+    has_metadata = bool(image.getexif()) or "exif" in image.info
+    image = ImageOps.exif_transpose(image)
+
+    # Re-encoding costs quality, so the original is only rewritten when it
+    # carries metadata or is oversized. Saving without exif= drops it.
+    if has_metadata or max(image.size) > ORIGINAL_MAX:
+        original = image.copy()
+        original.thumbnail((ORIGINAL_MAX, ORIGINAL_MAX), Image.LANCZOS)
+        if fmt not in ("PNG", "WEBP", "GIF"):
+            fmt, original = "JPEG", _rgb(original)
+        options = dict(FORMATS["jpg"][1], quality=85) if fmt == "JPEG" else {}
+        _rewrite_original(field_file, _encode(original, fmt, options))
+
+    image = _rgb(image)
+    for size, px in SIZES.items():
+        fitted = ImageOps.fit(image, (px, px), Image.LANCZOS)
+        for ext, (variant_fmt, options) in FORMATS.items():
+            _replace(storage, variant_name(field_file.name, size, ext),
+                     _encode(fitted, variant_fmt, options))
+    return True
+
+
+def needs_variants(field_file):
+    # Cheap post_save check (one storage lookup, no Pillow work). Also keeps
+    # the flag in step with a changed or cleared upload, so pages link the
+    # original until build_variants has run.
+    if not field_file:
+        if field_file.instance.pk:
+            mark_built(field_file, False)
+        return False
+    if has_variants(field_file):
+        mark_built(field_file, True)
+        return False
+    mark_built(field_file, False)
+    return True
+
+
+def build_variants(model, pk, field, name):
+    # Task (core.tasks): builds the variants queued by core.signals. Skips a
+    # row that is gone or whose upload has been replaced since.
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    field_file = getattr(instance, field, None)
+    if not field_file or field_file.name != name or not needs_variants(field_file):
+        return
+    mark_built(field_file, process(field_file))
+
+
+def delete_variants(field_file):
+    if not field_file:
+        return
+    for size in SIZES:
+        for ext in FORMATS:
+            field_file.storage.delete(variant_name(field_file.name, size, ext))
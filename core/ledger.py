@@ -0,0 +1,45 @@
+from .models import GroupMember, Transaction
+
+
+# ======================
+# TRANSACTION LEDGER
+# ======================
+# Append-only: rows are only ever inserted, in the same DB transaction as
+# the settlement or approval they record. Transaction.reference is unique,
+# so a replayed settlement inserts nothing.
+
+def record_contributions(contributions):
+    if not contributions:
+        return
+
+    users = dict(
+        GroupMember.objects.filter(id__in={c.member_id for c in contributions})
+        .values_list("id", "user_id")
+    )
+    Transaction.objects.bulk_create([
+        Transaction(
+            user_id=users[contribution.member_id],
+            amount=contribution.amount,
+            transaction_type="contribution",
+            reference=contribution.payment_reference or contribution.reference,
+            status="success",
+        )
+        for contribution in contributions
+    ], ignore_conflicts=True)
+
+
+def record_withdrawal(withdrawal):
+    user_id = (
+        GroupMember.objects.filter(id=withdrawal.member_id)
+        .values_list("user_id", flat=True)
+        .get()
+    )
+    Transaction.objects.bulk_create([
+        Transaction(
+            user_id=user_id,
+            amount=withdrawal.amount,
+            transaction_type="withdrawal",
+            reference=f"wd_{withdrawal.id}",
+            status="success",
+        )
+    ], ignore_conflicts=True)
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.test.utils import setup_test_environment
+
+from core import paystack, views
+from core.benchmarks import Timer, test_database
+from core.models import AkawoGroup, GroupMember, Payment
+from core.paystack_stub import PaystackStubServer
+
+
+class Command(BaseCommand):
+    help = "Checkouts per worker against a slow Paystack stub: sync view vs async view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50,
+                            help="In-flight requests offered to the async worker.")
+        parser.add_argument("--latency", type=float, default=0.2,
+                            help="Seconds the stub waits before answering.")
+        parser.add_argument("--pool-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        server = PaystackStubServer(latency=options["latency"]).start()
+        # The views build their guard from settings: drop the request-path rate
+        # limit so the benchmark measures the worker, not the shedding.
+        overrides = {"PAYSTACK_BASE_URL": server.base_url, "PAYSTACK_RATE_LIMIT": 0}
+        if options["pool_size"]:
+            overrides["PAYSTACK_POOL_SIZE"] = options["pool_size"]
+            overrides["PAYSTACK_MAX_CONCURRENCY"] = options["pool_size"]
+
+        try:
+            with test_database(), override_settings(**overrides):
+                paystack.reset_guard()
+                paystack.reset_client()
+                paystack.reset_async_client()
+                member = self._fixtures()
+                count = options["checkouts"]
+
+                sync = self._run_sync(member, count)
+                async_ = asyncio.run(self._run_async(member, count, options["concurrency"]))
+
+                assert Payment.objects.count() == count * 2
+                for label, timer in (("sync", sync), ("async", async_)):
+                    summary = timer.summary()
+                    self.stdout.write(
+                        f"{label:>6}: {count} checkouts in {timer.wall:.2f}s "
+                        f"({count / timer.wall:.1f}/s per worker), "
+                        f"p50 {summary['p50_ms']:.0f}ms, p95 {summary['p95_ms']:.0f}ms"
+                    )
+        finally:
+            paystack.reset_guard()
+            paystack.reset_client()
+            paystack.reset_async_client()
+            server.stop()
+
+    def _fixtures(self):
+        user = User.objects.create_user("bench-payer", email="payer@example.com")
+        group = AkawoGroup.objects.create(
+            group_name="Bench", organizer=user,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        member = GroupMember.objects.create(user=user, group=group)
+        return member
+
+    def _run_sync(self, member, count):
+        # A sync worker serves one request at a time.
+        factory = RequestFactory()
+        timer = Timer()
+        started = time.perf_counter()
+        for _ in range(count):
+            request = factory.get("/pay/contribute/")
+            request.user = member.user
+            with timer():
+                response = views.start_contribution_payment(request, member.id)
+            assert response.status_code == 302, response.content
+        timer.wall = time.perf_counter() - started
+        return timer
+
+    async def _run_async(self, member, count, concurrency):
+        factory = AsyncRequestFactory()
+        timer = Timer()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def auser():
+            return member.user
+
+        async def checkout():
+            async with slots:
+                request = factory.get("/pay/contribute/")
+                request.user, request.auser = member.user, auser
+                started = time.perf_counter()
+                response = await views.start_contribution_payment_async(request, member.id)
+                timer.samples.append(time.perf_counter() - started)
+                assert response.status_code == 302, response.content
+
+        started = time.perf_counter()
+        await asyncio.gather(*(checkout() for _ in range(count)))
+        timer.wall = time.perf_counter() - started
+        return timer
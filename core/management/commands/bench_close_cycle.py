@@ -0,0 +1,70 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import cycles
+from core.benchmarks import test_database
+from core.models import AkawoGroup, Contribution, ContributionHistory, GroupMember
+
+
+class Command(BaseCommand):
+    help = "Time close_cycle for N groups x M members on a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=10000)
+        parser.add_argument("--members", type=int, default=50)
+        parser.add_argument("--paid-ratio", type=float, default=0.7)
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with test_database():
+            start = self._seed(options)
+
+            started = time.perf_counter()
+            totals = cycles.close_due_cycles(
+                today=cycles.cycle_end("monthly", start),
+                chunk_size=options["chunk_size"],
+            )
+            elapsed = time.perf_counter() - started
+
+            assert ContributionHistory.objects.count() == options["groups"] * options["members"]
+            self.stdout.write(
+                f"close_cycle: {totals['groups']} groups, {totals['history_rows']} history rows "
+                f"in {elapsed:.2f}s ({totals['history_rows'] / elapsed:.0f} rows/s)"
+            )
+
+    def _seed(self, options):
+        seeded = time.perf_counter()
+        start = cycles.cycle_start("monthly", timezone.localdate()) - datetime.timedelta(days=40)
+        start = start.replace(day=1)
+
+        users = User.objects.bulk_create([
+            User(username=f"bench-user-{i}") for i in range(options["members"])
+        ])
+        groups = AkawoGroup.objects.bulk_create([
+            AkawoGroup(
+                group_name=f"Bench {i}", organizer=users[0], contribution_cycle="monthly",
+                contribution_amount=1000, referral_code=f"B{i:07d}", current_cycle_month=start,
+            )
+            for i in range(options["groups"])
+        ], batch_size=2000)
+        members = GroupMember.objects.bulk_create([
+            GroupMember(user=user, group=group) for group in groups for user in users
+        ], batch_size=5000)
+
+        paid_at = timezone.make_aware(datetime.datetime.combine(start, datetime.time(12)))
+        contributions = Contribution.objects.bulk_create([
+            Contribution(member=member, amount=1000, status="completed")
+            for member in members if random.random() < options["paid_ratio"]
+        ], batch_size=5000)
+        Contribution.objects.update(created_at=paid_at)
+
+        self.stdout.write(
+            f"seeded {len(groups)} groups, {len(members)} members, "
+            f"{len(contributions)} contributions in {time.perf_counter() - seeded:.1f}s"
+        )
+        return start
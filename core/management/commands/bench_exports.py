@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import reset_queries
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+
+from core import views
+from core.benchmarks import test_database
+from core.models import AkawoGroup, Contribution, GroupMember
+
+
+class Command(BaseCommand):
+    help = "Peak Python memory and rows/s of the streamed ledger exports as the group grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000])
+        parser.add_argument("--members", type=int, default=50)
+        parser.add_argument("--format", nargs="+", choices=["csv", "xlsx"], default=["csv", "xlsx"])
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with test_database():
+            organizer, group, members = self._fixtures(options["members"])
+            factory = RequestFactory()
+            seeded = 0
+            for rows in sorted(options["rows"]):
+                self._grow(members, rows - seeded)
+                seeded = rows
+                for fmt in options["format"]:
+                    request = factory.get("/export")
+                    request.user = organizer
+                    self._measure(request, group, fmt, rows)
+
+    def _fixtures(self, count):
+        organizer = User.objects.create(username="bench-organizer")
+        group = AkawoGroup.objects.create(
+            group_name="Bench", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        users = User.objects.bulk_create([User(username=f"bench-{i}") for i in range(count)])
+        members = GroupMember.objects.bulk_create([
+            GroupMember(user=user, group=group) for user in users
+        ])
+        return organizer, group, members
+
+    def _grow(self, members, count):
+        batch = []
+        for i in range(count):
+            batch.append(Contribution(
+                member=members[i % len(members)], amount=1000, status="completed"
+            ))
+            if len(batch) == 5000:
+                Contribution.objects.bulk_create(batch)
+                batch = []
+        Contribution.objects.bulk_create(batch)
+
+    def _measure(self, request, group, fmt, rows):
+        reset_queries()
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = views.export_contributions(request, group.id, fmt)
+        size = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{fmt:>4} {rows:>9} rows: {elapsed:.2f}s ({rows / elapsed:.0f} rows/s), "
+            f"{size / 1e6:.1f}MB out, peak Python memory {peak / 1e6:.1f}MB"
+        )
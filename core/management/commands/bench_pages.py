@@ -0,0 +1,127 @@
+import datetime
+import json
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from core import seed
+from core.benchmarks import measure_url, test_database
+from core.models import AkawoGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database at each scale and drive the main pages through "
+        "the test client, recording p50/p95 latency and query counts. Write the "
+        "results with --output and check a later run against them with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", nargs="+", choices=sorted(seed.SCALES), default=["1k"])
+        parser.add_argument("--requests", type=int, default=20, help="Requests per page.")
+        parser.add_argument("--output", help="Write results to this JSON file.")
+        parser.add_argument("--compare", help="Baseline JSON file to check against.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed p95 slowdown against the baseline, as a fraction.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        results = {
+            "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "scales": {},
+        }
+
+        for scale in options["scale"]:
+            with test_database():
+                started = time.perf_counter()
+                rows = seed.seed(**seed.SCALES[scale])
+                self.stdout.write(f"[{scale}] seeded {rows} in {time.perf_counter() - started:.1f}s")
+                pages = self._drive(options["requests"])
+            results["scales"][scale] = {"rows": rows, "pages": pages}
+
+            for name, page in pages.items():
+                self.stdout.write(
+                    f"[{scale}] {name:<24} {page['status']} p50={page['p50_ms']:>8.2f}ms "
+                    f"p95={page['p95_ms']:>8.2f}ms cold={page['cold_ms']:>8.2f}ms "
+                    f"queries={page['queries_cold']}/{page['queries_warm']}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(f"wrote {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            regressions = self._compare(baseline, results, options["tolerance"])
+            if regressions:
+                raise CommandError("regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("no regressions against baseline"))
+
+    def _drive(self, requests):
+        # The busiest organizer and the busiest plain contributor.
+        organizer = (
+            User.objects.annotate(n=Count("organized_groups")).order_by("-n", "id").first()
+        )
+        contributor = (
+            User.objects.filter(organized_groups__isnull=True)
+            .annotate(n=Count("groupmember")).order_by("-n", "id").first()
+        )
+        group = (
+            AkawoGroup.objects.filter(organizer=organizer)
+            .annotate(n=Count("group_members")).order_by("-n", "id").first()
+        )
+
+        pages = {
+            "dashboard": (organizer, reverse("dashboard")),
+            "organizer_dashboard": (organizer, reverse("organizer_dashboard")),
+            "organizer_dash": (organizer, reverse("organizer_dash")),
+            "group_manage": (organizer, reverse("group_manage")),
+            "group_detail": (organizer, reverse("group_detail", args=[group.id])),
+            "organizer_reports": (organizer, reverse("organizer_reports")),
+            "contributor_dashboard": (contributor, reverse("contributor_dashboard")),
+            "contributor_dash": (contributor, reverse("contributor_dash")),
+            "transaction_history": (contributor, reverse("transaction_history")),
+            "notifications": (contributor, reverse("notifications")),
+        }
+
+        clients = {}
+        results = {}
+        for name, (user, url) in pages.items():
+            if user.pk not in clients:
+                clients[user.pk] = Client()
+                clients[user.pk].force_login(user)
+            results[name] = measure_url(clients[user.pk], url, requests)
+        return results
+
+    def _compare(self, baseline, results, tolerance):
+        regressions = []
+        for scale, current in results["scales"].items():
+            previous = baseline.get("scales", {}).get(scale)
+            if not previous:
+                continue
+            for name, page in current["pages"].items():
+                before = previous["pages"].get(name)
+                if not before:
+                    continue
+                # A couple of milliseconds of jitter isn't a regression.
+                limit = max(before["p95_ms"] * (1 + tolerance), before["p95_ms"] + 2)
+                if page["p95_ms"] > limit:
+                    regressions.append(
+                        f"[{scale}] {name}: p95 {before['p95_ms']}ms -> {page['p95_ms']}ms"
+                    )
+                for key in ("queries_cold", "queries_warm"):
+                    if page[key] > before[key]:
+                        regressions.append(f"[{scale}] {name}: {key} {before[key]} -> {page[key]}")
+        return regressions
@@ -0,0 +1,65 @@
+import time
+import uuid
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core import metrics
+from core.paystack import OutboundGuard, PaystackClient
+from core.paystack_stub import PaystackStubServer
+
+
+class Command(BaseCommand):
+    help = "Benchmark one-off requests against the pooled Paystack client using a local stub."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=500)
+        parser.add_argument("--latency", type=float, default=0.0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        calls = options["calls"]
+        server = PaystackStubServer(
+            latency=options["latency"], error_rate=options["error_rate"]
+        ).start()
+
+        try:
+            # Baseline: what the views used to do, a fresh connection per call.
+            started = time.perf_counter()
+            failures = 0
+            for _ in range(calls):
+                try:
+                    res = requests.get(
+                        f"{server.base_url}/transaction/verify/{uuid.uuid4().hex}",
+                        timeout=10,
+                    )
+                    if res.status_code != 200:
+                        failures += 1
+                except requests.RequestException:
+                    failures += 1
+            self._report("one-off", calls, time.perf_counter() - started, failures, server)
+
+            server.reset_counts()
+            metrics.reset("paystack.")
+            # Its own guard without the request-path rate limit, which would
+            # otherwise shed most of a tight loop.
+            client = PaystackClient(base_url=server.base_url, guard=OutboundGuard(rate=0))
+            started = time.perf_counter()
+            failures = 0
+            for _ in range(calls):
+                if not client.verify_transaction(uuid.uuid4().hex).get("status"):
+                    failures += 1
+            self._report("pooled", calls, time.perf_counter() - started, failures, server)
+            client.close()
+
+            self.stdout.write(f"client metrics: {metrics.snapshot('paystack.')}")
+        finally:
+            server.stop()
+
+    def _report(self, label, calls, elapsed, failures, server):
+        self.stdout.write(
+            f"{label:>8}: {calls} calls in {elapsed:.3f}s "
+            f"({calls / elapsed:.0f}/s), failed={failures}, "
+            f"tcp_connections={server.counts['connections']}, "
+            f"http_requests={server.counts['requests']}"
+        )
@@ -0,0 +1,92 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core import metrics
+from core.benchmarks import Timer
+from core.paystack import OutboundGuard, PaystackClient
+from core.paystack_stub import PaystackStubServer
+
+
+# (phase, stub latency in seconds, stub error rate)
+PHASES = [
+    ("healthy", 0.01, 0.0),
+    ("slow", 1.0, 0.0),
+    ("erroring", 0.01, 1.0),
+    ("recovered", 0.01, 0.0),
+]
+
+
+class Command(BaseCommand):
+    help = "Drive the guarded Paystack client through a stub outage and report what callers saw."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=2.0, help="per phase")
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--interval", type=float, default=0.02,
+                            help="Pause between one caller's calls.")
+        parser.add_argument("--max-concurrency", type=int, default=8)
+        parser.add_argument("--queue-timeout", type=float, default=0.25)
+        parser.add_argument("--rate", type=float, default=0)
+        parser.add_argument("--threshold", type=int, default=5)
+        parser.add_argument("--reset-timeout", type=float, default=1.0)
+        parser.add_argument("--slow-call", type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        server = PaystackStubServer().start()
+        guard = OutboundGuard(
+            max_concurrency=options["max_concurrency"],
+            queue_timeout=options["queue_timeout"],
+            rate=options["rate"],
+            threshold=options["threshold"],
+            reset_timeout=options["reset_timeout"],
+            slow_call=options["slow_call"],
+        )
+        client = PaystackClient(
+            base_url=server.base_url, max_retries=0, pool_size=options["threads"], guard=guard
+        )
+
+        try:
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                for phase, latency, error_rate in PHASES:
+                    server.latency, server.error_rate = latency, error_rate
+                    self._phase(phase, pool, client, server, options)
+        finally:
+            client.close()
+            server.stop()
+
+        self.stdout.write(f"guard metrics: {metrics.snapshot('paystack.')}")
+
+    def _phase(self, phase, pool, client, server, options):
+        server.reset_counts()
+        metrics.reset("paystack.rejected.")
+        timer = Timer()
+        deadline = time.monotonic() + options["seconds"]
+
+        def caller():
+            # One user retrying checkouts for the length of the phase.
+            results = []
+            while time.monotonic() < deadline:
+                with timer():
+                    results.append(client.verify_transaction(uuid.uuid4().hex))
+                time.sleep(options["interval"])
+            return results
+
+        results = [
+            result
+            for results in pool.map(lambda _: caller(), range(options["threads"]))
+            for result in results
+        ]
+
+        ok = sum(1 for r in results if r.get("status"))
+        rejected = metrics.snapshot("paystack.rejected.")["counters"]
+        summary = timer.summary()
+        self.stdout.write(
+            f"{phase:>9}: {len(results)} calls, ok={ok}, "
+            f"unavailable={len(results) - ok} (rejected {rejected or 0}), "
+            f"reached stub={server.counts['requests']}, "
+            f"p50 {summary['p50_ms']:.0f}ms, p95 {summary['p95_ms']:.0f}ms, "
+            f"breaker {client.guard.breaker.state}"
+        )
@@ -0,0 +1,54 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from core import reminders
+from core.smtp_stub import SMTPStubServer
+
+
+class Command(BaseCommand):
+    help = "Cost per 1,000 reminder emails: one SMTP session each vs one reused connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=1000)
+        parser.add_argument("--latency", type=float, default=0.0)
+        parser.add_argument("--batch-size", type=int, default=reminders.EMAIL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        server = SMTPStubServer(latency=options["latency"]).start()
+        host, port = server.address
+        addresses = [f"member{i}@example.com" for i in range(options["recipients"])]
+
+        def connection():
+            return get_connection(
+                "django.core.mail.backends.smtp.EmailBackend",
+                host=host, port=port, username="", password="",
+                use_tls=False, use_ssl=False,
+            )
+
+        try:
+            # Before: one send per member, each opening its own SMTP session.
+            started = time.perf_counter()
+            for address in addresses:
+                EmailMessage("Reminder", "Your contribution is due.", None, [address],
+                             connection=connection()).send()
+            self._report("per-member", time.perf_counter() - started, len(addresses), server)
+
+            # After: one task per batch, each over one reused connection.
+            server.reset_counts()
+            started = time.perf_counter()
+            batch_size = options["batch_size"]
+            for i in range(0, len(addresses), batch_size):
+                reminders.send_emails("Reminder", "Your contribution is due.",
+                                      addresses[i:i + batch_size], connection=connection())
+            self._report("batched", time.perf_counter() - started, len(addresses), server)
+        finally:
+            server.stop()
+
+    def _report(self, label, elapsed, count, server):
+        self.stdout.write(
+            f"{label:>10}: {count} emails in {elapsed:.3f}s, "
+            f"{elapsed / count * 1000 * 1000:.0f}ms per 1,000 recipients, "
+            f"smtp_sessions={server.counts['sessions']}, messages={server.counts['messages']}"
+        )
@@ -0,0 +1,129 @@
+import contextlib
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from core import settlement
+from core.benchmarks import test_database
+from core.models import AkawoGroup, GroupMember, Payment
+
+
+def _worker(path, options, references, results):
+    # Forked child: point the inherited connection at the copy under test.
+    connection.close()
+    connection.settings_dict["NAME"] = path
+    connection.settings_dict["OPTIONS"] = options
+
+    done = locked = 0
+    try:
+        for reference in references:
+            try:
+                # What the payment callback does for one reference.
+                settlement.settle([reference])
+                done += 1
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                locked += 1
+    finally:
+        connection.close()
+        results.put((done, locked))
+
+
+class Command(BaseCommand):
+    help = "Settle payments from several processes against SQLite under each profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--payments", type=int, default=500, help="per worker")
+        parser.add_argument(
+            "--profile", nargs="+", choices=sorted(settings.SQLITE_PROFILES),
+            default=["default", "concurrent"],
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_sqlite needs the SQLite backend")
+
+        workers, per_worker = options["workers"], options["payments"]
+        with tempfile.TemporaryDirectory() as tmp:
+            template = Path(tmp) / "template.sqlite3"
+            references = self._build(template, workers * per_worker)
+
+            for profile in options["profile"]:
+                path = Path(tmp) / f"{profile}.sqlite3"
+                shutil.copyfile(template, path)
+                # What `manage.py sqlite_journal_mode` does for a deployment.
+                with contextlib.closing(sqlite3.connect(path)) as db:
+                    db.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODES[profile]}")
+                elapsed, done, locked = self._run(
+                    str(path), settings.SQLITE_PROFILES[profile], references, workers
+                )
+                self.stdout.write(
+                    f"{profile:>10}: {done / elapsed:7.0f} settlements/s, "
+                    f"{locked} locked ({locked / len(references):.1%}), "
+                    f"{workers} workers x {per_worker} in {elapsed:.2f}s"
+                )
+
+    def _build(self, path, count):
+        # Migrate and seed once on a file database, then copy it per profile.
+        test_settings = connection.settings_dict["TEST"]
+        old_test_name = test_settings.get("NAME")
+        test_settings["NAME"] = str(path)
+        try:
+            with test_database(keepdb=True):
+                organizer = User.objects.create(username="bench-organizer")
+                group = AkawoGroup.objects.create(
+                    group_name="Bench", organizer=organizer,
+                    contribution_cycle="monthly", contribution_amount=1000,
+                )
+                users = User.objects.bulk_create([
+                    User(username=f"bench-{i}") for i in range(50)
+                ])
+                members = GroupMember.objects.bulk_create([
+                    GroupMember(user=user, group=group) for user in users
+                ])
+                payments = Payment.objects.bulk_create([
+                    Payment(contributor=members[i % len(members)], amount=1000,
+                            reference=uuid.uuid4().hex)
+                    for i in range(count)
+                ], batch_size=5000)
+        finally:
+            test_settings["NAME"] = old_test_name
+
+        # Start every profile from the rollback journal SQLite uses by default.
+        with contextlib.closing(sqlite3.connect(path)) as db:
+            db.execute("PRAGMA journal_mode=DELETE")
+        return [payment.reference for payment in payments]
+
+    def _run(self, path, options, references, workers):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        connections.close_all()
+
+        processes = [
+            context.Process(
+                target=_worker, args=(path, options, references[i::workers], results)
+            )
+            for i in range(workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        if any(process.exitcode for process in processes):
+            raise CommandError("a benchmark worker failed")
+        return elapsed, sum(t[0] for t in totals), sum(t[1] for t in totals)
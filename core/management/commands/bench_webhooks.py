@@ -0,0 +1,83 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core import paystack, views, webhooks
+from core.benchmarks import test_database
+from core.models import AkawoGroup, GroupMember, Payment, WebhookEvent
+
+
+class Command(BaseCommand):
+    help = "Compare events/sec for inline vs queued charge.success handling."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with test_database():
+            inline = self._run(options["events"], inline=True)
+            queued = self._run(options["events"], inline=False, batch_size=options["batch_size"])
+
+        for label, (request_s, total_s, count) in (("inline", inline), ("queued", queued)):
+            self.stdout.write(
+                f"{label:>6}: request path {count / request_s:.0f} events/s, "
+                f"end-to-end {count / total_s:.0f} events/s ({count} events)"
+            )
+
+    def _fixtures(self, count):
+        organizer = User.objects.create(username=f"bench-{uuid.uuid4().hex[:8]}")
+        group = AkawoGroup.objects.create(
+            group_name="Bench", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        member = GroupMember.objects.create(user=organizer, group=group)
+        payments = Payment.objects.bulk_create([
+            Payment(contributor=member, amount=1000, reference=uuid.uuid4().hex)
+            for _ in range(count)
+        ])
+
+        secret = settings.PAYSTACK_SECRET_KEY.encode()
+        bodies = []
+        for i, payment in enumerate(payments):
+            payload = json.dumps({
+                "event": "charge.success",
+                "data": {"id": i, "reference": payment.reference, "status": "success"},
+            }).encode()
+            bodies.append((payload, hmac.new(secret, payload, hashlib.sha512).hexdigest()))
+        return bodies
+
+    def _run(self, count, inline, batch_size=500):
+        bodies = self._fixtures(count)
+        factory = RequestFactory()
+
+        started = time.perf_counter()
+        for payload, signature in bodies:
+            if inline:
+                # The pre-inbox behaviour: verify, parse and settle in the request.
+                if paystack.verify_signature(payload, signature):
+                    webhooks.apply_events([json.loads(payload)])
+            else:
+                request = factory.post(
+                    "/webhook/paystack/", data=payload,
+                    content_type="application/json",
+                    HTTP_X_PAYSTACK_SIGNATURE=signature,
+                )
+                views.paystack_webhook(request)
+        request_s = time.perf_counter() - started
+
+        if not inline:
+            while webhooks.drain(batch_size)[0]:
+                pass
+        total_s = time.perf_counter() - started
+
+        assert not Payment.objects.filter(status="initiated").exists()
+        WebhookEvent.objects.all().delete()
+        return request_s, total_s, count
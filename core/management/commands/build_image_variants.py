@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core import images
+from core.models import AkawoGroup, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the avatar/group photo variants (and strip EXIF from the originals) "
+        "for images uploaded before the pipeline, or all of them with --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild variants that already exist.")
+
+    def handle(self, *args, **options):
+        sources = [
+            ("profiles", UserProfile.objects.exclude(image="").exclude(image__isnull=True), "image"),
+            ("groups", AkawoGroup.objects.exclude(photo="").exclude(photo__isnull=True), "photo"),
+        ]
+        for label, queryset, field in sources:
+            built = skipped = failed = 0
+            for instance in queryset.only("id", field, f"{field}_variants").iterator():
+                field_file = getattr(instance, field)
+                if not options["force"] and images.has_variants(field_file):
+                    images.mark_built(field_file, True)
+                    skipped += 1
+                elif images.process(field_file):
+                    images.mark_built(field_file, True)
+                    built += 1
+                else:
+                    images.mark_built(field_file, False)
+                    failed += 1
+            self.stdout.write(f"{label}: built {built}, skipped {skipped}, failed {failed}")
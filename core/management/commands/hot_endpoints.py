@@ -0,0 +1,74 @@
+import shutil
+import statistics
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+SORT_KEYS = {
+    "total": lambda row: row["total_s"],
+    "p95": lambda row: row["p95_ms"],
+    "count": lambda row: row["count"],
+    "sql": lambda row: row["sql_count"],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "List the hottest endpoints from the windows ProfilingMiddleware flushes "
+        "to PROFILING_DIR (run the server with PROFILING=True first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="total",
+                            help="total: time spent across all requests (default).")
+        parser.add_argument("--reset", action="store_true",
+                            help="Delete the collected windows and exit.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            shutil.rmtree(Path(settings.PROFILING_DIR), ignore_errors=True)
+            self.stdout.write("profiling data cleared")
+            return
+
+        rows = [self._summarize(name, samples) for name, samples in profiling.load().items()]
+        if not rows:
+            self.stdout.write(f"no profiling data in {settings.PROFILING_DIR}")
+            return
+
+        rows.sort(key=SORT_KEYS[options["sort"]], reverse=True)
+        self.stdout.write(
+            f"{'endpoint':<32} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'max ms':>9} {'sql':>6} {'sql ms':>8} {'tpl ms':>8} {'out ms':>8}"
+        )
+        for row in rows[:options["limit"]]:
+            self.stdout.write(
+                f"{row['name'][:32]:<32} {row['count']:>7} {row['total_s']:>9.2f} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['max_ms']:>9.1f} "
+                f"{row['sql_count']:>6.1f} {row['sql_ms']:>8.1f} {row['tpl_ms']:>8.1f} "
+                f"{row['outbound_ms']:>8.1f}"
+            )
+
+    def _summarize(self, name, samples):
+        columns = dict(zip(profiling.SAMPLE_FIELDS, zip(*samples)))
+        totals = sorted(columns["total_ms"])
+
+        def pct(p):
+            return totals[min(len(totals) - 1, int(round(p / 100 * (len(totals) - 1))))]
+
+        return {
+            "name": name,
+            "count": len(samples),
+            "total_s": sum(totals) / 1000,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": totals[-1],
+            # Averages per request.
+            "sql_count": statistics.fmean(columns["sql_count"]),
+            "sql_ms": statistics.fmean(columns["sql_ms"]),
+            "tpl_ms": statistics.fmean(columns["tpl_ms"]),
+            "outbound_ms": statistics.fmean(columns["outbound_ms"]),
+        }
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.paystack_stub import PaystackStubServer
+
+
+class Command(BaseCommand):
+    help = "Run a local Paystack stand-in (point PAYSTACK_BASE_URL at it)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds to sleep before each response.")
+        parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="Fraction of requests answered with a 503.")
+
+    def handle(self, *args, **options):
+        server = PaystackStubServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+        )
+        self.stdout.write(f"Paystack stub listening on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served: {server.counts}")
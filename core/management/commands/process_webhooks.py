@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from core import webhooks
+
+
+class Command(BaseCommand):
+    help = "Drain the Paystack webhook inbox and settle payments in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--once", action="store_true",
+                            help="Drain what is pending and exit instead of polling.")
+        parser.add_argument("--sleep", type=float, default=1.0,
+                            help="Seconds to wait when the inbox is empty.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        while True:
+            try:
+                processed, settled = webhooks.drain(batch_size)
+            except DatabaseError as exc:
+                # e.g. the database is locked or gone; keep the worker alive.
+                self.stderr.write(f"Drain failed: {exc}")
+                close_old_connections()
+                time.sleep(options["sleep"])
+                continue
+
+            if processed:
+                self.stdout.write(f"Processed {processed} events, settled {settled} payments")
+                continue
+
+            if options["once"]:
+                return
+
+            time.sleep(options["sleep"])
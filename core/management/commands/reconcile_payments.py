@@ -0,0 +1,159 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import settlement
+from core.models import Payment
+from core.paystack import OutboundGuard, PaystackClient, TokenBucket
+
+
+FAILED_STATUSES = {"failed", "abandoned", "reversed"}
+
+
+class Command(BaseCommand):
+    help = "Verify stale 'initiated' payments against Paystack and settle or fail them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=60,
+                            help="Only payments initiated more than this many minutes ago.")
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--rate", type=float, default=50,
+                            help="Maximum verify calls per second.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--checkpoint", default=settings.RECONCILE_CHECKPOINT)
+        parser.add_argument("--reset", action="store_true", help="Ignore any saved checkpoint.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        checkpoint = Path(options["checkpoint"])
+        last_id = 0
+        stopped = False
+        if checkpoint.exists() and not options["reset"]:
+            last_id = json.loads(checkpoint.read_text())["last_id"]
+            self.stdout.write(f"Resuming after payment id {last_id}")
+
+        cutoff = timezone.now() - timedelta(minutes=options["older_than"])
+        pending = (
+            Payment.objects.filter(status="initiated", created_at__lt=cutoff)
+            .only("id", "reference", "parent_reference", "amount", "status", "contributor_id")
+            .order_by("id")
+        )
+
+        # Paced by the bucket below, not the request-path guard's rate limit.
+        client = PaystackClient(
+            pool_size=options["workers"],
+            guard=OutboundGuard(max_concurrency=options["workers"], rate=0),
+        )
+        bucket = TokenBucket(options["rate"])
+
+        def verify(reference):
+            bucket.acquire()
+            return reference, client.verify_transaction(reference)
+
+        totals = {"checked": 0, "success": 0, "failed": 0, "unchanged": 0}
+        # Batch-checkout rows share a parent reference and can straddle
+        # chunks; its answer is kept so the next chunk doesn't ask again.
+        batch_results = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                # Keyset chunks, read in full before anything is written:
+                # the loop updates the same table it reads.
+                chunk = list(pending.filter(id__gt=last_id)[:options["chunk_size"]])
+                if not chunk:
+                    break
+                last_id, stopped = self._reconcile(
+                    pool, verify, chunk, totals, batch_results, options["dry_run"]
+                )
+                self._save_checkpoint(checkpoint, last_id, options["dry_run"])
+                if stopped:
+                    break
+
+        client.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Checked {totals['checked']} payments in {elapsed:.1f}s: "
+            f"{totals['success']} settled, {totals['failed']} failed, "
+            f"{totals['unchanged']} still pending"
+        )
+
+        if stopped:
+            # Nothing past the first unanswered row is checkpointed, so the
+            # next run picks up from there.
+            self.stderr.write(f"Paystack unavailable; stopped before payment id {last_id + 1}")
+        elif not options["dry_run"] and checkpoint.exists():
+            checkpoint.unlink()
+
+    def _reconcile(self, pool, verify, chunk, totals, batch_results, dry_run):
+        settled, failed = [], []
+
+        # Rows of one batch checkout share a Paystack reference; verify it once.
+        by_reference = {}
+        for payment in chunk:
+            by_reference.setdefault(settlement.charge_reference(payment), []).append(payment)
+
+        results = [
+            (reference, batch_results[reference])
+            for reference in by_reference if reference in batch_results
+        ]
+        results += pool.map(verify, [
+            reference for reference in by_reference if reference not in batch_results
+        ])
+
+        # Rows past the first unanswered one wait for the next run, so the
+        # checkpoint can stop right before it.
+        unavailable = [
+            payment.id
+            for reference, data in results if data.get("unavailable")
+            for payment in by_reference[reference]
+        ]
+        last_id = min(unavailable) - 1 if unavailable else chunk[-1].id
+
+        for reference, data in results:
+            if data.get("unavailable"):
+                continue
+            if by_reference[reference][0].parent_reference:
+                batch_results[reference] = data
+            payments = [p for p in by_reference[reference] if p.id <= last_id]
+            totals["checked"] += len(payments)
+            status = (data.get("data") or {}).get("status") if data.get("status") else None
+
+            if status == "success":
+                settled.extend(payments)
+            elif status in FAILED_STATUSES or data.get("message") == "Transaction reference not found":
+                failed.extend(payments)
+            else:
+                totals["unchanged"] += len(payments)
+
+        totals["success"] += len(settled)
+        totals["failed"] += len(failed)
+
+        if not dry_run:
+            with transaction.atomic():
+                # A webhook or callback may have settled some of these since
+                # they were read; only touch rows that are still initiated.
+                still_pending = set(
+                    Payment.objects.select_for_update()
+                    .filter(id__in=[p.id for p in settled + failed], status="initiated")
+                    .values_list("id", flat=True)
+                )
+                settlement.settle_payments([p for p in settled if p.id in still_pending])
+
+                failed = [p for p in failed if p.id in still_pending]
+                for payment in failed:
+                    payment.status = "failed"
+                Payment.objects.bulk_update(failed, ["status"])
+
+        return last_id, bool(unavailable)
+
+    def _save_checkpoint(self, checkpoint, last_id, dry_run):
+        if not dry_run:
+            checkpoint.write_text(json.dumps({"last_id": last_id}))
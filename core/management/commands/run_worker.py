@@ -0,0 +1,77 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from core import metrics, tasks
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the durable Task queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--visibility-timeout", type=int, default=tasks.DEFAULT_VISIBILITY_TIMEOUT,
+                            help="Seconds a claimed task stays leased before another worker may retry it.")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        threads = [
+            threading.Thread(
+                target=self._work, args=(f"{prefix}:{i}", stop, options), daemon=True
+            )
+            for i in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self._report()
+
+    def _work(self, worker_id, stop, options):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                claimed = tasks.claim(worker_id, visibility_timeout=options["visibility_timeout"])
+
+                if not claimed:
+                    tasks.reap_expired()
+                    if options["once"]:
+                        return
+                    stop.wait(options["poll"])
+                    continue
+
+                for task in claimed:
+                    tasks.run(task, worker_id)
+        finally:
+            connection.close()
+
+    def _report(self):
+        stats = metrics.snapshot("tasks.")
+        for name, timing in sorted(stats["timings"].items()):
+            counts = {
+                outcome: stats["counters"].get(f"{name}.{outcome}", 0)
+                for outcome in ("done", "retried", "failed")
+            }
+            self.stdout.write(
+                f"{name[len('tasks.'):]}: {timing['count']} runs, "
+                f"avg {timing['avg_ms']:.1f}ms, max {timing['max_ms']:.1f}ms, {counts}"
+            )
@@ -0,0 +1,47 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with synthetic users, groups, members and "
+        "years of contribution, payment, withdrawal and notification history. "
+        f"Seeded users log in with the password '{seed.PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(seed.SCALES), default="1k",
+                            help="Preset sizes; the flags below override single values.")
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--groups", type=int)
+        parser.add_argument("--members", type=int, help="Members per group.")
+        parser.add_argument("--years", type=float, help="Years of history.")
+        parser.add_argument("--paid-ratio", type=float, default=0.8)
+        parser.add_argument("--prefix", default="seed",
+                            help="Username/reference prefix, so repeated runs don't collide.")
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        sizes = dict(seed.SCALES[options["scale"]])
+        for key in sizes:
+            if options[key] is not None:
+                sizes[key] = options[key]
+        if sizes["members"] < 1 or sizes["groups"] < 1:
+            raise CommandError("--groups and --members must be at least 1")
+
+        started = time.perf_counter()
+        counts = seed.seed(
+            paid_ratio=options["paid_ratio"],
+            prefix=options["prefix"],
+            rng=random.Random(options["random_seed"]),
+            log=lambda message: self.stdout.write(f"  {message}"),
+            **sizes,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            ", ".join(f"{value} {key}" for key, value in counts.items())
+            + f" in {time.perf_counter() - started:.1f}s"
+        ))
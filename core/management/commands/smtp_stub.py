@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.smtp_stub import SMTPStubServer
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP stand-in (set EMAIL_HOST/EMAIL_PORT to it, EMAIL_USE_TLS off)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds to sleep after each message.")
+
+    def handle(self, *args, **options):
+        server = SMTPStubServer(options["host"], options["port"], options["latency"])
+        self.stdout.write(f"SMTP stub listening on {options['host']}:{server.address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Received: {server.counts}")
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Show or switch the SQLite journal mode. The mode is stored in the "
+        "database file, so a switch is persistent and only needed once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", nargs="?", choices=["wal", "delete"],
+                            help="Switch to this mode; omit to show the current one.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("sqlite_journal_mode needs the SQLite backend")
+
+        with connection.cursor() as cursor:
+            if options["mode"]:
+                # Can't change inside a transaction; the cursor is in autocommit.
+                cursor.execute(f"PRAGMA journal_mode={options['mode']}")
+            else:
+                cursor.execute("PRAGMA journal_mode")
+            mode = cursor.fetchone()[0]
+
+        expected = settings.SQLITE_JOURNAL_MODES.get(settings.SQLITE_PROFILE)
+        self.stdout.write(f"{connection.settings_dict['NAME']}: journal_mode={mode}")
+        if expected and mode != expected:
+            self.stdout.write(
+                f'The "{settings.SQLITE_PROFILE}" profile expects {expected}: '
+                f"run `manage.py sqlite_journal_mode {expected}`."
+            )
@@ -0,0 +1,141 @@
+import datetime
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import condition, require_safe
+
+from .uploads import is_hashed
+
+
+# ======================
+# MEDIA SERVING
+# ======================
+# Uploaded files outside DEBUG. Validators come from the file's size and
+# mtime, so a repeat visit is a 304 without reading the file. Content-hashed
+# names (core.uploads) never change and are cached as immutable; anything
+# else revalidates hourly. With MEDIA_SENDFILE set, Django only checks the
+# path and the front server (Apache X-Sendfile, nginx X-Accel-Redirect)
+# streams the bytes, ranges included.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _resolve(request, path):
+    # Stat once per request; the validators and the view all need it.
+    if not hasattr(request, "_media_file"):
+        request._media_file = None
+        try:
+            full = safe_join(settings.MEDIA_ROOT, path)
+            if os.path.isfile(full):
+                request._media_file = (full, os.stat(full))
+        except (SuspiciousFileOperation, OSError):
+            pass
+    return request._media_file
+
+
+def _etag_for(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag(request, path):
+    found = _resolve(request, path)
+    return _etag_for(found[1]) if found else None
+
+
+def _last_modified(request, path):
+    found = _resolve(request, path)
+    if not found:
+        return None
+    return datetime.datetime.fromtimestamp(int(found[1].st_mtime), tz=datetime.timezone.utc)
+
+
+def _byte_range(header, size):
+    # One range only; anything else gets the whole file, which RFC 9110 allows.
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: the last N bytes.
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, stat):
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', 'W/"')):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(stat.st_mtime) <= since
+
+
+def _read(full, start, length):
+    with open(full, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def serve_media(request, path):
+    found = _resolve(request, path)
+    if not found:
+        raise Http404("Not found")
+    full, stat = found
+    content_type, encoding = mimetypes.guess_type(full)
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SENDFILE == "x-accel-redirect":
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + path
+        else:
+            response["X-Sendfile"] = full
+    else:
+        size = stat.st_size
+        byte_range = None
+        if "Range" in request.headers and _if_range_matches(request, _etag_for(stat), stat):
+            byte_range = _byte_range(request.headers["Range"], size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read(full, start, end - start + 1), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        else:
+            response = FileResponse(open(full, "rb"), content_type=content_type)
+        response["Accept-Ranges"] = "bytes"
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Cache-Control"] = (
+        IMMUTABLE if is_hashed(path) else f"public, max-age={settings.MEDIA_MAX_AGE}"
+    )
+    return response
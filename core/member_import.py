@@ -0,0 +1,266 @@
+import csv
+import io
+import json
+import re
+import secrets
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage, get_connection
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.urls import reverse
+
+from . import notifications, tasks
+from .models import GroupInvite, GroupMember, Notification, UserProfile
+
+
+# ======================
+# BULK MEMBER IMPORT
+# ======================
+# Invites a list of people (CSV or JSON: email and/or phone, optional first
+# and last name) to a group. People are matched to existing accounts by
+# email, then by profile phone number, and get a GroupInvite and a
+# notification. Nobody else gets an account made for them: their invite is
+# stored against the email and/or phone. An email address is sent a link
+# (claim_invite) where they sign up and join in one step; a phone-only
+# invite waits until an account saves that number in its settings. Nobody
+# is enrolled directly: a GroupMember row only appears once the invite is
+# accepted. Each batch of BATCH_SIZE rows costs a fixed handful of queries,
+# and invites go in with bulk_create(ignore_conflicts=True) against
+# GroupInvite's unique constraints, so a re-run is never an error.
+#
+# Every input row gets a result: invited, already_member, duplicate
+# (repeats an earlier row) or invalid. People with and without an account
+# both come back as "invited", so an import can't be used to find out who
+# has an account.
+
+BATCH_SIZE = 500
+INVITE_EMAIL_BATCH_SIZE = 100
+
+_PHONE = re.compile(r"^\+?\d{7,15}$")
+
+
+class InvalidUpload(ValueError):
+    """The upload as a whole can't be read."""
+
+
+def parse(upload):
+    # upload: a file-like of bytes; JSON if it looks like JSON, else CSV.
+    try:
+        text = upload.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise InvalidUpload("File must be UTF-8 encoded")
+    if text.lstrip().startswith(("[", "{")):
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            raise InvalidUpload(f"Invalid JSON: {exc}")
+        rows = data.get("members") if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise InvalidUpload("JSON must be a list of member objects")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or not {"email", "phone"} & {
+            name.strip().lower() for name in reader.fieldnames
+        }:
+            raise InvalidUpload("CSV needs a header row with an email or phone column")
+        rows = [{(k or "").strip().lower(): v for k, v in row.items()} for row in reader]
+
+    if len(rows) > settings.MEMBER_IMPORT_MAX_ROWS:
+        raise InvalidUpload(f"At most {settings.MEMBER_IMPORT_MAX_ROWS} rows per import")
+    return rows
+
+
+def _clean(row):
+    email = str(row.get("email") or "").strip().lower()
+    phone = re.sub(r"[\s\-()]", "", str(row.get("phone") or ""))
+    if not email and not phone:
+        return None, "email or phone is required"
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            return None, f"invalid email {email!r}"
+    if phone and not _PHONE.match(phone):
+        return None, f"invalid phone {phone!r}"
+    return {
+        "email": email,
+        "phone": phone,
+        "first_name": str(row.get("first_name") or "").strip()[:150],
+        "last_name": str(row.get("last_name") or "").strip()[:150],
+    }, ""
+
+
+def _resolve(people):
+    # person index -> user id, for people who already have an account.
+    emails = {p["email"] for p in people if p["email"]}
+    phones = {p["phone"] for p in people if p["phone"]}
+    by_email = {}
+    for user_id, email in (
+        User.objects.annotate(lower=Lower("email")).filter(lower__in=emails)
+        .order_by("-id").values_list("id", "lower")
+    ):
+        by_email[email] = user_id  # oldest account wins
+    by_phone = dict(
+        UserProfile.objects.filter(phone_number__in=phones).order_by("-id")
+        .values_list("phone_number", "user_id")
+    ) if phones else {}
+
+    found = {}
+    for i, person in enumerate(people):
+        user_id = by_email.get(person["email"]) or by_phone.get(person["phone"])
+        if user_id:
+            found[i] = user_id
+    return found
+
+
+def _import_batch(group, people, site):
+    found = _resolve(people)
+
+    user_ids = set(found.values())
+    members = set(
+        GroupMember.objects.filter(group=group, user_id__in=user_ids)
+        .values_list("user_id", flat=True)
+    )
+    pending = set(
+        GroupInvite.objects.filter(group=group, user_id__in=user_ids)
+        .values_list("user_id", flat=True)
+    )
+    invited = user_ids - members - pending
+    GroupInvite.objects.bulk_create(
+        [GroupInvite(user_id=user_id, group=group) for user_id in invited],
+        ignore_conflicts=True,
+    )
+    if invited:
+        notifications.notify_many([
+            Notification(
+                user_id=user_id,
+                message=f"You've been invited to join {group.group_name}. Accept it under Your Groups.",
+            )
+            for user_id in invited
+        ])
+
+    # Everyone else is invited by address. A repeat of a pending address
+    # invite hits the partial unique constraints and is skipped, so only
+    # the tokens that went in get an email.
+    tokens = []
+    address_invites = []
+    for i, person in enumerate(people):
+        if i in found:
+            continue
+        tokens.append(secrets.token_urlsafe(32))
+        address_invites.append(GroupInvite(group=group, token=tokens[-1], **person))
+    GroupInvite.objects.bulk_create(address_invites, ignore_conflicts=True)
+    to_mail = list(
+        GroupInvite.objects.filter(token__in=tokens).exclude(email="")
+        .values_list("id", flat=True)
+    )
+    for start in range(0, len(to_mail), INVITE_EMAIL_BATCH_SIZE):
+        tasks.enqueue(send_invite_emails, to_mail[start:start + INVITE_EMAIL_BATCH_SIZE], site)
+
+    return [
+        "already_member" if found.get(i) in members else "invited"
+        for i in range(len(people))
+    ]
+
+
+def send_invite_emails(invite_ids, site):
+    # Task. Invites claimed since the enqueue are skipped, so a retry only
+    # re-sends to people who haven't signed up yet.
+    invites = (
+        GroupInvite.objects.filter(id__in=invite_ids, user__isnull=True)
+        .exclude(email="").select_related("group")
+    )
+    connection = get_connection()
+    with connection:
+        return connection.send_messages([
+            EmailMessage(
+                f"You're invited to join {invite.group.group_name}",
+                f"You've been invited to contribute to {invite.group.group_name} on AkawoX.\n\n"
+                f"Create your account and join the group here:\n"
+                f"{urljoin(site, reverse('claim_invite', args=[invite.token]))}\n",
+                settings.DEFAULT_FROM_EMAIL,
+                [invite.email],
+            )
+            for invite in invites
+        ]) or 0
+
+
+def claim(invite, user):
+    # Hands an address invite to an account: the one just created from the
+    # link, or whoever was signed in when they followed it.
+    already = (
+        GroupMember.objects.filter(group_id=invite.group_id, user=user).exists()
+        or GroupInvite.objects.filter(group_id=invite.group_id, user=user).exists()
+    )
+    if already:
+        invite.delete()
+        return None
+    invite.user = user
+    invite.token = None
+    invite.save(update_fields=["user", "token"])
+    return invite
+
+
+def claim_by_phone(user, phone):
+    # Phone-only invites have no link to send; they go to the account that
+    # saves the number, the same match the import makes for existing
+    # accounts.
+    phone = re.sub(r"[\s\-()]", "", phone or "")
+    if not _PHONE.match(phone):
+        return 0
+    taken = set(
+        GroupMember.objects.filter(user=user).values_list("group_id", flat=True)
+    ) | set(
+        GroupInvite.objects.filter(user=user).values_list("group_id", flat=True)
+    )
+    unclaimed = GroupInvite.objects.filter(user__isnull=True, phone=phone)
+    unclaimed.filter(group_id__in=taken).delete()
+    return unclaimed.exclude(group_id__in=taken).update(user=user, token=None)
+
+
+def run(group, rows, site="", batch_size=BATCH_SIZE):
+    # site: absolute root URL the emailed claim links are built on.
+    results = []
+    seen = set()
+    valid = []  # (result, person)
+    for number, row in enumerate(rows, 1):
+        person, error = _clean(row)
+        result = {
+            "row": number,
+            "email": (person or {}).get("email") or str(row.get("email") or ""),
+            "phone": (person or {}).get("phone") or str(row.get("phone") or ""),
+            "status": "invalid" if error else "",
+            "message": error,
+        }
+        results.append(result)
+        if error:
+            continue
+        keys = {("email", person["email"]), ("phone", person["phone"])} - {
+            ("email", ""), ("phone", "")
+        }
+        if keys & seen:
+            result["status"] = "duplicate"
+            result["message"] = "repeats an earlier row"
+            continue
+        seen |= keys
+        valid.append((result, person))
+
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        with transaction.atomic():
+            statuses = _import_batch(group, [person for _, person in batch], site)
+        for (result, _), status in zip(batch, statuses):
+            result["status"] = status
+    return results
+
+
+def summary(results):
+    counts = dict.fromkeys(("invited", "already_member", "duplicate", "invalid"), 0)
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
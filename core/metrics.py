@@ -0,0 +1,55 @@
+import threading
+
+
+# ======================
+# IN-PROCESS METRICS
+# ======================
+# Counters and latency summaries live per worker process. They are cheap
+# enough to record on every call and are read by management commands and
+# benchmarks through snapshot().
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_gauges = {}
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, seconds):
+    ms = seconds * 1000.0
+    with _lock:
+        stat = _timings.get(name)
+        if stat is None:
+            stat = _timings[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        stat["count"] += 1
+        stat["total_ms"] += ms
+        if ms > stat["max_ms"]:
+            stat["max_ms"] = ms
+
+
+def snapshot(prefix=""):
+    with _lock:
+        counters = {k: v for k, v in _counters.items() if k.startswith(prefix)}
+        timings = {}
+        for name, stat in _timings.items():
+            if not name.startswith(prefix):
+                continue
+            timings[name] = dict(stat, avg_ms=stat["total_ms"] / stat["count"])
+        gauges = {k: v for k, v in _gauges.items() if k.startswith(prefix)}
+    return {"counters": counters, "timings": timings, "gauges": gauges}
+
+
+def reset(prefix=""):
+    with _lock:
+        for store in (_counters, _timings, _gauges):
+            for name in [k for k in store if k.startswith(prefix)]:
+                del store[name]
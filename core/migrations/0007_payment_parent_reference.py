@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='parent_reference',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    UserProfile = apps.get_model('core', 'UserProfile')
+    AkawoGroup = apps.get_model('core', 'AkawoGroup')
+    GroupMember = apps.get_model('core', 'GroupMember')
+
+    def count(queryset, key):
+        return Coalesce(
+            Subquery(queryset.values(key).annotate(n=Count('id')).values('n')[:1]),
+            Value(0),
+        )
+
+    UserProfile.objects.update(
+        organized_groups_count=count(
+            AkawoGroup.objects.filter(organizer_id=OuterRef('user_id')), 'organizer_id'
+        ),
+        memberships_count=count(
+            GroupMember.objects.filter(user_id=OuterRef('user_id')), 'user_id'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='memberships_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='organized_groups_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
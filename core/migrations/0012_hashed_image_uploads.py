@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:06
+
+import core.uploads
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_userprofile_membership_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='akawogroup',
+            name='photo',
+            field=core.uploads.HashedImageField(blank=True, null=True, upload_to='group_photos/'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='image',
+            field=core.uploads.HashedImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_hashed_image_uploads'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='contribution',
+            constraint=models.UniqueConstraint(condition=models.Q(('payment_reference__gt', '')), fields=('payment_reference',), name='contribution_payment_reference_uniq'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:44
+#
+# Model changes that predate the migrations after 0005 but were never
+# migrated: GroupMember.total_contributed, Contribution.reference and the
+# field options below.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_contribution_payment_reference_uniq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='reference',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='groupmember',
+            name='total_contributed',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='akawogroup',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='akawo_groups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='akawogroup',
+            name='withdrawal_schedule',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='groupmember',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='contribution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.contribution'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.payment'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='payout',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.payout'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='report',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.report'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('initiated', 'Initiated'), ('success', 'Success'), ('failed', 'Failed')], default='initiated', max_length=20),
+        ),
+    ]
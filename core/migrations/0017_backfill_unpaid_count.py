@@ -0,0 +1,37 @@
+# Recount AkawoGroup.unpaid_count: first cycles opened at 0, and joins and
+# removals never moved it. The organizer is not counted (core.balances).
+
+from django.db import migrations
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def recount(apps, schema_editor):
+    AkawoGroup = apps.get_model('core', 'AkawoGroup')
+    GroupMember = apps.get_model('core', 'GroupMember')
+    Contribution = apps.get_model('core', 'Contribution')
+
+    paid = Contribution.objects.filter(member=OuterRef('pk'), status='completed').filter(
+        Q(member__group__current_cycle_month__isnull=True)
+        | Q(created_at__date__gte=F('member__group__current_cycle_month'))
+    )
+    unpaid = (
+        GroupMember.objects.filter(group=OuterRef('pk'))
+        .exclude(user_id=OuterRef('organizer_id'))
+        .exclude(Exists(paid))
+        .values('group')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    AkawoGroup.objects.update(unpaid_count=Coalesce(Subquery(unpaid), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_webhookevent_attempts'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
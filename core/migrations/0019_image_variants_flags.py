@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:34
+
+from django.db import migrations, models
+
+
+def flag_existing(apps, schema_editor):
+    # Uploads whose variants are already on disk; the rest keep linking the
+    # original until `manage.py build_image_variants` builds them.
+    from core import images
+
+    for model, field in (('UserProfile', 'image'), ('AkawoGroup', 'photo')):
+        Model = apps.get_model('core', model)
+        ids = [
+            instance.pk
+            for instance in Model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .only('id', field).iterator()
+            if images.has_variants(getattr(instance, field))
+        ]
+        Model.objects.filter(id__in=ids).update(**{f'{field}_variants': True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_notification_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akawogroup',
+            name='photo_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='image_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(flag_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# UserProfile.role becomes the role picked on the select-role page, used by
+# dashboard_role() only when the membership counters are both 0. Until now
+# it defaulted to 'contributor', so that default is cleared for users with
+# no groups: they are sent to pick a role, as before.
+
+from django.db import migrations, models
+
+
+def clear_default_role(apps, schema_editor):
+    UserProfile = apps.get_model('core', 'UserProfile')
+    UserProfile.objects.filter(
+        role='contributor', organized_groups_count=0, memberships_count=0
+    ).update(role=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_groupinvite_by_address'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='role',
+            field=models.CharField(blank=True, choices=[('organizer', 'Organizer'), ('contributor', 'Contributor')], max_length=20, null=True),
+        ),
+        migrations.RunPython(clear_default_role, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 import string
 import random
 
+from . import images
+from .uploads import HashedImageField
+
 
 # =========================
 # USER PROFILE
@@ -15,17 +20,96 @@ class UserProfile(models.Model):
     )
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='contributor')
-    image = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # The role a user picked before belonging to any group; see dashboard_role().
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, blank=True, null=True)
+    image = HashedImageField(upload_to='profile_pics/', blank=True, null=True)
+    image_variants = models.BooleanField(default=False)  # set by core.images
     phone_number = models.CharField(max_length=20, blank=True, null=True)
 
+    # Materialized membership state, maintained by core.roles, so the
+    # dashboard redirect never has to query groups.
+    organized_groups_count = models.PositiveIntegerField(default=0)
+    memberships_count = models.PositiveIntegerField(default=0)
+
+    # Square variants built by core.images on the task queue after a save; the
+    # upload itself until they exist.
+    @property
+    def avatar_small(self):
+        return images.variant_url(self.image, "small")
+
+    @property
+    def avatar_medium(self):
+        return images.variant_url(self.image, "medium")
+
+    @property
+    def avatar_srcset(self):
+        return images.srcset(self.image)
+
+    @property
+    def avatar_webp_srcset(self):
+        return images.srcset(self.image, "webp")
+
+    def dashboard_role(self):
+        if self.organized_groups_count:
+            return "organizer"
+        if self.memberships_count:
+            return "contributor"
+        return self.role
+
     def __str__(self):
-        return f"{self.user.username} - {self.role}"
+        return f"{self.user.username} - {self.dashboard_role()}"
 
 
 # =========================
 # GROUP
 # =========================
+class GroupQuerySet(models.QuerySet):
+    def with_summary(self, prefetch_members=True):
+        """
+        Annotate member count, completed contribution total, custom payout
+        total and report count with correlated subqueries (no JOIN fan-out),
+        and prefetch members with their user and profile.
+        """
+        def total(queryset, key, field):
+            return Coalesce(
+                Subquery(
+                    queryset.order_by().values(key)
+                    .annotate(total=models.Sum(field)).values("total")[:1]
+                ),
+                Value(0),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            )
+
+        def count(queryset, key):
+            return Coalesce(
+                Subquery(
+                    queryset.order_by().values(key)
+                    .annotate(n=models.Count("id")).values("n")[:1]
+                ),
+                Value(0),
+            )
+
+        queryset = self.annotate(
+            member_count=count(GroupMember.objects.filter(group=OuterRef("pk")), "group"),
+            report_count=count(Report.objects.filter(group=OuterRef("pk")), "group"),
+            total_contributions=total(
+                Contribution.objects.filter(member__group=OuterRef("pk"), status="completed"),
+                "member__group", "amount",
+            ),
+            total_custom_payouts=total(
+                CustomPayout.objects.filter(group=OuterRef("pk")), "group", "amount",
+            ),
+        )
+        if prefetch_members:
+            queryset = queryset.prefetch_related(
+                models.Prefetch(
+                    "group_members",
+                    queryset=GroupMember.objects.select_related("user__profile").order_by("joined_at"),
+                )
+            )
+        return queryset
+
+
 class AkawoGroup(models.Model):
     group_name = models.CharField(max_length=100)
     organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organized_groups')
@@ -40,10 +124,14 @@ class AkawoGroup(models.Model):
 
     contribution_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     withdrawal_schedule = models.CharField(max_length=100, blank=True)
+    fee_percent = models.FloatField(default=1.0)
+    contribution_percentage_offset = models.FloatField(default=0)
 
-    photo = models.ImageField(upload_to='group_photos/', null=True, blank=True)
+    photo = HashedImageField(upload_to='group_photos/', null=True, blank=True)
+    photo_variants = models.BooleanField(default=False)  # set by core.images
 
     referral_code = models.CharField(max_length=20, unique=True, blank=True)
+    qr_code = models.ImageField(upload_to='qr_codes/', null=True, blank=True)
 
     members = models.ManyToManyField(User, related_name='akawo_groups', blank=True)
 
@@ -52,6 +140,24 @@ class AkawoGroup(models.Model):
     unpaid_count = models.IntegerField(default=0)
     current_cycle_month = models.DateField(null=True, blank=True)
 
+    objects = GroupQuerySet.as_manager()
+
+    @property
+    def photo_small(self):
+        return images.variant_url(self.photo, "small")
+
+    @property
+    def photo_medium(self):
+        return images.variant_url(self.photo, "medium")
+
+    @property
+    def photo_srcset(self):
+        return images.srcset(self.photo)
+
+    @property
+    def photo_webp_srcset(self):
+        return images.srcset(self.photo, "webp")
+
     def save(self, *args, **kwargs):
         if not self.referral_code:
             self.referral_code = ''.join(
@@ -80,6 +186,47 @@ class GroupMember(models.Model):
         return f"{self.user.username} - {self.group.group_name}"
 
 
+# =========================
+# GROUP INVITE
+# =========================
+class GroupInvite(models.Model):
+    # A pending membership. Bulk import invites people instead of enrolling
+    # them; the GroupMember row only appears once they accept. People with
+    # no account yet are invited by address: user stays empty, and the token
+    # is the link they follow to sign up and claim the invite.
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='group_invites', null=True, blank=True
+    )
+    group = models.ForeignKey(AkawoGroup, on_delete=models.CASCADE, related_name='invites')
+
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+    token = models.CharField(max_length=64, unique=True, null=True, blank=True)
+
+    invited_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'group')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'email'],
+                condition=models.Q(user__isnull=True) & ~models.Q(email=''),
+                name='unique_address_invite_email',
+            ),
+            models.UniqueConstraint(
+                fields=['group', 'phone'],
+                condition=models.Q(user__isnull=True) & ~models.Q(phone=''),
+                name='unique_address_invite_phone',
+            ),
+        ]
+
+    def __str__(self):
+        invitee = self.user.username if self.user_id else (self.email or self.phone)
+        return f"{invitee} invited to {self.group.group_name}"
+
+
 # =========================
 # PAYMENT (PAYSTACK TRACKING)
 # =========================
@@ -89,6 +236,10 @@ class Payment(models.Model):
 
     reference = models.CharField(max_length=100, unique=True)
 
+    # Set on every row of an organizer batch checkout; Paystack only ever
+    # sees this reference, the per-member rows settle together under it.
+    parent_reference = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+
     status = models.CharField(
         max_length=20,
         choices=[
@@ -134,6 +285,16 @@ class Contribution(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     contributed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One contribution per settled payment, however often it's reported.
+            models.UniqueConstraint(
+                fields=["payment_reference"],
+                condition=Q(payment_reference__gt=""),
+                name="contribution_payment_reference_uniq",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.member.user.username} - ₦{self.amount}"
 
@@ -251,6 +412,12 @@ class Transaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination on the history page walks this index.
+            models.Index(fields=["user", "created_at", "id"], name="transaction_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type}"
 
@@ -281,5 +448,72 @@ class Notification(models.Model):
     payout = models.ForeignKey(Payout, null=True, blank=True, on_delete=models.SET_NULL)
     report = models.ForeignKey(Report, null=True, blank=True, on_delete=models.SET_NULL)
 
+    class Meta:
+        indexes = [
+            # Serves the unread count.
+            models.Index(fields=["user", "is_read", "created_at"], name="notification_user_read_idx"),
+            # Keyset pagination on the inbox walks this index, like Transaction's.
+            models.Index(fields=["user", "created_at", "id"], name="notification_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.notification_type}"
+
+
+# =========================
+# WEBHOOK INBOX
+# =========================
+class WebhookEvent(models.Model):
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=50)
+    payload = models.TextField()
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # Set when applying the event failed; after MAX_ATTEMPTS it is marked
+    # processed with the error kept here.
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.event} - {self.event_id}"
+
+
+# =========================
+# BACKGROUND TASKS
+# =========================
+class Task(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    # Dotted path of the function to call, e.g. "core.reminders.send_emails".
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    last_error = models.TextField(blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.status}"
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+
+# ======================
+# NOTIFICATION INBOX
+# ======================
+# The unread badge reads a per-user counter from the cache. Every write path
+# that can change it (single saves via core.signals, bulk inserts and bulk
+# updates here) deletes the key, and the next read recounts once.
+
+UNREAD_TTL = 60 * 60
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user):
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        cache.set(key, count, UNREAD_TTL)
+    return count
+
+
+def invalidate(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in set(user_ids)])
+
+
+def notify_many(notifications):
+    created = Notification.objects.bulk_create(notifications)
+    # After commit, or a read in between would cache the old count.
+    user_ids = {n.user_id for n in created}
+    transaction.on_commit(lambda: invalidate(user_ids))
+    return created
+
+
+def mark_read(user, ids=None):
+    # A single UPDATE whether it's one row, a selection or the whole inbox.
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=ids)
+    updated = unread.update(is_read=True)
+    if updated:
+        invalidate([user.pk])
+    return updated
@@ -0,0 +1,59 @@
+import datetime
+
+from django.db.models import Q
+
+
+# ======================
+# KEYSET PAGINATION
+# ======================
+# Newest-first paging over (created_at, id): ?before=<cursor> for the next
+# (older) page, ?after=<cursor> to step back to a newer one. Each page is an
+# index range scan from the cursor, so page 500 costs the same as page 1,
+# unlike OFFSET which reads and discards every earlier row. A cursor that
+# doesn't decode is ignored and the first page is shown.
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(obj):
+    # Integer microseconds keep the cursor exact; float timestamps can round.
+    return f"{(obj.created_at - _EPOCH) // _MICROSECOND}-{obj.pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split("-", 1)
+        return _EPOCH + int(micros) * _MICROSECOND, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_page(queryset, before=None, after=None, page_size=25):
+    # Returns (rows, next_cursor, prev_cursor); a cursor is None when there
+    # is no page that way.
+    position = decode_cursor(after) if after else None
+    if position:
+        created_at, pk = position
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by("created_at", "id")[:page_size + 1]
+        )
+        prev_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        rows = rows[:page_size][::-1]
+        # The cursor row itself is older than this page, so there is always
+        # a next page to go back to.
+        return rows, encode_cursor(rows[-1]) if rows else None, prev_cursor
+
+    queryset = queryset.order_by("-created_at", "-id")
+    position = decode_cursor(before) if before else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    prev_cursor = encode_cursor(rows[0]) if position and rows else None
+    return rows[:page_size], next_cursor, prev_cursor
@@ -0,0 +1,390 @@
+import contextlib
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from . import metrics, profiling
+
+
+# ======================
+# PAYSTACK CLIENT
+# ======================
+# One pooled keep-alive session per process. Gunicorn forks workers after
+# import, so the session is rebuilt whenever the pid changes instead of
+# sharing sockets with the parent. Every call goes through an OutboundGuard.
+#
+# Failures come back as {"status": False, ...}; "unavailable" is set when
+# Paystack itself is down, slow or shed by the guard, so views can show a
+# "try again shortly" page instead of a payment error.
+
+class PaystackClient:
+    def __init__(self, secret_key=None, base_url=None, timeout=None,
+                 max_retries=None, pool_size=None, guard=None):
+        self.guard = guard or get_guard()
+        self.secret_key = secret_key or settings.PAYSTACK_SECRET_KEY
+        self.base_url = (base_url or settings.PAYSTACK_BASE_URL).rstrip("/")
+        self.timeout = timeout or settings.PAYSTACK_TIMEOUT
+        self.session = self._build_session(
+            settings.PAYSTACK_MAX_RETRIES if max_retries is None else max_retries,
+            pool_size or settings.PAYSTACK_POOL_SIZE,
+        )
+
+    def _build_session(self, max_retries, pool_size):
+        # Only GET is retried: verify is idempotent, initialize is not.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            allowed_methods=frozenset({"GET"}),
+            status_forcelist=(429, 500, 502, 503, 504),
+            backoff_factor=0.2,
+            backoff_max=2,
+            backoff_jitter=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {self.secret_key}",
+            "Content-Type": "application/json",
+        })
+        return session
+
+    def _request(self, method, path, name, **kwargs):
+        try:
+            with self.guard.slot():
+                return self._send(method, path, name, **kwargs)
+        except Rejected as exc:
+            metrics.incr(f"paystack.rejected.{exc.reason}")
+            return {
+                "status": False,
+                "unavailable": True,
+                "retry_after": self.guard.retry_after(),
+                "message": f"Paystack calls paused ({exc.reason})",
+            }
+
+    def _send(self, method, path, name, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            res = self.session.request(
+                method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs
+            )
+            data = res.json()
+            failed = res.status_code >= 500 or res.status_code == 429
+        except (requests.RequestException, ValueError) as exc:
+            metrics.incr(f"paystack.{name}.errors")
+            return {"status": False, "unavailable": True, "message": f"Paystack unavailable: {exc}"}
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe(f"paystack.{name}", elapsed)
+            profiling.record("paystack", elapsed)
+            self.guard.record(failed, elapsed)
+
+        metrics.incr(f"paystack.{name}.calls")
+        if failed:
+            data = dict(data, status=False, unavailable=True)
+        return data
+
+    def initialize_transaction(self, email, amount, reference, callback_url, **extra):
+        data = {
+            "email": email,
+            "amount": int(amount * 100),  # convert to kobo
+            "reference": reference,
+            "callback_url": callback_url,
+        }
+        data.update(extra)
+        return self._request("POST", "/transaction/initialize", "initialize", json=data)
+
+    def verify_transaction(self, reference):
+        return self._request("GET", f"/transaction/verify/{reference}", "verify")
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = PaystackClient()
+                _client_pid = pid
+    return _client
+
+
+def reset_client():
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+# ======================
+# ASYNC CLIENT
+# ======================
+# For the async payment views. Calls run on the pooled session in a private
+# executor with one thread per pooled connection, so a slow Paystack holds a
+# connection and a thread but never the event loop, and never the thread
+# Django uses for the request's sync work.
+
+class AsyncPaystackClient:
+    def __init__(self, pool_size=None, **kwargs):
+        pool_size = pool_size or settings.PAYSTACK_POOL_SIZE
+        self.client = PaystackClient(pool_size=pool_size, **kwargs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="paystack"
+        )
+
+    def _call(self, func, *args, **kwargs):
+        return sync_to_async(func, thread_sensitive=False, executor=self._executor)(
+            *args, **kwargs
+        )
+
+    async def initialize_transaction(self, email, amount, reference, callback_url, **extra):
+        return await self._call(
+            self.client.initialize_transaction, email, amount, reference, callback_url, **extra
+        )
+
+    async def verify_transaction(self, reference):
+        return await self._call(self.client.verify_transaction, reference)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+
+_async_client = None
+_async_client_pid = None
+
+
+def get_async_client():
+    global _async_client, _async_client_pid
+
+    pid = os.getpid()
+    if _async_client is None or _async_client_pid != pid:
+        with _client_lock:
+            if _async_client is None or _async_client_pid != pid:
+                _async_client = AsyncPaystackClient()
+                _async_client_pid = pid
+    return _async_client
+
+
+def reset_async_client():
+    global _async_client, _async_client_pid
+
+    with _client_lock:
+        if _async_client is not None:
+            _async_client.close()
+        _async_client = None
+        _async_client_pid = None
+
+
+# ======================
+# OUTBOUND GUARD
+# ======================
+# A slow Paystack must not take the whole site down with it. Calls wait at
+# most PAYSTACK_QUEUE_TIMEOUT for one of PAYSTACK_MAX_CONCURRENCY slots, so
+# workers don't all pile up inside Paystack; a token bucket caps the rate;
+# and after PAYSTACK_BREAKER_THRESHOLD consecutive failures (errors, 5xx, 429
+# or calls slower than PAYSTACK_SLOW_CALL) the breaker opens and calls fail
+# immediately for PAYSTACK_BREAKER_RESET seconds. Then one trial call is let
+# through: success closes the breaker, failure opens it again.
+
+class Rejected(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold, reset_timeout, name="paystack.breaker"):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        metrics.gauge(name, self.state)
+
+    def _set(self, state):
+        self.state = state
+        metrics.gauge(self.name, state)
+        metrics.incr(f"{self.name}.{state}")
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set(self.HALF_OPEN)
+            # Half open: one trial call at a time.
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record(self, failed):
+        with self._lock:
+            self._trial = False
+            if not failed:
+                self._failures = 0
+                if self.state != self.CLOSED:
+                    self._set(self.CLOSED)
+                return
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                if self.state != self.OPEN:
+                    self._set(self.OPEN)
+
+    def retry_after(self):
+        if self.state != self.OPEN:
+            return 0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+
+def _setting(value, name):
+    return getattr(settings, name) if value is None else value
+
+
+class OutboundGuard:
+    def __init__(self, max_concurrency=None, queue_timeout=None, rate=None, burst=None,
+                 threshold=None, reset_timeout=None, slow_call=None):
+        self.queue_timeout = _setting(queue_timeout, "PAYSTACK_QUEUE_TIMEOUT")
+        self.slow_call = _setting(slow_call, "PAYSTACK_SLOW_CALL")
+        self._slots = threading.BoundedSemaphore(
+            _setting(max_concurrency, "PAYSTACK_MAX_CONCURRENCY")
+        )
+        rate = _setting(rate, "PAYSTACK_RATE_LIMIT")
+        self.bucket = TokenBucket(rate, _setting(burst, "PAYSTACK_RATE_BURST")) if rate else None
+        self.breaker = CircuitBreaker(
+            _setting(threshold, "PAYSTACK_BREAKER_THRESHOLD"),
+            _setting(reset_timeout, "PAYSTACK_BREAKER_RESET"),
+        )
+
+    @contextlib.contextmanager
+    def slot(self):
+        # Cheapest rejection first: an open breaker costs no slot or token.
+        if self.breaker.state == CircuitBreaker.OPEN and self.breaker.retry_after():
+            raise Rejected("open")
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise Rejected("concurrency")
+        try:
+            if self.bucket is not None and not self.bucket.try_acquire():
+                raise Rejected("rate")
+            if not self.breaker.allow():
+                raise Rejected("open")
+            yield
+        finally:
+            self._slots.release()
+
+    def record(self, failed, elapsed):
+        self.breaker.record(failed or elapsed >= self.slow_call)
+
+    def retry_after(self):
+        return max(1, round(self.breaker.retry_after()))
+
+
+_guard = None
+_guard_pid = None
+_guard_lock = threading.Lock()
+
+
+def get_guard():
+    global _guard, _guard_pid
+
+    pid = os.getpid()
+    if _guard is None or _guard_pid != pid:
+        with _guard_lock:
+            if _guard is None or _guard_pid != pid:
+                _guard = OutboundGuard()
+                _guard_pid = pid
+    return _guard
+
+
+def reset_guard():
+    global _guard, _guard_pid
+
+    with _guard_lock:
+        _guard = None
+        _guard_pid = None
+
+
+class TokenBucket:
+    """Token bucket: `rate` calls per second, bursts up to `capacity`.
+
+    acquire() waits for a token; try_acquire() returns False instead.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def verify_signature(payload, signature):
+    if not signature:
+        return False
+
+    expected = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode(), payload, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
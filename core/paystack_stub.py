@@ -0,0 +1,117 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ======================
+# LOCAL PAYSTACK STUB
+# ======================
+# A tiny keep-alive HTTP server that answers the two Paystack endpoints the
+# app uses. It counts TCP connections separately from requests so pooling is
+# visible, and can inject latency and 5xx errors to exercise retries.
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.record("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        self.server.record("requests")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.record("errors")
+            return self._send(503, {"status": False, "message": "Injected failure"})
+
+        if self.path.startswith("/transaction/initialize"):
+            reference = body.get("reference", "")
+            return self._send(200, {
+                "status": True,
+                "message": "Authorization URL created",
+                "data": {
+                    "authorization_url": f"https://checkout.stub/{reference}",
+                    "access_code": reference[:12],
+                    "reference": reference,
+                },
+            })
+
+        if self.path.startswith("/transaction/verify/"):
+            reference = self.path.rsplit("/", 1)[-1]
+            status = self.server.statuses.get(reference, self.server.verify_status)
+            if status is None:
+                return self._send(400, {
+                    "status": False, "message": "Transaction reference not found",
+                })
+            return self._send(200, {
+                "status": True,
+                "message": "Verification successful",
+                "data": {
+                    "reference": reference,
+                    "status": status,
+                    "amount": body.get("amount", 0),
+                },
+            })
+
+        return self._send(404, {"status": False, "message": "Not found"})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class PaystackStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 verify_status="success"):
+        super().__init__((host, port), _StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.verify_status = verify_status
+        # Per-reference verify status; None answers "reference not found".
+        self.statuses = {}
+        self.counts = {"connections": 0, "requests": 0, "errors": 0}
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, name):
+        with self._count_lock:
+            self.counts[name] += 1
+
+    def reset_counts(self):
+        with self._count_lock:
+            for name in self.counts:
+                self.counts[name] = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,218 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+# ======================
+# REQUEST PROFILING
+# ======================
+# Opt-in with PROFILING=True. When it's off the middleware raises
+# MiddlewareNotUsed, so Django drops it from the stack at startup and the
+# only cost left is record() finding no active profile.
+#
+# Each request gets SQL count/time, template render time, outbound Paystack
+# and SMTP time and a total, returned as a Server-Timing header. Totals feed
+# a rolling window per URL name that is flushed to PROFILING_DIR, one file
+# per process, for `manage.py hot_endpoints`.
+
+_current = contextvars.ContextVar("akawo_profile", default=None)
+
+# Server-Timing metric name -> description.
+PHASES = {
+    "sql": "SQL",
+    "tpl": "Templates",
+    "paystack": "Paystack",
+    "smtp": "SMTP",
+}
+
+# Each sample in an endpoint's window, in this order.
+SAMPLE_FIELDS = ("total_ms", "sql_count", "sql_ms", "tpl_ms", "outbound_ms")
+
+
+def record(phase, seconds):
+    profile = _current.get()
+    if profile is not None:
+        profile[phase] += seconds
+
+
+def _origin():
+    # The innermost frame in project code outside this module.
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if frame.filename.startswith(base) and frame.filename != __file__ \
+                and "site-packages" not in frame.filename:
+            return f"{os.path.relpath(frame.filename, base)}:{frame.lineno} in {frame.name}"
+    return "framework"
+
+
+def _sql(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        profile = _current.get()
+        if profile is not None:
+            profile["sql"] += elapsed
+            profile["sql_count"] += 1
+        if elapsed * 1000 >= settings.PROFILING_SLOW_QUERY_MS:
+            logger.warning("slow query (%.1fms) at %s: %s", elapsed * 1000, _origin(), sql)
+
+
+_instrumented = False
+
+
+def _instrument():
+    # Template rendering and Django's SMTP backend have no hooks of their own.
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    from django.core.mail.backends.smtp import EmailBackend
+    from django.template.base import Template
+
+    render = Template.render
+
+    def timed_render(self, context):
+        profile = _current.get()
+        # {% include %} renders nested templates; time only the outermost.
+        if profile is None or profile["_rendering"]:
+            return render(self, context)
+        profile["_rendering"] = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile["tpl"] += time.perf_counter() - started
+            profile["_rendering"] = False
+
+    send_messages = EmailBackend.send_messages
+
+    def timed_send_messages(self, email_messages):
+        started = time.perf_counter()
+        try:
+            return send_messages(self, email_messages)
+        finally:
+            record("smtp", time.perf_counter() - started)
+
+    Template.render = timed_render
+    EmailBackend.send_messages = timed_send_messages
+
+
+class Endpoints:
+    """Rolling window of recent requests per URL name."""
+
+    def __init__(self, size):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, sample):
+        with self._lock:
+            window = self._samples.get(name)
+            if window is None:
+                window = self._samples[name] = deque(maxlen=self.size)
+            window.append(sample)
+
+    def dump(self):
+        with self._lock:
+            return {name: list(window) for name, window in self._samples.items()}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+endpoints = Endpoints(settings.PROFILING_SAMPLES)
+_flushed_at = 0.0
+_flush_lock = threading.Lock()
+
+
+def flush(force=False):
+    global _flushed_at
+
+    now = time.monotonic()
+    if not force and now - _flushed_at < settings.PROFILING_FLUSH_INTERVAL:
+        return
+    with _flush_lock:
+        _flushed_at = now
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(endpoints.dump()))
+        os.replace(tmp, path)
+
+
+def load():
+    # Merge every process's window: {url name: [sample, ...]}.
+    merged = {}
+    for path in Path(settings.PROFILING_DIR).glob("*.json"):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, samples in data.items():
+            merged.setdefault(name, []).extend(samples)
+    return merged
+
+
+def server_timing(profile, total):
+    parts = [
+        f'{phase};dur={profile[phase] * 1000:.1f};desc="{desc}"'
+        for phase, desc in PHASES.items()
+        if profile[phase]
+    ]
+    parts.append(f'db;desc="{profile["sql_count"]} queries"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instrument()
+
+    def __call__(self, request):
+        profile = dict.fromkeys(PHASES, 0.0)
+        profile.update(sql_count=0, _rendering=False)
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_sql))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = server_timing(profile, total)
+
+        match = request.resolver_match
+        name = (match.url_name or match.view_name) if match else "unresolved"
+        endpoints.add(name, [
+            round(total * 1000, 3),
+            profile["sql_count"],
+            round(profile["sql"] * 1000, 3),
+            round(profile["tpl"] * 1000, 3),
+            round((profile["paystack"] + profile["smtp"]) * 1000, 3),
+        ])
+        flush()
+        return response
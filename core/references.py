@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import metrics, paystack, settlement
+
+
+# ======================
+# SETTLED REFERENCE CACHE
+# ======================
+# Refreshes and duplicate redirects land on payment_callback for references
+# that are already settled. A small per-process LRU answers those first, the
+# Payment table second, and only a reference with a pending Payment goes out
+# to Paystack.
+
+SETTLED, PENDING = "settled", "pending"
+
+class SettledLRU:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, reference):
+        with self._lock:
+            expires = self._entries.get(reference)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[reference]
+                return False
+            self._entries.move_to_end(reference)
+            return True
+
+    def add(self, reference):
+        with self._lock:
+            self._entries[reference] = time.monotonic() + self.ttl
+            self._entries.move_to_end(reference)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+settled = SettledLRU(
+    max_size=settings.SETTLED_REFERENCE_CACHE_SIZE,
+    ttl=settings.SETTLED_REFERENCE_CACHE_TTL,
+)
+
+
+def _state(statuses):
+    if "success" in statuses:
+        return SETTLED
+    return PENDING if statuses else None
+
+
+def lookup(reference):
+    # SETTLED, PENDING, or None when no Payment has this reference: the
+    # callback needs no login, so unknown references must never cost a
+    # Paystack call (and a token from the outbound guard).
+    if not reference:
+        return None
+
+    if reference in settled:
+        metrics.incr("references.lru_hit")
+        return SETTLED
+
+    state = _state(set(
+        settlement.payments_for([reference]).values_list("status", flat=True).distinct()
+    ))
+    _count(reference, state)
+    return state
+
+
+async def alookup(reference):
+    if not reference:
+        return None
+
+    if reference in settled:
+        metrics.incr("references.lru_hit")
+        return SETTLED
+
+    statuses = settlement.payments_for([reference]).values_list("status", flat=True).distinct()
+    state = _state({status async for status in statuses})
+    _count(reference, state)
+    return state
+
+
+def _count(reference, state):
+    if state == SETTLED:
+        metrics.incr("references.db_hit")
+        settled.add(reference)
+    elif state is None:
+        metrics.incr("references.unknown")
+    else:
+        metrics.incr("references.miss")
+
+
+def mark_settled(reference):
+    settled.add(reference)
+
+
+# Single-flight: concurrent callbacks for the same reference share one
+# outbound verify call instead of each paying the round trip.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def verify(reference):
+    with _inflight_lock:
+        call = _inflight.get(reference)
+        leader = call is None
+        if leader:
+            call = _inflight[reference] = _Call()
+
+    if not leader:
+        metrics.incr("references.coalesced")
+        call.done.wait()
+        return call.result
+
+    try:
+        metrics.incr("references.verified")
+        call.result = paystack.get_client().verify_transaction(reference)
+    finally:
+        with _inflight_lock:
+            del _inflight[reference]
+        call.done.set()
+    return call.result
+
+
+# The async views coalesce on a task per event loop instead.
+_ainflight = {}
+
+
+async def averify(reference):
+    key = (asyncio.get_running_loop(), reference)
+    task = _ainflight.get(key)
+    if task is not None:
+        metrics.incr("references.coalesced")
+        return await asyncio.shield(task)
+
+    metrics.incr("references.verified")
+    task = _ainflight[key] = asyncio.ensure_future(
+        paystack.get_async_client().verify_transaction(reference)
+    )
+    try:
+        # Shielded so a disconnecting leader doesn't cancel the followers' call.
+        return await asyncio.shield(task)
+    finally:
+        _ainflight.pop(key, None)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from . import notifications, tasks
+from .models import GroupMember, Notification
+
+
+# ======================
+# REMINDER FAN-OUT
+# ======================
+# One bulk INSERT for the in-app notifications plus one queued task per
+# EMAIL_BATCH_SIZE addresses; the worker sends each batch over one SMTP
+# connection. The request never waits on SMTP, and a task that fails and is
+# retried only re-sends its own batch, not everyone already mailed.
+
+EMAIL_BATCH_SIZE = 100
+
+
+def recipients_for(group):
+    return list(
+        GroupMember.objects.filter(group=group)
+        .exclude(user_id=group.organizer_id)
+        .values_list("user_id", "user__email")
+    )
+
+
+def send_emails(subject, body, addresses, connection=None):
+    # Task: one batch, over one connection.
+    connection = connection or get_connection()
+    with connection:
+        return connection.send_messages([
+            EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [address])
+            for address in addresses
+        ]) or 0
+
+
+def send_reminder(group, message):
+    recipients = recipients_for(group)
+
+    notifications.notify_many([
+        Notification(user_id=user_id, notification_type="contribution", message=message)
+        for user_id, _ in recipients
+    ])
+
+    addresses = [email for _, email in recipients if email]
+    for i in range(0, len(addresses), EMAIL_BATCH_SIZE):
+        tasks.enqueue(
+            send_emails, f"Reminder from {group.group_name}", message,
+            addresses[i:i + EMAIL_BATCH_SIZE],
+        )
+    return len(recipients)
@@ -0,0 +1,82 @@
+import time
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from . import dashboards
+from .models import AkawoGroup, GroupMember, UserProfile
+
+
+# ======================
+# ROLE RESOLUTION
+# ======================
+# UserProfile carries organized/membership counts, kept current by the
+# views that change them. The resolved role is cached in the session and
+# tagged with the user's dashboard version (a cache read, not a query), so
+# /dashboard/ costs no queries until membership actually changes. The entry
+# also carries its age: the cache may evict the version key, and an entry
+# older than SESSION_MAX_AGE is re-resolved rather than trusted against a
+# version that fell back to 0.
+
+SESSION_KEY = "_akawo_dashboard_role"
+SESSION_MAX_AGE = 5 * 60
+
+
+def group_created(user):
+    UserProfile.objects.filter(user=user).update(
+        role="organizer",
+        organized_groups_count=F("organized_groups_count") + 1,
+    )
+
+
+def members_added(user_ids):
+    UserProfile.objects.filter(user_id__in=user_ids).update(
+        memberships_count=F("memberships_count") + 1
+    )
+
+
+def member_removed(user_id):
+    UserProfile.objects.filter(user_id=user_id).update(
+        memberships_count=Greatest(F("memberships_count") - 1, 0)
+    )
+
+
+def rebuild_profile(user):
+    # For users whose profile predates the counters or the profile signal.
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile.organized_groups_count = AkawoGroup.objects.filter(organizer=user).count()
+    profile.memberships_count = GroupMember.objects.filter(user=user).count()
+    profile.save(update_fields=["organized_groups_count", "memberships_count"])
+    return profile
+
+
+def choose(request, role):
+    # The role picked by a user with no groups yet; UserProfile.dashboard_role()
+    # falls back to it once the counters have nothing to say.
+    UserProfile.objects.filter(user=request.user).update(role=role)
+    remember(request, role)
+
+
+def remember(request, role):
+    request.session[SESSION_KEY] = [role, dashboards.user_version(request.user.pk), time.time()]
+
+
+def resolve(request):
+    cached = request.session.get(SESSION_KEY)
+    if (
+        cached and len(cached) == 3
+        and cached[1] == dashboards.user_version(request.user.pk)
+        and time.time() - cached[2] < SESSION_MAX_AGE
+    ):
+        return cached[0]
+
+    try:
+        # Through the relation, so templates reading user.profile reuse it.
+        profile = request.user.profile
+    except ObjectDoesNotExist:
+        profile = rebuild_profile(request.user)
+
+    role = profile.dashboard_role()
+    remember(request, role)
+    return role
@@ -0,0 +1,240 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cycles
+from .models import (
+    AkawoGroup, Contribution, GroupMember, Notification, Payment, Transaction,
+    UserProfile, Withdrawal,
+)
+
+
+# ======================
+# SYNTHETIC DATA
+# ======================
+# Realistic volumes for benchmarks and local profiling. Everything goes in
+# with bulk_create, so signals don't fire: profiles, balances and counters
+# are filled in with set-based UPDATEs at the end. auto_now_add can't be
+# overridden on insert, so history rows are written one payment day at a
+# time and backdated by id range right after.
+
+SCALES = {
+    # Roughly the number of contributions each preset produces.
+    "1k": {"users": 40, "groups": 4, "members": 10, "years": 1},
+    "100k": {"users": 2000, "groups": 65, "members": 30, "years": 2},
+    "1m": {"users": 20000, "groups": 325, "members": 40, "years": 3},
+}
+
+PASSWORD = "akawo-seed"
+AMOUNTS = [Decimal(n) for n in (500, 1000, 2000, 5000, 10000)]
+BATCH_SIZE = 5000
+
+
+def _aware(day, hour=12):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+
+def _periods(cycle, first, today):
+    # Every period since `first`, including the one still open today.
+    start = cycles.cycle_start(cycle, first)
+    while start <= today:
+        yield start
+        start = cycles.cycle_end(cycle, start)
+
+
+def _backdate(model, after_id, when, fields=("created_at",)):
+    model.objects.filter(id__gt=after_id).update(**{field: when for field in fields})
+
+
+def _last_id(model):
+    return model.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def seed(users, groups, members, years, paid_ratio=0.8, withdrawal_ratio=0.02,
+         prefix="seed", rng=None, log=None):
+    rng = rng or random.Random(0)
+    log = log or (lambda message: None)
+    today = timezone.localdate()
+    first = today - datetime.timedelta(days=int(365 * years))
+    members = min(members, users)
+
+    password = make_password(PASSWORD)
+    user_rows = User.objects.bulk_create([
+        User(username=f"{prefix}-user-{i}", email=f"{prefix}-user-{i}@example.com",
+             password=password)
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user) for user in user_rows
+    ], batch_size=BATCH_SIZE)
+    log(f"users: {len(user_rows)}")
+
+    # A tenth of the users organize; each group draws its members from all.
+    organizers = user_rows[:max(1, users // 10)]
+    group_rows = AkawoGroup.objects.bulk_create([
+        AkawoGroup(
+            group_name=f"{prefix.title()} Group {i}",
+            organizer=rng.choice(organizers),
+            contribution_cycle=rng.choice(["weekly", "monthly"]),
+            contribution_amount=rng.choice(AMOUNTS),
+            referral_code=f"{prefix[:4].upper()}{i:06d}",
+        )
+        for i in range(groups)
+    ], batch_size=BATCH_SIZE)
+    AkawoGroup.objects.filter(id__in=[g.id for g in group_rows]).update(created_at=_aware(first))
+
+    member_rows = []
+    for group in group_rows:
+        chosen = {group.organizer}
+        chosen.update(rng.sample(user_rows, members - 1))
+        member_rows.extend(GroupMember(user=user, group=group) for user in chosen)
+    member_rows = GroupMember.objects.bulk_create(member_rows, batch_size=BATCH_SIZE)
+    GroupMember.objects.filter(id__in=[m.id for m in member_rows]).update(joined_at=_aware(first))
+    log(f"groups: {len(group_rows)}, members: {len(member_rows)}")
+
+    by_cycle = {"weekly": [], "monthly": []}
+    for member in member_rows:
+        by_cycle[member.group.contribution_cycle].append(member)
+
+    counts = {"contributions": 0, "withdrawals": 0}
+    read_before = today - datetime.timedelta(days=30)
+    for cycle, cycle_members in by_cycle.items():
+        for start in _periods(cycle, first, today):
+            # Members pay on one of the first few days of each period.
+            by_day = {}
+            for member in cycle_members:
+                if rng.random() < paid_ratio:
+                    by_day.setdefault(rng.randrange(5), []).append(member)
+            for offset, paying in sorted(by_day.items()):
+                day = start + datetime.timedelta(days=offset)
+                if day > today:
+                    break
+                counts["contributions"] += _write_contributions(
+                    prefix, paying, day, counts["contributions"], is_read=day < read_before
+                )
+
+            payout_day = start + datetime.timedelta(days=7)
+            if payout_day <= today and (cycle == "monthly" or start.day <= 7):
+                withdrawing = [m for m in cycle_members if rng.random() < withdrawal_ratio]
+                counts["withdrawals"] += _write_withdrawals(withdrawing, payout_day)
+        log(f"{cycle}: {counts['contributions']} contributions so far")
+
+    _fill_counters(today)
+    return {
+        "users": len(user_rows),
+        "groups": len(group_rows),
+        "members": len(member_rows),
+        **counts,
+    }
+
+
+def _write_contributions(prefix, members, day, offset, is_read):
+    when = _aware(day)
+    references = [f"{prefix}_{offset + i}" for i in range(len(members))]
+
+    with transaction.atomic():
+        marks = {model: _last_id(model) for model in (Payment, Contribution, Transaction, Notification)}
+        Payment.objects.bulk_create([
+            Payment(contributor=member, amount=member.group.contribution_amount,
+                    reference=reference, status="success")
+            for member, reference in zip(members, references)
+        ], batch_size=BATCH_SIZE)
+        contributions = Contribution.objects.bulk_create([
+            Contribution(member=member, amount=member.group.contribution_amount,
+                         reference=reference, payment_reference=reference,
+                         status="completed")
+            for member, reference in zip(members, references)
+        ], batch_size=BATCH_SIZE)
+        Transaction.objects.bulk_create([
+            Transaction(user_id=member.user_id, amount=member.group.contribution_amount,
+                        transaction_type="contribution", reference=reference, status="success")
+            for member, reference in zip(members, references)
+        ], batch_size=BATCH_SIZE)
+        Notification.objects.bulk_create([
+            Notification(user_id=member.user_id, notification_type="contribution",
+                         contribution=contribution, is_read=is_read,
+                         message=f"Your contribution of ₦{contribution.amount} to "
+                                 f"{member.group.group_name} was received.")
+            for member, contribution in zip(members, contributions)
+        ], batch_size=BATCH_SIZE)
+
+        _backdate(Payment, marks[Payment], when)
+        _backdate(Contribution, marks[Contribution], when, ("created_at", "contributed_at"))
+        _backdate(Transaction, marks[Transaction], when)
+        _backdate(Notification, marks[Notification], when)
+    return len(members)
+
+
+def _write_withdrawals(members, day):
+    if not members:
+        return 0
+
+    when = _aware(day)
+    with transaction.atomic():
+        marks = {model: _last_id(model) for model in (Withdrawal, Transaction)}
+        withdrawals = Withdrawal.objects.bulk_create([
+            Withdrawal(member=member, group=member.group, amount=member.group.contribution_amount,
+                       status="approved")
+            for member in members
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(user_id=withdrawal.member.user_id, amount=withdrawal.amount,
+                        transaction_type="withdrawal", reference=f"wd_{withdrawal.id}",
+                        status="success")
+            for withdrawal in withdrawals
+        ])
+        _backdate(Withdrawal, marks[Withdrawal], when)
+        _backdate(Transaction, marks[Transaction], when)
+    return len(withdrawals)
+
+
+def _fill_counters(today):
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    def total(queryset, key, field="amount"):
+        return Coalesce(
+            Subquery(queryset.values(key).annotate(total=Sum(field)).values("total")[:1]),
+            Value(Decimal("0")), output_field=money,
+        )
+
+    def count(queryset, key):
+        return Coalesce(
+            Subquery(queryset.values(key).annotate(n=Count("id")).values("n")[:1]),
+            Value(0),
+        )
+
+    GroupMember.objects.update(
+        total_contributed=total(
+            Contribution.objects.filter(member=OuterRef("pk"), status="completed"), "member"
+        ) - total(
+            Withdrawal.objects.filter(member=OuterRef("pk"), status="approved"), "member"
+        )
+    )
+
+    for cycle in ("weekly", "monthly"):
+        start = cycles.cycle_start(cycle, today)
+        in_cycle = Q(status="completed", created_at__gte=_aware(start, hour=0))
+        AkawoGroup.objects.filter(contribution_cycle=cycle).update(
+            current_cycle_month=start,
+            monthly_total=total(
+                Contribution.objects.filter(in_cycle, member__group=OuterRef("pk")), "member__group"
+            ),
+            unpaid_count=count(
+                GroupMember.objects.filter(group=OuterRef("pk"))
+                .exclude(user=OuterRef("organizer"))
+                .exclude(contributions__in=Contribution.objects.filter(in_cycle)), "group"
+            ),
+        )
+
+    UserProfile.objects.update(
+        organized_groups_count=count(AkawoGroup.objects.filter(organizer=OuterRef("user")), "organizer"),
+        memberships_count=count(GroupMember.objects.filter(user=OuterRef("user")), "user"),
+    )
+    UserProfile.objects.filter(organized_groups_count__gt=0).update(role="organizer")
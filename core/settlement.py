@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Q
+
+from . import balances, ledger, notifications
+from .models import Contribution, GroupMember, Notification, Payment
+
+
+# ======================
+# PAYMENT SETTLEMENT
+# ======================
+# Every path that learns a Payment went through (callback, webhook inbox,
+# reconciliation) ends in settle_payments: flip the rows to success, then
+# create the contribution, move balances and write the ledger Transaction and
+# the member's Notification, all in the caller's transaction. settle() is
+# that transaction for the callback and the webhook: it locks the Payment rows
+# first, so whichever arrives second finds them settled and does nothing.
+# The unique payment_reference on Contribution backs this up: a settlement
+# that slipped past the lock fails and rolls back instead of counting twice.
+
+def payments_for(references):
+    # A Paystack reference is either a single Payment or the parent of an
+    # organizer batch checkout.
+    return Payment.objects.filter(
+        Q(reference__in=references) | Q(parent_reference__in=references)
+    )
+
+
+def charge_reference(payment):
+    return payment.parent_reference or payment.reference
+
+
+def contribution_for(payment):
+    return Contribution(
+        member_id=payment.contributor_id,
+        amount=payment.amount,
+        paid_by="organizer" if payment.reference.startswith("org_") else "self",
+        payment_reference=payment.reference,
+        status="completed",
+    )
+
+
+def settle(references):
+    with transaction.atomic():
+        return settle_payments(
+            payments_for(references).select_for_update().exclude(status="success")
+        )
+
+
+def _notify(contributions):
+    if not contributions:
+        return
+
+    members = {
+        member_id: (user_id, group_name)
+        for member_id, user_id, group_name in
+        GroupMember.objects.filter(id__in={c.member_id for c in contributions})
+        .values_list("id", "user_id", "group__group_name")
+    }
+    notifications.notify_many([
+        Notification(
+            user_id=members[contribution.member_id][0],
+            notification_type="contribution",
+            contribution=contribution,
+            message=f"Your contribution of ₦{contribution.amount} to "
+                    f"{members[contribution.member_id][1]} was received.",
+        )
+        for contribution in contributions
+    ])
+
+
+def settle_payments(payments):
+    payments = [p for p in payments if p.status != "success"]
+    if not payments:
+        return []
+
+    for payment in payments:
+        payment.status = "success"
+    Payment.objects.bulk_update(payments, ["status"])
+
+    existing = set(
+        Contribution.objects.filter(
+            payment_reference__in=[p.reference for p in payments]
+        ).values_list("payment_reference", flat=True)
+    )
+    contributions = Contribution.objects.bulk_create([
+        contribution_for(payment)
+        for payment in payments
+        if payment.reference not in existing
+    ])
+    balances.contributions_completed(contributions)
+    ledger.record_contributions(contributions)
+    _notify(contributions)
+    return payments
@@ -1,14 +1,67 @@
 # signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import AkawoGroup, Contribution, GroupMember, Notification, UserProfile, Withdrawal
+from . import dashboards, images, notifications, tasks
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.userprofile.save()
+# No save_user_profile cascade: User saves (every login updates last_login)
+# must not rewrite the profile's counters, which are moved by F() updates.
+# Profile edits save their own fields.
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_unread_notifications(sender, instance, **kwargs):
+    notifications.invalidate([instance.user_id])
+
+# Dashboard cache versions. Bulk writes that skip signals bump explicitly.
+@receiver(post_save, sender=AkawoGroup)
+@receiver(post_delete, sender=AkawoGroup)
+def invalidate_group_dashboards(sender, instance, **kwargs):
+    dashboards.bump_groups([instance.pk])
+    dashboards.bump_users([instance.organizer_id])
+
+@receiver(post_save, sender=GroupMember)
+@receiver(post_delete, sender=GroupMember)
+def invalidate_member_dashboards(sender, instance, **kwargs):
+    dashboards.bump_groups([instance.group_id])
+    dashboards.bump_users([instance.user_id])
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Contribution)
+def invalidate_contribution_dashboards(sender, instance, **kwargs):
+    group_id = (
+        GroupMember.objects.filter(id=instance.member_id)
+        .values_list("group_id", flat=True)
+        .first()
+    )
+    if group_id:
+        dashboards.bump_groups([group_id])
+
+@receiver(post_save, sender=Withdrawal)
+@receiver(post_delete, sender=Withdrawal)
+def invalidate_withdrawal_dashboards(sender, instance, **kwargs):
+    dashboards.bump_groups([instance.group_id])
+
+# Photo variants are built by the task queue; pages link the original until
+# then. Saves that leave the photo alone skip even the storage lookup.
+def _queue_variants(field_file, update_fields):
+    if update_fields is not None and field_file.field.attname not in update_fields:
+        return
+    if images.needs_variants(field_file):
+        instance = field_file.instance
+        tasks.enqueue(images.build_variants, instance._meta.label, instance.pk,
+                      field_file.field.attname, field_file.name)
+
+@receiver(post_save, sender=UserProfile)
+def queue_avatar_variants(sender, instance, update_fields=None, **kwargs):
+    _queue_variants(instance.image, update_fields)
+
+@receiver(post_save, sender=AkawoGroup)
+def queue_group_photo_variants(sender, instance, update_fields=None, **kwargs):
+    _queue_variants(instance.photo, update_fields)
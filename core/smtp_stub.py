@@ -0,0 +1,79 @@
+import socketserver
+import threading
+import time
+
+
+# ======================
+# LOCAL SMTP STUB
+# ======================
+# Just enough SMTP for Django's EmailBackend without TLS or auth: it accepts
+# every message, keeps nothing but counts, and can add per-message latency to
+# mimic a remote relay. Counts sessions separately so connection reuse shows.
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.record("sessions")
+        self._reply("220 smtp.stub ESMTP")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 smtp.stub")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                if command.startswith("RCPT"):
+                    self.server.record("recipients")
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                self.server.record("messages")
+                self._reply("250 OK queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.latency = latency
+        self.counts = {"sessions": 0, "messages": 0, "recipients": 0}
+        self._count_lock = threading.Lock()
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def record(self, name):
+        with self._count_lock:
+            self.counts[name] += 1
+
+    def reset_counts(self):
+        with self._count_lock:
+            for name in self.counts:
+                self.counts[name] = 0
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
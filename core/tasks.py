@@ -0,0 +1,139 @@
+import contextlib
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Task
+
+
+# ======================
+# BACKGROUND TASK QUEUE
+# ======================
+# Durable queue on the Task table, worked by `manage.py run_worker`. A task
+# is a module-level function referenced by dotted path, with JSON args.
+# Claiming marks rows running with a lease (locked_until); a worker that
+# dies leaves the lease to expire and another worker picks the task up.
+
+DEFAULT_VISIBILITY_TIMEOUT = 300  # seconds
+RETRY_BASE_DELAY = 5  # seconds, doubled per attempt
+RETRY_MAX_DELAY = 60 * 60
+
+
+def task_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def enqueue(func, *args, run_at=None, max_attempts=5, **kwargs):
+    return Task.objects.create(
+        name=func if isinstance(func, str) else task_name(func),
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+@contextlib.contextmanager
+def _claim_transaction():
+    options = connection.settings_dict.get("OPTIONS", {})
+    if (
+        connection.vendor != "sqlite"
+        or connection.in_atomic_block
+        or options.get("transaction_mode") == "IMMEDIATE"
+    ):
+        with transaction.atomic():
+            yield
+        return
+
+    # SQLite has no row locks. BEGIN IMMEDIATE takes the database write lock
+    # before the SELECT, so two workers can never read the same rows as
+    # claimable; the loser waits on busy_timeout instead of double-claiming.
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        with connection.cursor() as cursor:
+            cursor.execute("ROLLBACK")
+        raise
+    with connection.cursor() as cursor:
+        cursor.execute("COMMIT")
+
+
+def claim(worker_id, limit=1, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    now = timezone.now()
+
+    with _claim_transaction():
+        claimable = Task.objects.filter(
+            Q(status="queued", run_at__lte=now) | Q(status="running", locked_until__lt=now),
+            attempts__lt=F("max_attempts"),
+        ).order_by("run_at", "id")
+
+        if connection.features.has_select_for_update_skip_locked:
+            claimable = claimable.select_for_update(skip_locked=True)
+
+        ids = list(claimable.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+
+        Task.objects.filter(id__in=ids).update(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F("attempts") + 1,
+        )
+
+    return list(Task.objects.filter(id__in=ids, locked_by=worker_id))
+
+
+def reap_expired():
+    # Leases that expired on their final attempt can never be claimed again.
+    return Task.objects.filter(
+        status="running",
+        locked_until__lt=timezone.now(),
+        attempts__gte=F("max_attempts"),
+    ).update(status="failed", last_error="Visibility timeout expired on final attempt")
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run(task, worker_id):
+    started = time.perf_counter()
+    try:
+        import_string(task.name)(*task.args, **task.kwargs)
+    except Exception:
+        elapsed = time.perf_counter() - started
+        error = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            status, run_at = "failed", task.run_at
+            metrics.incr(f"tasks.{task.name}.failed")
+        else:
+            status = "queued"
+            run_at = timezone.now() + timedelta(seconds=retry_delay(task.attempts))
+            metrics.incr(f"tasks.{task.name}.retried")
+        Task.objects.filter(id=task.id, locked_by=worker_id).update(
+            status=status, run_at=run_at, locked_until=None,
+            last_error=error, duration_ms=elapsed * 1000,
+        )
+        metrics.observe(f"tasks.{task.name}", elapsed)
+        return False
+
+    elapsed = time.perf_counter() - started
+    Task.objects.filter(id=task.id, locked_by=worker_id).update(
+        status="done", locked_until=None, finished_at=timezone.now(),
+        duration_ms=elapsed * 1000,
+    )
+    metrics.incr(f"tasks.{task.name}.done")
+    metrics.observe(f"tasks.{task.name}", elapsed)
+    return True
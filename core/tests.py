@@ -1,3 +1,1706 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import hmac
+import io
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count
+from django.http import Http404, HttpResponse
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import (
+    balances, checks, cycles, dashboards, exports, images, member_import, metrics, paystack,
+    profiling, references, reminders, roles, seed, settlement, tasks, views, webhooks,
+)
+from .benchmarks import duplicate_queries
+from .models import (
+    AkawoGroup, Contribution, ContributionHistory, GroupInvite, GroupMember, Notification, Payment,
+    Report, Transaction, Task, UserProfile, WebhookEvent, Withdrawal,
+)
+from .paystack_stub import PaystackStubServer
+
+
+# The project cache is a file cache shared with the running site. The suite
+# gets its own in-process one, so clearing it can't drop live dashboards and
+# nothing cached in one run (keyed by user ids that repeat) leaks into the
+# next.
+_private_cache = override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "core-tests",
+    }
+})
+
+
+def setUpModule():
+    _private_cache.enable()
+
+
+def tearDownModule():
+    _private_cache.disable()
+
+
+# ======================
+# QUERY BUDGETS
+# ======================
+# Every organizer and contributor page is rendered as the busiest user of a
+# small and of a large seeded dataset. Each page must stay within its budget,
+# and the large dataset must not cost more queries than the small one: a
+# count that grows with rows is an N+1.
+
+SIZES = {
+    "small": {"users": 20, "groups": 2, "members": 6, "years": 0.25},
+    "large": {"users": 80, "groups": 8, "members": 20, "years": 1},
+}
+
+# (url name, takes a group id, max queries). Budgets include the session and
+# user lookups every authenticated request pays; pages that resolve the
+# dashboard role also pay for the profile and a session write when cold.
+ORGANIZER_PAGES = [
+    ("dashboard", False, 6),
+    ("organizer_dashboard", False, 6),
+    ("organizer_dash", False, 6),
+    ("group_manage", False, 4),
+    ("group_manage_list", False, 4),
+    ("group_detail", True, 5),
+    ("manage_page", True, 5),
+    ("organizer_reports", False, 4),
+    ("reports_page", True, 4),
+    ("contributions", True, 4),
+    ("withdrawals", True, 4),
+    ("organizer_contribution", False, 4),
+    ("organizer_withdrawal", False, 4),
+    ("organizer_list", False, 4),
+    ("organizer_wallet", True, 4),
+    ("account_settings", False, 4),
+    ("me", False, 6),
+]
+
+CONTRIBUTOR_PAGES = [
+    ("dashboard", False, 6),
+    ("contributor_dashboard", False, 6),
+    ("contributor_dash", False, 6),
+    ("contributor_dashboard2", True, 4),
+    ("contributor_wallet", False, 4),
+    ("contributor_groups", False, 4),
+    ("contributor_groups2", False, 4),
+    ("contributor_paydetails", False, 4),
+    ("paydetails", True, 5),
+    ("contributor_report", True, 4),
+    ("contributor_withdrawals", True, 4),
+    ("contributor_setting", False, 4),
+    ("transaction_history", False, 4),
+    ("notifications", False, 4),
+    ("support", False, 6),
+    ("refer", False, 3),
+]
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.datasets = {}
+        for size, sizes in SIZES.items():
+            seed.seed(prefix=size, rng=random.Random(size), **sizes)
+            users = User.objects.filter(username__startswith=f"{size}-")
+
+            organizer = (
+                users.annotate(n=Count("organized_groups")).order_by("-n", "id").first()
+            )
+            contributor = (
+                users.filter(organized_groups__isnull=True)
+                .annotate(n=Count("groupmember")).order_by("-n", "id").first()
+            )
+            organized = (
+                AkawoGroup.objects.filter(organizer=organizer)
+                .annotate(n=Count("group_members")).order_by("-n", "id").first()
+            )
+            joined = (
+                AkawoGroup.objects.filter(group_members__user=contributor)
+                .order_by("id").first()
+            )
+
+            # Seeded data has no reports; give every member of the group one.
+            Report.objects.bulk_create([
+                Report(group=organized, contributor_id=user_id, message="Payment not showing")
+                for user_id in organized.group_members.values_list("user_id", flat=True)
+            ])
+
+            cls.datasets[size] = {
+                "organizer": (organizer, organized),
+                "contributor": (contributor, joined),
+            }
+
+    def count_queries(self, size, role, name, takes_group):
+        user, group = self.datasets[size][role]
+        url = reverse(name, args=[group.id] if takes_group else [])
+
+        self.client.force_login(user)
+        # Measure the cold path; cached dashboard contexts would hide N+1s.
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertIn(response.status_code, (200, 302), f"{name}: {url}")
+        return captured.captured_queries
+
+    def report(self, name, queries):
+        lines = [f"{name}: {len(queries)} queries"]
+        for count, sql in duplicate_queries(queries):
+            lines.append(f"  {count}x {sql}")
+        return "\n".join(lines)
+
+    def check_pages(self, role, pages):
+        for name, takes_group, budget in pages:
+            with self.subTest(role=role, page=name):
+                small = self.count_queries("small", role, name, takes_group)
+                large = self.count_queries("large", role, name, takes_group)
+
+                self.assertLessEqual(
+                    len(large), budget,
+                    f"over budget ({budget})\n" + self.report(name, large),
+                )
+                self.assertLessEqual(
+                    len(large), len(small),
+                    f"query count grows with rows ({len(small)} -> {len(large)})\n"
+                    + self.report(name, large),
+                )
+
+    def test_organizer_pages(self):
+        self.check_pages("organizer", ORGANIZER_PAGES)
+
+    def test_contributor_pages(self):
+        self.check_pages("contributor", CONTRIBUTOR_PAGES)
+
+
+# ======================
+# SETTLEMENT
+# ======================
+# The callback and the webhook both report the same payment; only the first
+# may move money.
+
+class SettlementTests(TestCase):
+    def setUp(self):
+        organizer = User.objects.create_user("organizer")
+        self.user = User.objects.create_user("member")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000, unpaid_count=1,
+        )
+        self.member = GroupMember.objects.create(user=self.user, group=self.group)
+        Payment.objects.create(contributor=self.member, amount=1000, reference="ref-1")
+
+    def assert_settled_once(self):
+        self.member.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(Payment.objects.get().status, "success")
+        self.assertEqual(Contribution.objects.count(), 1)
+        self.assertEqual(Transaction.objects.filter(reference="ref-1").count(), 1)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.member.total_contributed, 1000)
+        self.assertEqual(self.group.monthly_total, 1000)
+        self.assertEqual(self.group.unpaid_count, 0)
+
+    def test_callback_then_webhook(self):
+        self.assertEqual(len(settlement.settle(["ref-1"])), 1)
+        event = {"event": "charge.success", "data": {"id": 1, "reference": "ref-1"}}
+        self.assertEqual(webhooks.apply_events([event, event]), 0)
+        self.assert_settled_once()
+
+    def test_duplicate_delivery_is_cheap(self):
+        settlement.settle(["ref-1"])
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(settlement.settle(["ref-1"]), [])
+        # The locking SELECT finds nothing to do.
+        queries = [q["sql"] for q in captured.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(queries), 1, queries)
+        self.assert_settled_once()
+
+    def test_second_contribution_for_a_reference_is_rejected(self):
+        settlement.settle(["ref-1"])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Contribution.objects.create(
+                member=self.member, amount=1000, payment_reference="ref-1", status="completed"
+            )
+
+    def test_unknown_callback_reference_skips_paystack(self):
+        metrics.reset("references.")
+        response = self.client.get(reverse("payment_callback"), {"reference": "junk"})
+        self.assertEqual(response.status_code, 404)
+
+        request = RequestFactory().get("/payment/callback/", {"reference": "junk"})
+        with self.assertRaises(Http404):
+            async_to_sync(views.payment_callback_async)(request)
+
+        counters = metrics.snapshot("references.")["counters"]
+        self.assertEqual(counters.get("references.unknown"), 2)
+        self.assertNotIn("references.verified", counters)
+
+
+# A bad event in a webhook batch is set aside; the rest still settle.
+
+class WebhookDrainTests(TestCase):
+    setUp = SettlementTests.setUp
+    assert_settled_once = SettlementTests.assert_settled_once
+
+    def queue(self, event_id, payload):
+        WebhookEvent.objects.create(event_id=event_id, event="charge.success", payload=payload)
+
+    def test_bad_event_does_not_block_the_batch(self):
+        self.queue("bad", '{"event": "charge.success", "data": ["not", "an", "object"]}')
+        self.queue("junk", "not json")
+        self.queue("good", '{"event": "charge.success", "data": {"id": 1, "reference": "ref-1"}}')
+
+        self.assertEqual(webhooks.drain(), (3, 1))
+        self.assert_settled_once()
+        bad = WebhookEvent.objects.get(event_id="bad")
+        self.assertEqual(bad.attempts, 1)
+        self.assertIsNone(bad.processed_at)
+        self.assertIn("AttributeError", bad.last_error)
+        self.assertIsNotNone(WebhookEvent.objects.get(event_id="junk").processed_at)
+
+        for _ in range(webhooks.MAX_ATTEMPTS - 1):
+            webhooks.drain()
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, webhooks.MAX_ATTEMPTS)
+        self.assertIsNotNone(bad.processed_at)
+        self.assertEqual(webhooks.drain(), (0, 0))
+
+    def test_ingest_needs_a_json_object(self):
+        def post(payload):
+            signature = hmac.new(
+                settings.PAYSTACK_SECRET_KEY.encode(), payload, hashlib.sha512
+            ).hexdigest()
+            return self.client.post(
+                reverse("paystack_webhook"), payload, content_type="application/json",
+                HTTP_X_PAYSTACK_SIGNATURE=signature,
+            ).status_code
+
+        self.assertEqual(post(b"[]"), 400)
+        self.assertEqual(post(b'"charge.success"'), 400)
+        self.assertEqual(post(b"{nope"), 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+        self.assertEqual(post(b'{"event": "charge.success", "data": ["x"]}'), 200)
+        self.assertEqual(WebhookEvent.objects.get().event_id, "charge.success:None")
+
+
+# ======================
+# VERIFICATION CACHE
+# ======================
+# payment_callback answers settled references from the LRU, then the
+# Payment table, and only verifies pending ones; concurrent verifies of one
+# reference share a single Paystack call.
+
+class SettledLRUTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = references.SettledLRU(max_size=2, ttl=60)
+        lru.add("a")
+        lru.add("b")
+        self.assertIn("a", lru)  # a is now the most recent
+        lru.add("c")
+        self.assertNotIn("b", lru)
+        self.assertIn("a", lru)
+        self.assertIn("c", lru)
+
+    def test_entries_expire(self):
+        clock = [100.0]
+        with mock.patch("core.references.time.monotonic", lambda: clock[0]):
+            lru = references.SettledLRU(max_size=2, ttl=10)
+            lru.add("a")
+            clock[0] = 109
+            self.assertIn("a", lru)
+            clock[0] = 120  # the hit above didn't extend the TTL
+            self.assertNotIn("a", lru)
+            self.assertEqual(len(lru._entries), 0)
+
+
+class CountingClient:
+    # Stands in for the Paystack client; verify blocks until released.
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def verify_transaction(self, reference):
+        self.calls += 1
+        self.release.wait(5)
+        return {"status": True, "data": {"reference": reference, "status": "success"}}
+
+
+class AsyncCountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def verify_transaction(self, reference):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"status": True, "data": {"reference": reference, "status": "success"}}
+
+
+class VerificationCacheTests(TestCase):
+    def setUp(self):
+        references.settled.clear()
+        self.addCleanup(references.settled.clear)
+        metrics.reset("references.")
+        organizer = User.objects.create_user("organizer")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        member = GroupMember.objects.create(user=organizer, group=group)
+        for reference, status in (("done", "success"), ("open", "initiated")):
+            Payment.objects.create(contributor=member, amount=1000, reference=reference, status=status)
+        self.client_stub = CountingClient()
+        patcher = mock.patch("core.references.paystack.get_client", lambda: self.client_stub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def counters(self):
+        return metrics.snapshot("references.")["counters"]
+
+    def test_settled_reference_short_circuits(self):
+        self.assertEqual(references.lookup("done"), references.SETTLED)
+        with self.assertNumQueries(0):
+            self.assertEqual(references.lookup("done"), references.SETTLED)
+        self.assertEqual(references.lookup("open"), references.PENDING)
+        self.assertIsNone(references.lookup("nobody"))
+        self.assertEqual(self.counters(), {
+            "references.db_hit": 1, "references.lru_hit": 1,
+            "references.miss": 1, "references.unknown": 1,
+        })
+
+        # Only a pending reference reaches Paystack through the callback.
+        self.client_stub.release.set()
+        for reference in ("done", "nobody"):
+            self.client.get(reverse("payment_callback"), {"reference": reference})
+        self.assertEqual(self.client_stub.calls, 0)
+
+    def test_concurrent_verifies_coalesce(self):
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(references.verify, "open") for _ in range(5)]
+            # Wait for every follower to be parked behind the leader.
+            deadline = time.monotonic() + 5
+            while self.counters().get("references.coalesced", 0) < 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.client_stub.release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(self.client_stub.calls, 1)
+        self.assertEqual(self.counters()["references.coalesced"], 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(references._inflight, {})
+
+    def test_concurrent_async_verifies_coalesce(self):
+        stub = AsyncCountingClient()
+
+        async def verify_all():
+            return await asyncio.gather(*[references.averify("open") for _ in range(5)])
+
+        with mock.patch("core.references.paystack.get_async_client", lambda: stub):
+            results = async_to_sync(verify_all)()
+        self.assertEqual(stub.calls, 1)
+        self.assertEqual({r["data"]["status"] for r in results}, {"success"})
+        self.assertEqual(references._ainflight, {})
+
+
+# ======================
+# PAYSTACK STUB
+# ======================
+
+class PaystackStubMixin:
+    # A local Paystack stub for the test class. The process-wide client,
+    # guard and settled-reference cache are rebuilt around each test.
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = PaystackStubServer().start()
+        cls.addClassCleanup(cls.server.stop)
+
+    def setUp(self):
+        super().setUp()
+        self.server.statuses = {}
+        self.server.reset_counts()
+        base_url = override_settings(PAYSTACK_BASE_URL=self.server.base_url)
+        base_url.enable()
+        self.addCleanup(base_url.disable)
+        for reset in (paystack.reset_client, paystack.reset_async_client, paystack.reset_guard,
+                      references.settled.clear):
+            reset()
+            self.addCleanup(reset)
+
+
+# ======================
+# BATCH CHECKOUT
+# ======================
+# One Paystack charge for several members settles into one contribution
+# each.
+
+class BatchCheckoutTests(PaystackStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create_user("organizer", email="org@example.com")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.members = [
+            GroupMember.objects.create(user=User.objects.create_user(f"member-{i}"), group=self.group)
+            for i in range(3)
+        ]
+        self.client.force_login(self.organizer)
+
+    def test_one_charge_fans_out(self):
+        paid = self.members[:2]
+        response = self.client.post(
+            reverse("pay_for_contributor", args=[self.group.id]),
+            {"contributor_ids": [m.id for m in paid]},
+        )
+        self.assertTrue(response["Location"].startswith("https://checkout.stub/org_"))
+        (parent,) = set(Payment.objects.values_list("parent_reference", flat=True))
+        self.assertEqual(self.server.counts["requests"], 1)
+
+        for _ in range(2):
+            response = self.client.get(reverse("payment_callback"), {"reference": parent})
+            self.assertEqual(response.status_code, 200)
+        # The second callback is answered locally.
+        self.assertEqual(self.server.counts["requests"], 2)
+
+        contributions = Contribution.objects.filter(paid_by="organizer")
+        self.assertEqual(sorted(c.member_id for c in contributions), [m.id for m in paid])
+        self.assertEqual(Transaction.objects.filter(transaction_type="contribution").count(), 2)
+        self.assertEqual(Notification.objects.filter(contribution__isnull=False).count(), 2)
+        for member, total in zip(self.members, (1000, 1000, 0)):
+            member.refresh_from_db()
+            self.assertEqual(member.total_contributed, total)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.monthly_total, 2000)
+
+    async def test_async_view_builds_the_same_rows(self):
+        paid = self.members[:2]
+        request = AsyncRequestFactory().post(
+            f"/groups/{self.group.id}/pay/", {"contributor_ids": [m.id for m in paid]}
+        )
+
+        async def auser():
+            return self.organizer
+
+        request.user, request.auser = self.organizer, auser
+        response = await views.pay_for_contributor_async(request, self.group.id)
+
+        self.assertEqual(response.status_code, 302)
+        (parent,) = {p.parent_reference async for p in Payment.objects.all()}
+        self.assertTrue(parent.startswith("org_"))
+        row_references = sorted([p.reference async for p in Payment.objects.all()])
+        self.assertEqual(row_references, sorted(f"{parent}_{m.id}" for m in paid))
+        self.assertEqual(self.server.counts["requests"], 1)
+
+
+# ======================
+# RECONCILIATION
+# ======================
+# reconcile_payments against the local Paystack stub: settles what Paystack
+# says went through, fails what it says didn't, and resumes after its
+# checkpoint.
+
+class ReconcileTests(PaystackStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        organizer = User.objects.create_user("organizer")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        members = [
+            GroupMember.objects.create(user=User.objects.create_user(f"member-{i}"), group=group)
+            for i in range(2)
+        ]
+        self.payments = {
+            reference: Payment.objects.create(
+                contributor=members[0], amount=1000, reference=reference
+            )
+            for reference in ("paid", "declined", "ongoing", "unknown")
+        }
+        for i, member in enumerate(members):
+            Payment.objects.create(
+                contributor=member, amount=1000, reference=f"org_batch_{i}",
+                parent_reference="org_batch",
+            )
+        self.server.statuses = {
+            "paid": "success", "declined": "failed", "ongoing": "ongoing",
+            "unknown": None, "org_batch": "success",
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = Path(directory.name) / "checkpoint"
+
+    def reconcile(self, **options):
+        call_command(
+            "reconcile_payments", older_than=0, workers=2, rate=1000,
+            checkpoint=str(self.checkpoint), stdout=io.StringIO(), stderr=io.StringIO(),
+            **options,
+        )
+
+    def statuses(self):
+        return dict(Payment.objects.values_list("reference", "status"))
+
+    def test_settles_and_fails(self):
+        self.reconcile()
+        self.assertEqual(self.statuses(), {
+            "paid": "success", "declined": "failed", "ongoing": "initiated",
+            "unknown": "failed", "org_batch_0": "success", "org_batch_1": "success",
+        })
+        self.assertEqual(
+            set(Contribution.objects.values_list("payment_reference", flat=True)),
+            {"paid", "org_batch_0", "org_batch_1"},
+        )
+        # The batch checkout is verified once for both rows.
+        self.assertEqual(self.server.counts["requests"], 5)
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_resumes_after_checkpoint(self):
+        self.checkpoint.write_text(json.dumps({"last_id": self.payments["declined"].id}))
+        self.reconcile()
+        statuses = self.statuses()
+        self.assertEqual(statuses["paid"], "initiated")
+        self.assertEqual(statuses["declined"], "initiated")
+        self.assertEqual(statuses["unknown"], "failed")
+        self.assertEqual(statuses["org_batch_0"], "success")
+
+    def test_stops_at_first_unavailable(self):
+        verify = paystack.PaystackClient.verify_transaction
+
+        def down_for_declined(client, reference):
+            if reference == "declined":
+                return {"status": False, "unavailable": True, "message": "Paystack unavailable"}
+            return verify(client, reference)
+
+        with mock.patch.object(paystack.PaystackClient, "verify_transaction", down_for_declined):
+            self.reconcile()
+        # Rows after the unanswered one were verified but are left for the
+        # resumed run, and the checkpoint stops right before it.
+        self.assertEqual(self.statuses()["paid"], "success")
+        self.assertEqual(
+            {status for ref, status in self.statuses().items() if ref != "paid"}, {"initiated"}
+        )
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {"last_id": self.payments["paid"].id})
+
+        self.reconcile()
+        self.assertEqual(self.statuses()["declined"], "failed")
+        self.assertEqual(self.statuses()["org_batch_1"], "success")
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_batch_checkout_split_across_chunks(self):
+        self.reconcile(chunk_size=1)
+        self.assertEqual(self.statuses()["org_batch_0"], "success")
+        self.assertEqual(self.statuses()["org_batch_1"], "success")
+        self.assertEqual(self.server.counts["requests"], 5)
+
+
+# ======================
+# PAYSTACK GUARD
+# ======================
+# The outbound guard sheds Paystack calls instead of letting workers pile up
+# behind a slow provider; the views turn a shed call into a 503.
+
+class OutboundGuardTests(SimpleTestCase):
+    def guard(self, **kwargs):
+        options = dict(max_concurrency=1, queue_timeout=0, rate=0, threshold=2,
+                       reset_timeout=30, slow_call=5)
+        return paystack.OutboundGuard(**{**options, **kwargs})
+
+    def assertRejected(self, guard, reason):
+        with self.assertRaises(paystack.Rejected) as caught:
+            with guard.slot():
+                pass
+        self.assertEqual(caught.exception.reason, reason)
+
+    def test_breaker_transitions(self):
+        clock = [1000.0]
+        with mock.patch("core.paystack.time.monotonic", lambda: clock[0]):
+            breaker = paystack.CircuitBreaker(threshold=2, reset_timeout=30, name="test.breaker")
+            breaker.record(failed=True)
+            self.assertEqual(breaker.state, breaker.CLOSED)
+            breaker.record(failed=True)
+            self.assertEqual(breaker.state, breaker.OPEN)
+            self.assertFalse(breaker.allow())
+            self.assertEqual(breaker.retry_after(), 30)
+
+            # After the timeout, one trial call at a time; its failure reopens.
+            clock[0] += 30
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, breaker.HALF_OPEN)
+            self.assertFalse(breaker.allow())
+            breaker.record(failed=True)
+            self.assertEqual(breaker.state, breaker.OPEN)
+            self.assertFalse(breaker.allow())
+
+            # A successful trial closes it again.
+            clock[0] += 30
+            self.assertTrue(breaker.allow())
+            breaker.record(failed=False)
+            self.assertEqual(breaker.state, breaker.CLOSED)
+            self.assertTrue(breaker.allow())
+            self.assertTrue(breaker.allow())
+
+    def test_rejects_when_slots_are_taken(self):
+        guard = self.guard()
+        with guard.slot():
+            self.assertRejected(guard, "concurrency")
+        with guard.slot():
+            pass
+
+    def test_rejects_over_the_rate_and_frees_the_slot(self):
+        guard = self.guard(rate=1, burst=1)
+        with guard.slot():
+            pass
+        self.assertRejected(guard, "rate")
+        # The rate rejection gave its slot back.
+        self.assertRejected(guard, "rate")
+
+    def test_open_breaker_rejects_before_taking_a_slot(self):
+        guard = self.guard()
+        with guard.slot():
+            for _ in range(2):
+                guard.record(failed=True, elapsed=0.1)
+            # Every slot is taken, yet the answer is "open", not "concurrency".
+            self.assertRejected(guard, "open")
+        self.assertEqual(guard.retry_after(), 30)
+
+    def test_slow_calls_count_as_failures(self):
+        guard = self.guard()
+        for _ in range(2):
+            guard.record(failed=False, elapsed=5)
+        self.assertRejected(guard, "open")
+
+
+class PaystackUnavailableTests(PaystackStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user("member", email="member@example.com")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=user,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.member = GroupMember.objects.create(user=user, group=group)
+        self.client.force_login(user)
+        guard = paystack.get_guard()
+        for _ in range(guard.breaker.threshold):
+            guard.record(failed=True, elapsed=0.1)
+
+    def assertUnavailable(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 30)
+        self.assertTemplateUsed(response, "payment_unavailable.html")
+        self.assertEqual(self.server.counts["requests"], 0)
+
+    def test_checkout_answers_503_with_retry_after(self):
+        response = self.client.get(reverse("wallet_contribute", args=[self.member.id]))
+        self.assertUnavailable(response)
+
+    def test_callback_answers_503_and_leaves_the_payment_pending(self):
+        payment = Payment.objects.create(
+            contributor=self.member, amount=1000, reference="ref-shed", status="initiated"
+        )
+        response = self.client.get(reverse("payment_callback"), {"reference": payment.reference})
+        self.assertUnavailable(response)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "initiated")
+
+
+# The ASGI views (ASYNC_PAYMENTS=True) are called directly: the URLconf
+# picks one set of views at import time.
+
+class AsyncPaymentTests(PaystackStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("member", email="member@example.com")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.user,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.member = GroupMember.objects.create(user=self.user, group=group)
+        self.payment = Payment.objects.create(
+            contributor=self.member, amount=1000, reference="ref-async", status="initiated"
+        )
+
+    def call(self, view, path, *args, **params):
+        request = AsyncRequestFactory().get(path, params)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        request.session = SessionStore()
+        return async_to_sync(view)(request, *args)
+
+    def shed(self):
+        guard = paystack.get_guard()
+        for _ in range(guard.breaker.threshold):
+            guard.record(failed=True, elapsed=0.1)
+
+    def assertUnavailable(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 30)
+        self.assertEqual(self.server.counts["requests"], 0)
+
+    def test_checkout_redirects_to_paystack(self):
+        response = self.call(views.start_contribution_payment_async, "/", self.member.id)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith("https://checkout.stub/"))
+        self.assertEqual(Payment.objects.filter(status="initiated").count(), 2)
+
+    def test_callback_settles(self):
+        response = self.call(views.payment_callback_async, "/payment/callback/", reference="ref-async")
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "success")
+        self.assertEqual(Contribution.objects.get().payment_reference, "ref-async")
+        self.assertIn("ref-async", references.settled)
+
+        # A refresh is answered from the cache; Paystack isn't asked again.
+        self.call(views.payment_callback_async, "/payment/callback/", reference="ref-async")
+        self.assertEqual(self.server.counts["requests"], 1)
+
+    def test_unavailable_answers_503_with_retry_after(self):
+        self.shed()
+        self.assertUnavailable(
+            self.call(views.start_contribution_payment_async, "/", self.member.id)
+        )
+        self.assertUnavailable(
+            self.call(views.payment_callback_async, "/payment/callback/", reference="ref-async")
+        )
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "initiated")
+
+
+# ======================
+# SQLITE PROFILES
+# ======================
+# The test database runs under the configured profile, so its pragmas are
+# read back from a live connection. Journal mode is checked against a real
+# file, since an in-memory database has none to switch.
+
+class SQLiteProfileTests(TestCase):
+    def test_connection_uses_the_profile(self):
+        options = settings.SQLITE_PROFILES["concurrent"]
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(settings.SQLITE_PROFILES["default"], {})
+        if settings.SQLITE_PROFILE != "concurrent":
+            self.skipTest("needs SQLITE_PROFILE=concurrent")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+@override_settings(SQLITE_PROFILE="concurrent")
+class JournalModeTests(SimpleTestCase):
+    databases = {"default"}  # a separate file; the test database isn't touched
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        default = connections["default"]
+        self.db = default.__class__(
+            {**default.settings_dict, "NAME": str(Path(directory.name) / "db.sqlite3")}
+        )
+        self.addCleanup(self.db.close)
+        for patcher in (
+            mock.patch("core.checks.connections", {"default": self.db}),
+            mock.patch("core.management.commands.sqlite_journal_mode.connection", self.db),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def journal_mode(self, *args):
+        out = io.StringIO()
+        call_command("sqlite_journal_mode", *args, stdout=out)
+        return out.getvalue()
+
+    def warnings(self):
+        return [w.id for w in checks.sqlite_journal_mode(None, databases=["default"])]
+
+    def test_check_and_switch(self):
+        self.assertIn("journal_mode=delete", self.journal_mode())
+        self.assertIn("sqlite_journal_mode wal", self.journal_mode())
+        self.assertEqual(self.warnings(), ["core.W001"])
+
+        self.assertIn("journal_mode=wal", self.journal_mode("wal"))
+        self.assertNotIn("expects", self.journal_mode())
+        self.assertEqual(self.warnings(), [])
+
+        with self.settings(SQLITE_PROFILE="default"):
+            self.assertEqual(self.warnings(), ["core.W001"])
+            self.journal_mode("delete")
+            self.assertEqual(self.warnings(), [])
+
+
+# ======================
+# TASK QUEUE
+# ======================
+# Claims lease a task to one worker; an expired lease lets another worker
+# take it; failures back off until max_attempts, then the task fails.
+
+def succeed():
+    pass
+
+
+def fail():
+    raise ValueError("boom")
+
+
+class TaskQueueTests(TestCase):
+    def expire(self, task):
+        Task.objects.filter(id=task.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claim_leases_to_one_worker(self):
+        task = tasks.enqueue(succeed)
+        (claimed,) = tasks.claim("w1", limit=5)
+        self.assertEqual((claimed.id, claimed.status, claimed.attempts), (task.id, "running", 1))
+        self.assertEqual(tasks.claim("w2"), [])
+
+        self.assertTrue(tasks.run(claimed, "w1"))
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, "done")
+        self.assertIsNotNone(claimed.finished_at)
+
+    def test_expired_lease_is_reclaimed(self):
+        tasks.enqueue(succeed)
+        (first,) = tasks.claim("w1")
+        self.expire(first)
+        (second,) = tasks.claim("w2")
+        self.assertEqual((second.id, second.attempts, second.locked_by), (first.id, 2, "w2"))
+
+        # The first worker's late result no longer owns the row.
+        tasks.run(first, "w1")
+        second.refresh_from_db()
+        self.assertEqual(second.status, "running")
+
+    def test_failure_backs_off_then_fails(self):
+        tasks.enqueue(fail, max_attempts=2)
+        (task,) = tasks.claim("w1")
+        before = timezone.now()
+        self.assertFalse(tasks.run(task, "w1"))
+        task.refresh_from_db()
+        self.assertEqual(task.status, "queued")
+        self.assertIn("ValueError: boom", task.last_error)
+        delay = (task.run_at - before).total_seconds()
+        self.assertTrue(tasks.RETRY_BASE_DELAY / 2 <= delay <= tasks.RETRY_BASE_DELAY + 1, delay)
+        self.assertEqual(tasks.claim("w1"), [])
+
+        Task.objects.filter(id=task.id).update(run_at=timezone.now())
+        (task,) = tasks.claim("w1")
+        self.assertFalse(tasks.run(task, "w1"))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ("failed", 2))
+        self.assertEqual(tasks.claim("w1"), [])
+
+    def test_reap_expired_final_attempt(self):
+        tasks.enqueue(succeed, max_attempts=1)
+        (task,) = tasks.claim("w1")
+        self.expire(task)
+        self.assertEqual(tasks.claim("w2"), [])
+        self.assertEqual(tasks.reap_expired(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, "failed")
+
+
+# ======================
+# NOTIFICATIONS
+# ======================
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("member")
+        self.note = Notification.objects.create(
+            user=self.user, notification_type="contribution", message="Due"
+        )
+        self.client.force_login(self.user)
+
+    def test_mark_as_read_needs_post(self):
+        url = reverse("mark_as_read", args=[self.note.id])
+        self.client.get(url)
+        self.note.refresh_from_db()
+        self.assertFalse(self.note.is_read)
+
+        self.client.post(url)
+        self.note.refresh_from_db()
+        self.assertTrue(self.note.is_read)
+
+    def test_inbox_pages_without_sorting(self):
+        plan = Notification.objects.filter(user=self.user).order_by("-created_at", "-id")[:26].explain()
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+# ======================
+# TRANSACTION HISTORY
+# ======================
+# Keyset pages over (created_at, id): rows sharing a timestamp are neither
+# repeated nor skipped at a page boundary, and a bad cursor is ignored.
+
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("member")
+        other = User.objects.create_user("other")
+        Transaction.objects.bulk_create(
+            [Transaction(user=self.user, amount=i, transaction_type="payment") for i in range(60)]
+            + [Transaction(user=other, amount=1, transaction_type="payment")]
+        )
+        # Three rows per timestamp, so ties straddle the 25-row pages.
+        base = timezone.now()
+        for i, pk in enumerate(Transaction.objects.filter(user=self.user).values_list("id", flat=True)):
+            Transaction.objects.filter(id=pk).update(created_at=base + timedelta(minutes=i // 3))
+        self.expected = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.client.force_login(self.user)
+
+    def page(self, **params):
+        context = self.client.get(reverse("transaction_history"), params).context
+        return [t.id for t in context["transactions"]], context["next_cursor"], context["prev_cursor"]
+
+    def test_pages_follow_a_stable_order(self):
+        pages = []
+        ids, next_cursor, prev_cursor = self.page()
+        self.assertIsNone(prev_cursor)
+        pages.append(ids)
+        while next_cursor:
+            ids, next_cursor, prev_cursor = self.page(before=next_cursor)
+            pages.append((ids, prev_cursor))
+        first, (second, back_to_first), (third, back_to_second) = pages
+        self.assertEqual([len(first), len(second), len(third)], [25, 25, 10])
+        self.assertEqual(first + second + third, self.expected)
+
+        ids, _, prev_cursor = self.page(after=back_to_second)
+        self.assertEqual(ids, second)
+        self.assertEqual(prev_cursor, back_to_first)
+        ids, next_cursor, prev_cursor = self.page(after=back_to_first)
+        self.assertEqual(ids, first)
+        self.assertIsNone(prev_cursor)
+        self.assertEqual(self.page(before=next_cursor)[0], second)
+
+    def test_tampered_cursor_shows_the_first_page(self):
+        for cursor in ("junk", "123-abc", "9" * 40 + "-1", "-"):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.page(before=cursor)[0], self.expected[:25])
+                self.assertEqual(self.page(after=cursor)[0], self.expected[:25])
+
+
+# ======================
+# REMINDERS
+# ======================
+# Members get an in-app notification at once; the emails go out from the
+# task queue, one task per batch.
+
+class ReminderTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer", email="organizer@example.com")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        for user in [self.organizer] + [
+            User.objects.create_user(name, email=f"{name}@example.com")
+            for name in ("ada", "bola", "chidi")
+        ]:
+            GroupMember.objects.create(user=user, group=self.group)
+
+    def run_tasks(self):
+        for task in tasks.claim("w1", limit=10):
+            self.assertTrue(tasks.run(task, "w1"))
+
+    def test_one_task_per_email_batch(self):
+        with mock.patch.object(reminders, "EMAIL_BATCH_SIZE", 2):
+            self.assertEqual(reminders.send_reminder(self.group, "Pay up"), 3)
+        batches = [task.args[2] for task in Task.objects.order_by("id")]
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+
+        self.run_tasks()
+        self.assertEqual(
+            sorted(address for email in mail.outbox for address in email.to),
+            sorted(address for batch in batches for address in batch),
+        )
+
+    def test_audience(self):
+        # Members without an email still get the in-app notification.
+        GroupMember.objects.create(user=User.objects.create_user("dayo"), group=self.group)
+        elsewhere = AkawoGroup.objects.create(
+            group_name="Market", organizer=self.organizer,
+            contribution_cycle="weekly", contribution_amount=500,
+        )
+        GroupMember.objects.create(
+            user=User.objects.create_user("efe", email="efe@example.com"), group=elsewhere
+        )
+
+        recipients = dict(reminders.recipients_for(self.group))
+        self.assertEqual(
+            sorted(recipients.values()),
+            ["", "ada@example.com", "bola@example.com", "chidi@example.com"],
+        )
+        self.assertNotIn(self.organizer.id, recipients)
+
+        self.assertEqual(reminders.send_reminder(self.group, "Pay up"), 4)
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)), set(recipients)
+        )
+        (task,) = Task.objects.all()
+        self.assertEqual(len(task.args[2]), 3)
+
+    def test_view_queues_and_worker_sends(self):
+        self.client.force_login(self.organizer)
+        url = reverse("send_reminder", args=[self.group.id])
+        response = self.client.post(url, {"message": "Dues by Friday"})
+        self.assertRedirects(response, reverse("manage_page", args=[self.group.id]),
+                             fetch_redirect_response=False)
+        # Nothing is mailed inside the request.
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.get().name, "core.reminders.send_emails")
+
+        self.run_tasks()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            {(email.subject, email.body) for email in mail.outbox},
+            {("Reminder from Ajo", "Dues by Friday")},
+        )
+
+        self.client.force_login(User.objects.create_user("other"))
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+
+# ======================
+# PROFILE COUNTERS
+# ======================
+# Logins and settings saves must not write back membership counters loaded
+# before a concurrent F() increment.
+
+class ProfileCounterTests(TestCase):
+    def test_saves_keep_concurrent_increments(self):
+        user = User.objects.create_user("member", password="pw")
+        profile = user.profile  # loaded with memberships_count=0
+
+        roles.members_added([user.pk])  # e.g. an import on another worker
+        self.client.login(username="member", password="pw")
+        user.save()
+        self.client.post(reverse("account_settings"), {"phone_number": "08030000001"})
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.memberships_count, 1)
+        self.assertEqual(profile.phone_number, "08030000001")
+
+
+# ======================
+# DASHBOARD ROLE
+# ======================
+# Membership decides the dashboard; the role picked on the select-role page
+# only fills in for a user with no groups. The session copy is trusted for
+# SESSION_MAX_AGE at most, even if the version it was tagged with is gone.
+
+class DashboardRoleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("member")
+        self.client.force_login(self.user)
+
+    def dashboard(self):
+        return self.client.get(reverse("dashboard"))
+
+    def test_picked_role_until_groups_decide(self):
+        self.assertRedirects(self.dashboard(), reverse("select_role"))
+        self.client.post(reverse("select_role"), {"selected_role": "organizer"})
+        self.assertRedirects(self.dashboard(), reverse("organizer_dashboard"))
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.dashboard_role(), "organizer")
+
+        organizer = User.objects.create_user("organizer")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=organizer, referral_code="AJO1",
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("join_group"), {"referral_code": group.referral_code})
+        self.assertRedirects(
+            self.dashboard(), reverse("contributor_dashboard"), fetch_redirect_response=False
+        )
+
+    def test_session_entry_expires_when_the_version_is_lost(self):
+        now = timezone.now().timestamp()
+        with mock.patch("core.roles.time.time", return_value=now):
+            self.assertRedirects(self.dashboard(), reverse("select_role"))
+
+        # Joined on another worker, and the version key was evicted since.
+        roles.members_added([self.user.pk])
+        cache.delete(dashboards._user_key(self.user.pk))
+        with mock.patch("core.roles.time.time", return_value=now + 60):
+            self.assertRedirects(self.dashboard(), reverse("select_role"))
+        with mock.patch("core.roles.time.time", return_value=now + roles.SESSION_MAX_AGE):
+            self.assertRedirects(
+                self.dashboard(), reverse("contributor_dashboard"), fetch_redirect_response=False
+            )
+
+
+# ======================
+# DASHBOARD CACHE
+# ======================
+# Writes bump the cache versions only once they commit; until one changes,
+# the dashboard is served from the cache.
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user("organizer")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.member = GroupMember.objects.create(
+            user=User.objects.create_user("ada"), group=self.group
+        )
+
+    def group_version(self):
+        return cache.get(dashboards._group_key(self.group.id))
+
+    def assertBumpedOnCommit(self, write, version):
+        before = version()
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+            self.assertEqual(version(), before)
+        self.assertNotEqual(version(), before)
+
+    def test_writes_bump_versions_after_commit(self):
+        self.assertBumpedOnCommit(
+            lambda: Contribution.objects.create(member=self.member, amount=1000),
+            self.group_version,
+        )
+        self.assertBumpedOnCommit(
+            lambda: Withdrawal.objects.create(member=self.member, group=self.group, amount=500),
+            self.group_version,
+        )
+        bola = User.objects.create_user("bola")
+        self.assertBumpedOnCommit(
+            lambda: GroupMember.objects.create(user=bola, group=self.group), self.group_version,
+        )
+        self.assertNotEqual(dashboards.user_version(bola.pk), 0)
+        self.assertBumpedOnCommit(
+            lambda: GroupMember.objects.filter(user=bola).delete(),
+            lambda: dashboards.user_version(bola.pk),
+        )
+
+    def test_dashboard_served_from_cache(self):
+        self.client.force_login(self.organizer)
+        metrics.reset("dashboards.")
+        self.client.get(reverse("organizer_dashboard"))
+        self.client.get(reverse("organizer_dashboard"))
+        self.assertEqual(metrics.snapshot("dashboards.organizer_dashboard.")["counters"], {
+            "dashboards.organizer_dashboard.miss": 1, "dashboards.organizer_dashboard.hit": 1,
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Contribution.objects.create(member=self.member, amount=1000, status="completed")
+        self.client.get(reverse("organizer_dashboard"))
+        counters = metrics.snapshot("dashboards.organizer_dashboard.")["counters"]
+        self.assertEqual(counters["dashboards.organizer_dashboard.miss"], 2)
+
+
+# ======================
+# AVATARS
+# ======================
+# Variants are built by the task queue; until then, or if that fails, pages
+# link the upload itself.
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        root = override_settings(MEDIA_ROOT=media.name)
+        root.enable()
+        self.addCleanup(root.disable)
+        self.profile = User.objects.create_user("member").profile
+
+    def upload(self, content):
+        self.profile.image.save("me.png", ContentFile(content))
+        self.profile.refresh_from_db()
+
+    def run_tasks(self):
+        for task in tasks.claim("w1", limit=10):
+            tasks.run(task, "w1")
+        self.profile.refresh_from_db()
+
+    def test_variants_once_built(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (200, 200), "purple").save(buffer, "PNG")
+        self.upload(buffer.getvalue())
+        self.assertFalse(self.profile.image_variants)
+        self.assertEqual(self.profile.avatar_small, self.profile.image.url)
+        self.assertEqual(Task.objects.filter(status="queued").count(), 1)
+
+        self.run_tasks()
+        self.assertTrue(self.profile.image_variants)
+        self.assertIn("/variants/", self.profile.avatar_small)
+        self.assertIn("192w", self.profile.avatar_srcset)
+
+        # Saves that leave the photo alone queue nothing.
+        self.profile.save(update_fields=["phone_number"])
+        self.assertFalse(Task.objects.filter(status="queued").exists())
+
+    def test_original_when_processing_fails(self):
+        self.upload(b"not an image")
+        with self.assertLogs("core.images", "WARNING"):
+            self.run_tasks()
+        self.assertFalse(self.profile.image_variants)
+        self.assertEqual(self.profile.avatar_small, self.profile.image.url)
+        self.assertEqual(self.profile.avatar_srcset, "")
+
+        # Cleared uploads clear the flag too.
+        images.mark_built(self.profile.image, True)
+        self.profile.image = None
+        self.profile.save(update_fields=["image"])
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.image_variants)
+
+
+# ======================
+# MEDIA SERVING
+# ======================
+
+@override_settings(MEDIA_SENDFILE="")
+class MediaTests(TestCase):
+    body = b"0123456789"
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        root = override_settings(MEDIA_ROOT=media.name)
+        root.enable()
+        self.addCleanup(root.disable)
+        for name in ("plain.txt", "plain.5464533c9647.txt"):
+            Path(media.name, name).write_bytes(self.body)
+
+    def get(self, name="plain.txt", **headers):
+        response = self.client.get(f"/media/{name}", headers=headers)
+        return response, b"".join(response.streaming_content) if response.streaming else b""
+
+    def test_full_and_not_modified(self):
+        response, content = self.get()
+        self.assertEqual((response.status_code, content), (200, self.body))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("max-age=3600", response["Cache-Control"])
+        self.assertIn("immutable", self.get("plain.5464533c9647.txt")[0]["Cache-Control"])
+
+        self.assertEqual(self.get(**{"If-None-Match": response["ETag"]})[0].status_code, 304)
+        self.assertEqual(
+            self.get(**{"If-Modified-Since": response["Last-Modified"]})[0].status_code, 304
+        )
+
+    def test_ranges(self):
+        response, content = self.get(Range="bytes=2-5")
+        self.assertEqual((response.status_code, content), (206, b"2345"))
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+
+        self.assertEqual(self.get(Range="bytes=-3")[1], b"789")
+        self.assertEqual(self.get(Range="bytes=7-100")[1], b"789")
+        # Several ranges aren't supported; the whole file is a valid answer.
+        self.assertEqual(self.get(Range="bytes=0-1,4-5")[0].status_code, 200)
+
+        response, _ = self.get(Range="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_if_range(self):
+        etag = self.get()[0]["ETag"]
+        self.assertEqual(self.get(Range="bytes=0-0", **{"If-Range": etag})[0].status_code, 206)
+        response, content = self.get(Range="bytes=0-0", **{"If-Range": '"stale"'})
+        self.assertEqual((response.status_code, content), (200, self.body))
+        self.assertEqual(
+            self.get(Range="bytes=0-0", **{"If-Range": "Thu, 01 Jan 1970 00:00:00 GMT"})[0].status_code,
+            200,
+        )
+
+    def test_missing_and_outside_root(self):
+        self.assertEqual(self.get("missing.txt")[0].status_code, 404)
+        self.assertEqual(self.get("../tests.py")[0].status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect", MEDIA_ACCEL_PREFIX="/protected/")
+    def test_sendfile(self):
+        response, _ = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/plain.txt")
+        self.assertEqual(response.content, b"")
+
+
+# ======================
+# WITHDRAWALS
+# ======================
+# Approval debits the member's balance only if it still covers the amount.
+
+class WithdrawalTests(TestCase):
+    def test_approval_never_overdraws(self):
+        organizer = User.objects.create_user("organizer")
+        group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        member = GroupMember.objects.create(
+            user=User.objects.create_user("member"), group=group, total_contributed=1500
+        )
+        first, second = [
+            Withdrawal.objects.create(member=member, group=group, amount=1000) for _ in range(2)
+        ]
+
+        self.assertTrue(balances.approve_withdrawal(first))
+        self.assertFalse(balances.approve_withdrawal(second))
+
+        member.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(member.total_contributed, 500)
+        self.assertEqual(second.status, "pending")
+        self.assertEqual(Transaction.objects.filter(transaction_type="withdrawal").count(), 1)
+
+
+# ======================
+# UNPAID COUNT
+# ======================
+# unpaid_count follows members who owe the open cycle, from the moment it
+# opens through joins, payments and removals. The organizer never counts.
+
+class UnpaidCountTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.organizer, referral_code="AJO1",
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.members = [
+            GroupMember.objects.create(user=user, group=self.group)
+            for user in [self.organizer, User.objects.create_user("ada"), User.objects.create_user("bola")]
+        ]
+
+    def pay(self, member, at=None):
+        contribution = Contribution.objects.create(member=member, amount=1000, status="completed")
+        if at:
+            Contribution.objects.filter(id=contribution.id).update(created_at=at)
+            contribution.created_at = at
+        balances.contributions_completed([contribution])
+
+    def unpaid(self):
+        self.group.refresh_from_db()
+        return self.group.unpaid_count
+
+    def test_tracks_membership_and_payments(self):
+        cycles.open_new_groups()
+        self.assertEqual(self.unpaid(), 2)
+
+        self.client.force_login(User.objects.create_user("chidi"))
+        self.client.post(reverse("join_group"), {"referral_code": "AJO1"})
+        self.assertEqual(self.unpaid(), 3)
+
+        organizer, ada, bola = self.members
+        self.pay(organizer)
+        self.pay(ada)
+        self.pay(ada)
+        self.assertEqual(self.unpaid(), 2)
+
+        self.client.force_login(self.organizer)
+        self.client.post(reverse("remove_member", args=[self.group.id, ada.id]))
+        self.assertEqual(self.unpaid(), 2)
+        self.client.post(reverse("remove_member", args=[self.group.id, bola.id]))
+        self.assertEqual(self.unpaid(), 1)
+
+    def test_close_keeps_payments_made_after_period_end(self):
+        today = timezone.localdate()
+        end = today.replace(day=1)
+        start = (end - timedelta(days=1)).replace(day=1)
+        AkawoGroup.objects.filter(id=self.group.id).update(
+            current_cycle_month=start, unpaid_count=2
+        )
+        _, ada, bola = self.members
+        self.pay(ada, at=timezone.make_aware(datetime(start.year, start.month, start.day, 12)))
+        # Bola pays in the new period, before the close job has run.
+        self.pay(bola)
+
+        cycles.close_due_cycles(today)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_cycle_month, end)
+        self.assertEqual(self.group.monthly_total, 1000)
+        self.assertEqual(self.group.unpaid_count, 1)
+        self.assertEqual(
+            dict(ContributionHistory.objects.filter(period=start).values_list("member_id", "status")),
+            {self.members[0].id: "unpaid", ada.id: "paid", bola.id: "unpaid"},
+        )
+
+
+# ======================
+# MEMBER IMPORT
+# ======================
+# Every row gets a result, and the query count follows the number of batches,
+# not the number of rows.
+
+class MemberImportTests(TestCase):
+    def setUp(self):
+        organizer = User.objects.create_user("organizer")
+        self.group = AkawoGroup.objects.create(
+            group_name="Market", organizer=organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        self.member = User.objects.create_user("ada", email="ada@example.com")
+        GroupMember.objects.create(user=self.member, group=self.group)
+        self.known = User.objects.create_user("bola")
+        UserProfile.objects.filter(user=self.known).update(phone_number="08030000001")
+
+    def test_row_results(self):
+        rows = [
+            {"email": "ADA@example.com"},
+            {"phone": "0803 000 0001"},
+            {"email": "chidi@example.com", "phone": "08030000002", "first_name": "Chidi"},
+            {"email": "chidi@example.com"},
+            {"email": "not-an-email"},
+            {},
+        ]
+        results = member_import.run(self.group, rows)
+        # An existing account and an address read the same.
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["already_member", "invited", "invited", "duplicate", "invalid", "invalid"],
+        )
+
+        # No account is made for chidi; the invite waits on the address.
+        self.assertFalse(User.objects.filter(email="chidi@example.com").exists())
+        invite = self.group.invites.get(user__isnull=True)
+        self.assertEqual(
+            (invite.email, invite.phone, invite.first_name),
+            ("chidi@example.com", "08030000002", "Chidi"),
+        )
+        self.assertEqual(self.known.group_invites.count(), 1)
+        self.assertEqual(Task.objects.filter(name="core.member_import.send_invite_emails").count(), 1)
+
+        # Nobody is enrolled until they accept.
+        self.assertEqual(self.group.group_members.count(), 1)
+        self.assertEqual(Notification.objects.filter(user=self.known).count(), 1)
+        self.known.profile.refresh_from_db()
+        self.assertEqual(self.known.profile.memberships_count, 0)
+
+        again = member_import.run(self.group, rows)
+        self.assertEqual(member_import.summary(again)["invited"], 2)
+        self.assertEqual(self.group.invites.count(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.known).count(), 1)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_accepting_an_invite_joins_the_group(self):
+        chidi = User.objects.create_user("chidi", email="chidi@example.com")
+        member_import.run(self.group, [{"phone": "08030000001"}, {"email": "chidi@example.com"}])
+        self.client.force_login(self.known)
+
+        invite = self.known.group_invites.get()
+        unpaid = self.group.unpaid_count
+        self.client.post(reverse("respond_to_invite", args=[invite.id]), {"action": "accept"})
+        self.assertTrue(self.group.group_members.filter(user=self.known).exists())
+        self.known.profile.refresh_from_db()
+        self.assertEqual(self.known.profile.memberships_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.unpaid_count, unpaid + 1)
+
+        # Someone else's invite is a 404; a declined one just goes away.
+        other = chidi.group_invites.get()
+        response = self.client.post(reverse("respond_to_invite", args=[other.id]), {"action": "accept"})
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(chidi)
+        self.client.post(reverse("respond_to_invite", args=[other.id]), {"action": "decline"})
+        self.assertFalse(GroupInvite.objects.exists())
+        self.assertFalse(self.group.group_members.filter(user=chidi).exists())
+
+    def test_invited_address_claims_an_account(self):
+        member_import.run(
+            self.group, [{"email": "chidi@example.com", "phone": "08030000002", "first_name": "Chidi"}],
+            site="http://testserver/",
+        )
+        for task in tasks.claim("w1", limit=5):
+            self.assertTrue(tasks.run(task, "w1"))
+        (email,) = mail.outbox
+        self.assertEqual(email.to, ["chidi@example.com"])
+        link = re.search(r"http://testserver(/invites/\S+/)", email.body).group(1)
+
+        self.assertEqual(self.client.get(link).status_code, 200)
+        response = self.client.post(link, {
+            "username": "chidi", "password1": "plantain-stew-42", "password2": "plantain-stew-42",
+        })
+        self.assertRedirects(response, reverse("contributor_groups"))
+        chidi = User.objects.get(username="chidi")
+        self.assertEqual((chidi.email, chidi.first_name), ("chidi@example.com", "Chidi"))
+        self.assertEqual(chidi.profile.phone_number, "08030000002")
+
+        # The account is a real one: its password works, the invite is its
+        # own to accept, and the link is spent.
+        self.client.logout()
+        self.assertTrue(self.client.login(username="chidi", password="plantain-stew-42"))
+        invite = chidi.group_invites.get()
+        self.client.post(reverse("respond_to_invite", args=[invite.id]), {"action": "accept"})
+        self.assertTrue(self.group.group_members.filter(user=chidi).exists())
+        self.assertEqual(self.client.get(link).status_code, 404)
+
+    def test_phone_invite_goes_to_the_account_that_saves_the_number(self):
+        member_import.run(self.group, [{"phone": "08030000009"}])
+        self.assertEqual(len(mail.outbox), 0)
+        dayo = User.objects.create_user("dayo")
+        self.client.force_login(dayo)
+        self.client.post(reverse("contributor_setting"), {"phone_number": "0803 000 0009"})
+        self.assertEqual(dayo.group_invites.get().group, self.group)
+
+    def test_queries_scale_with_batches(self):
+        def import_count(count, prefix):
+            rows = [{"email": f"{prefix}{i}@example.com"} for i in range(count)]
+            with CaptureQueriesContext(connection) as captured:
+                member_import.run(self.group, rows, batch_size=50)
+            return len(captured.captured_queries)
+
+        self.assertEqual(import_count(50, "a"), import_count(50, "b"))
+        self.assertLessEqual(import_count(200, "c"), 4 * import_count(50, "d"))
+
+    def test_parse_csv_and_json(self):
+        from io import BytesIO
+
+        csv_rows = member_import.parse(BytesIO(b"\xef\xbb\xbfEmail,Phone\nx@example.com,\n"))
+        self.assertEqual(csv_rows, [{"email": "x@example.com", "phone": ""}])
+        json_rows = member_import.parse(BytesIO(b'{"members": [{"phone": "08030000003"}]}'))
+        self.assertEqual(json_rows, [{"phone": "08030000003"}])
+        with self.assertRaises(member_import.InvalidUpload):
+            member_import.parse(BytesIO(b"name\nada\n"))
+        with self.assertRaisesMessage(member_import.InvalidUpload, "File must be UTF-8 encoded"):
+            member_import.parse(BytesIO("email\nadé@example.com\n".encode("latin-1")))
+
+
+# ======================
+# EXPORTS
+# ======================
+# Both formats are read back the way a spreadsheet would: the CSV through
+# csv.reader, the XLSX as the zip of XML parts it is.
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def xlsx_sheets(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        names = [sheet.get("name") for sheet in workbook.iterfind("s:sheets/s:sheet", SHEET_NS)]
+        sheets = []
+        for n in range(1, len(names) + 1):
+            root = ElementTree.fromstring(archive.read(f"xl/worksheets/sheet{n}.xml"))
+            sheets.append([
+                ["".join(cell.itertext()) for cell in row.iterfind("s:c", SHEET_NS)]
+                for row in root.iterfind("s:sheetData/s:row", SHEET_NS)
+            ])
+    return names, sheets
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.group = AkawoGroup.objects.create(
+            group_name="Ajo", organizer=self.organizer,
+            contribution_cycle="monthly", contribution_amount=1000,
+        )
+        member = GroupMember.objects.create(
+            user=User.objects.create_user("=HYPERLINK(\"http://x\")"), group=self.group
+        )
+        for i in range(3):
+            Contribution.objects.create(
+                member=member, amount=1000 + i, status="completed", payment_reference=f"ref-{i}"
+            )
+        self.client.force_login(self.organizer)
+
+    def export(self, fmt):
+        response = self.client.get(reverse("export_contributions", args=[self.group.id, fmt]))
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_escapes_formulas(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv").decode("utf-8-sig"))))
+        self.assertEqual(rows[0], exports._headers(exports.CONTRIBUTION_COLUMNS))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[1] for row in rows[1:]}, {"'=HYPERLINK(\"http://x\")"})
+        self.assertEqual([row[5] for row in rows[1:]], ["ref-0", "ref-1", "ref-2"])
+
+    def test_xlsx_parses(self):
+        names, (sheet,) = xlsx_sheets(self.export("xlsx"))
+        self.assertEqual(names, ["Sheet1"])
+        self.assertEqual(sheet[0], exports._headers(exports.CONTRIBUTION_COLUMNS))
+        self.assertEqual([row[2] for row in sheet[1:]], ["1000.00", "1001.00", "1002.00"])
+
+    def test_xlsx_rolls_over_to_new_sheets(self):
+        header = ["n"]
+        data = b"".join(exports.stream_xlsx(header, ([i] for i in range(5)), max_rows=2))
+        names, sheets = xlsx_sheets(data)
+        self.assertEqual(names, ["Sheet1", "Sheet2", "Sheet3"])
+        self.assertEqual(sheets, [
+            [["n"], ["0"], ["1"]],
+            [["n"], ["2"], ["3"]],
+            [["n"], ["4"]],
+        ])
+
+    def test_other_organizers_group_is_404(self):
+        self.client.force_login(User.objects.create_user("other"))
+        for fmt in ("csv", "xlsx"):
+            response = self.client.get(reverse("export_contributions", args=[self.group.id, fmt]))
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(reverse("export_withdrawals", args=[self.group.id, fmt]))
+            self.assertEqual(response.status_code, 404)
+
+
+# ======================
+# PROFILING
+# ======================
+# Off unless PROFILING=True. When on, each request is timed into the rolling
+# window for its URL name and reported in a Server-Timing header.
+
+class ProfilingTests(TestCase):
+    def test_off_by_default(self):
+        self.assertFalse(settings.PROFILING_ENABLED)
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn("Server-Timing", self.client.get(reverse("login")))
+
+    def test_requests_recorded_per_url_name(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiling.endpoints.clear()
+        self.addCleanup(profiling.endpoints.clear)
+
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=directory.name):
+            client = self.client_class()  # builds its middleware under the override
+            responses = [client.get(reverse("login")) for _ in range(2)]
+            profiling.flush(force=True)
+            loaded = profiling.load()
+
+        for response in responses:
+            self.assertIn("total;dur=", response["Server-Timing"])
+        samples = profiling.endpoints.dump()["login"]
+        self.assertEqual(len(samples), 2)
+        self.assertTrue(all(len(sample) == len(profiling.SAMPLE_FIELDS) for sample in samples))
+        self.assertEqual(loaded["login"], samples)
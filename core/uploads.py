@@ -0,0 +1,65 @@
+import hashlib
+import re
+from pathlib import PurePosixPath
+
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+
+
+# ======================
+# CONTENT-HASHED UPLOADS
+# ======================
+# Uploads are stored as <stem>.<sha256[:12]><ext>, so a name always refers to
+# the same bytes and core.media can serve it as immutable. Re-uploading an
+# identical file reuses the stored one instead of writing a copy.
+
+HASH_LENGTH = 12
+_HASH = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}$")
+# A hashed original or one of its core.images variants (<stem>.<hash>_small).
+_HASHED_STEM = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}(?:_[a-z]+)?$")
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, content):
+    path = PurePosixPath(name)
+    stem = _HASH.sub("", path.stem)
+    return str(path.with_name(f"{stem}.{content_hash(content)}{path.suffix}"))
+
+
+def is_hashed(name):
+    return bool(_HASHED_STEM.search(PurePosixPath(name).stem))
+
+
+def in_use(field_file):
+    # Deduplicated uploads can be shared; only the last reference may delete.
+    model = type(field_file.instance)
+    return model._default_manager.filter(
+        **{field_file.field.attname: field_file.name}
+    ).exclude(pk=field_file.instance.pk).exists()
+
+
+class HashedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        name = hashed_name(name, content)
+        target = self.field.generate_filename(self.instance, name)
+        if self.storage.exists(target):
+            # Same bytes are already stored under this name.
+            self.name = target
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = True
+            if save:
+                self.instance.save()
+            return
+        super().save(name, content, save)
+
+
+class HashedImageField(models.ImageField):
+    attr_class = HashedImageFieldFile
@@ -1,10 +1,19 @@
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from . import media, views
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.views import LogoutView
 
+# ASYNC_PAYMENTS swaps in the async payment views for ASGI deployments.
+if settings.ASYNC_PAYMENTS:
+    start_payment = views.start_contribution_payment_async
+    pay_for_contributor = views.pay_for_contributor_async
+    payment_callback = verify_payment = views.payment_callback_async
+else:
+    start_payment = views.start_contribution_payment
+    pay_for_contributor = views.pay_for_contributor
+    payment_callback = views.payment_callback
+    verify_payment = views.verify_payment
 
 urlpatterns = [
 
@@ -46,6 +55,7 @@ urlpatterns = [
     # Notifications
     path("notifications/", views.notifications_list, name="notifications"),
     path("notifications/read/<int:notification_id>/", views.mark_as_read, name="mark_as_read"),
+    path("notifications/read/", views.mark_notifications_read, name="mark_notifications_read"),
 
     # === ORGANIZER DASHBOARD ===
     path('dashboard/', views.dashboard_redirect, name='dashboard'),  # unified
@@ -62,17 +72,19 @@ urlpatterns = [
     path('organizer/groups/', views.group_manage_view, name='group_manage_list'),
     path('organizer/groups/manage/', views.group_manage_view, name='group_manage'),
     path('organizer/groups/<int:group_id>/manage/', views.manage_page, name='manage_page'),
+    path('organizer/groups/<int:group_id>/import-members/', views.import_members, name='import_members'),
     path('organizer/groups/<int:group_id>/remove-member/<int:member_id>/', views.remove_member, name='remove_member'),
 
     # === CONTRIBUTIONS AND PAYMENTS ===
-    path('pay/contribute/', views.start_contribution_payment, name='start_contribution_payment'),
+    path('pay/contribute/', start_payment, name='start_contribution_payment'),
     path('pay/withdraw/', views.start_contribution_withdrawal, name='start_contribution_withdrawal'),
-    path('pay/contributor/<int:group_id>/', views.pay_for_contributor, name='pay_for_contributor'),
-    path('payment/verify/', views.payment_callback, name='payment_callback'),
-    path('payment/callback/', views.payment_callback, name='payment_callback'),
+    path('pay/contributor/<int:group_id>/', pay_for_contributor, name='pay_for_contributor'),
+    path('payment/verify/', payment_callback, name='payment_callback'),
+    path('payment/callback/', payment_callback, name='payment_callback'),
     path('wallet/payment/webhook/', views.paystack_webhook, name='paystack_webhook'),
     path('webhook/paystack/', views.paystack_webhook, name='paystack_webhook'),
-    path('pay/verify/', views.verify_payment, name='verify_payment'),
+    path('pay/verify/', verify_payment, name='verify_payment'),
+    path('ops/metrics/', views.metrics_view, name='metrics'),
 
     path('terms/', views.terms_and_conditions, name='terms'),
     path('policy/', views.privacy_policy, name='policy'), 
@@ -85,6 +97,9 @@ urlpatterns = [
     path('organizer/contributions/', views.organizer_contribution, name='organizer_contribution'),
     path('organizer/reports/', views.organizer_reports, name='organizer_reports'),
     path('organizer/reports/<int:group_id>/', views.reports_page, name='reports_page'),
+    path('organizer/contributions/<int:group_id>/export.<str:fmt>', views.export_contributions, name='export_contributions'),
+    path('organizer/withdrawals/<int:group_id>/export.<str:fmt>', views.export_withdrawals, name='export_withdrawals'),
+    path('organizer/reports/export.<str:fmt>', views.export_reports, name='export_reports'),
     path('organizer/groups/<int:group_id>/reminder/', views.send_reminder, name='send_reminder'),
     path("transactions/", views.transaction_history, name="transaction_history"),
     path("organizer-groups/", views.organizer_list, name="organizer_list"),
@@ -95,7 +110,7 @@ urlpatterns = [
     path('contributor/dash/', views.contributor_dash, name='contributor_dash'),
     path('contributor/dashboard/group/<int:group_id>/', views.contributor_dashboard2, name='contributor_dashboard2'),
     path('contributor/wallet/', views.contributor_wallet, name='contributor_wallet'),
-    path('wallet/contribute/<int:member_id>/', views.start_contribution_payment, name='wallet_contribute'),
+    path('wallet/contribute/<int:member_id>/', start_payment, name='wallet_contribute'),
     path("contributor/groups/", views.contributor_groups2, name="contributor_groups2"),
     path("contributor/groups/<int:group_id>/withdrawals/", views.contributor_withdrawals, name="contributor_withdrawals"),
 
@@ -106,12 +121,15 @@ urlpatterns = [
     path('contributor/join-group/', views.join_group, name='join_group'),
     path('contributor/join/', views.join_group, name='join_group_alt'),
     path("my-groups/", views.contributor_groups, name="contributor_groups"),
+    path("my-groups/invites/<int:invite_id>/", views.respond_to_invite, name="respond_to_invite"),
+    path("invites/<str:token>/", views.claim_invite, name="claim_invite"),
     path("contributor/report/<int:group_id>/", views.contributor_report, name="contributor_report"),
 
     # === ACCOUNT SETTINGS ===
     path('settings/', views.account_settings, name='account_settings'),
 ]
 
-# === MEDIA SERVING DURING DEBUG ===
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# === MEDIA ===
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), media.serve_media, name='media'),
+]
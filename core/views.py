@@ -1,23 +1,31 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login as auth_login, logout
+from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.conf import settings
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 
 from .models import (
-    UserProfile, AkawoGroup, GroupMember,
+    UserProfile, AkawoGroup, GroupMember, GroupInvite,
     Contribution, Payment, Withdrawal,
     Report, Transaction, Notification
 )
+from . import (
+    balances, cycles, dashboards, exports, images, member_import, metrics, notifications, paystack,
+    references, reminders, roles, settlement, uploads, webhooks,
+)
+from .pagination import keyset_page
 
-import requests
 import uuid
-import json
-import hashlib
-import hmac
+from decimal import Decimal
 
 
 # ======================
@@ -54,6 +62,7 @@ def login_view(request):
         )
         if user:
             auth_login(request, user)
+            roles.resolve(request)
             return redirect("dashboard")
 
         messages.error(request, "Invalid credentials")
@@ -61,15 +70,28 @@ def login_view(request):
     return render(request, "login.html")
 
 
+DASHBOARDS_BY_ROLE = {
+    "organizer": "organizer_dashboard",
+    "contributor": "contributor_dashboard",
+}
+
+
 @login_required
 def dashboard_redirect(request):
-    if AkawoGroup.objects.filter(organizer=request.user).exists():
-        return redirect("organizer_dashboard")
+    role = roles.resolve(request)
+    return redirect(DASHBOARDS_BY_ROLE.get(role, "select_role"))
 
-    if GroupMember.objects.filter(user=request.user).exists():
-        return redirect("contributor_dashboard")
 
-    return redirect("select_role")
+@login_required
+def select_role_view(request):
+    if request.method == "POST":
+        role = request.POST.get("selected_role")
+        if role in DASHBOARDS_BY_ROLE:
+            roles.choose(request, role)
+            return redirect(DASHBOARDS_BY_ROLE[role])
+        messages.error(request, "Pick a role to continue")
+
+    return render(request, "role.html")
 
 
 # ======================
@@ -79,13 +101,18 @@ def dashboard_redirect(request):
 @login_required
 def create_group(request):
     if request.method == "POST":
-        group = AkawoGroup.objects.create(
-            group_name=request.POST.get("name"),
-            organizer=request.user,
-            contribution_cycle=request.POST.get("contribution_type"),
-            contribution_amount=request.POST.get("contribution_amount"),
-        )
-        GroupMember.objects.create(user=request.user, group=group)
+        with transaction.atomic():
+            group = AkawoGroup.objects.create(
+                group_name=request.POST.get("name"),
+                organizer=request.user,
+                contribution_cycle=request.POST.get("contribution_type"),
+                contribution_amount=request.POST.get("contribution_amount"),
+                photo=request.FILES.get("photo"),
+            )
+            GroupMember.objects.create(user=request.user, group=group)
+            roles.group_created(request.user)
+            roles.members_added([request.user.pk])
+        roles.remember(request, "organizer")
         messages.success(request, "Group created")
     return redirect("organizer_dashboard")
 
@@ -101,7 +128,10 @@ def join_group(request):
             if GroupMember.objects.filter(user=request.user, group=group).exists():
                 messages.info(request, "Already joined")
             else:
-                GroupMember.objects.create(user=request.user, group=group)
+                with transaction.atomic():
+                    GroupMember.objects.create(user=request.user, group=group)
+                    roles.members_added([request.user.pk])
+                    balances.members_joined(group, [request.user.pk])
                 messages.success(request, "Joined successfully")
 
         except AkawoGroup.DoesNotExist:
@@ -110,46 +140,336 @@ def join_group(request):
     return redirect("contributor_dashboard")
 
 
+@login_required
+def respond_to_invite(request, invite_id):
+    invite = get_object_or_404(
+        GroupInvite.objects.select_related("group"), id=invite_id, user=request.user
+    )
+    if request.method != "POST":
+        return redirect("contributor_groups")
+
+    group = invite.group
+    with transaction.atomic():
+        invite.delete()
+        if request.POST.get("action") == "accept":
+            _, joined = GroupMember.objects.get_or_create(user=request.user, group=group)
+            if joined:
+                roles.members_added([request.user.pk])
+                balances.members_joined(group, [request.user.pk])
+            messages.success(request, f"Joined {group.group_name}")
+        else:
+            messages.info(request, f"Declined the invite to {group.group_name}")
+
+    return redirect("contributor_groups")
+
+
+def claim_invite(request, token):
+    # The link emailed to someone invited by address: sign up (or use the
+    # account already signed in) and the invite moves under Your Groups.
+    invite = get_object_or_404(
+        GroupInvite.objects.select_related("group"), token=token, user__isnull=True
+    )
+    if request.user.is_authenticated:
+        member_import.claim(invite, request.user)
+        return redirect("contributor_groups")
+
+    form = UserCreationForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        with transaction.atomic():
+            user = form.save(commit=False)
+            user.email = invite.email
+            user.first_name = invite.first_name
+            user.last_name = invite.last_name
+            user.save()
+            if invite.phone:
+                UserProfile.objects.filter(user=user).update(phone_number=invite.phone)
+            member_import.claim(invite, user)
+        auth_login(request, user)
+        roles.resolve(request)
+        return redirect("contributor_groups")
+
+    return render(request, "claim_invite.html", {"invite": invite, "form": form})
+
+
+@login_required
+def group_detail(request, group_id):
+    group = get_object_or_404(
+        AkawoGroup.objects.with_summary(), id=group_id, organizer=request.user
+    )
+    return render(request, "group_detail.html", {"group": group})
+
+
+@login_required
+def remove_member(request, group_id, member_id):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    if request.method != "POST":
+        return redirect("group_detail", group_id=group.id)
+
+    member = get_object_or_404(GroupMember, id=member_id, group=group)
+    if member.user_id == group.organizer_id:
+        messages.error(request, "The organizer can't be removed")
+        return redirect("group_detail", group_id=group.id)
+
+    with transaction.atomic():
+        balances.member_leaving(member, group)
+        member.delete()
+        roles.member_removed(member.user_id)
+    messages.success(request, "Member removed")
+    return redirect("group_detail", group_id=group.id)
+
+
+IMPORT_RESULTS_SHOWN = 500
+
+
+@login_required
+def import_members(request, group_id):
+    # CSV/JSON file upload from the manage page, or a raw JSON body from a script.
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    if request.method != "POST":
+        return redirect("manage_page", group_id=group.id)
+
+    as_json = request.content_type == "application/json"
+    upload = request if as_json else request.FILES.get("file")
+    try:
+        if upload is None:
+            raise member_import.InvalidUpload("Choose a CSV or JSON file to import")
+        rows = member_import.parse(upload)
+    except member_import.InvalidUpload as exc:
+        if as_json:
+            return JsonResponse({"error": str(exc)}, status=400)
+        messages.error(request, str(exc))
+        return redirect("manage_page", group_id=group.id)
+
+    results = member_import.run(group, rows, site=request.build_absolute_uri("/"))
+    summary = member_import.summary(results)
+    if as_json:
+        return JsonResponse({"summary": summary, "results": results})
+    return render(request, "import_members.html", {
+        "group": group,
+        "summary": summary,
+        "results": results[:IMPORT_RESULTS_SHOWN],
+        "hidden": max(len(results) - IMPORT_RESULTS_SHOWN, 0),
+    })
+
+
+@login_required
+def group_manage_view(request):
+    groups = (
+        AkawoGroup.objects.filter(organizer=request.user)
+        .with_summary(prefetch_members=False)
+        .order_by("-created_at")
+    )
+    return render(request, "group_manage.html", {"groups": groups})
+
+
+@login_required
+def manage_page(request, group_id):
+    group = get_object_or_404(
+        AkawoGroup.objects.with_summary(), id=group_id, organizer=request.user
+    )
+    return render(request, "manage.html", {"group": group})
+
+
 # ======================
 # DASHBOARDS
 # ======================
 
 @login_required
 def organizer_dashboard(request):
-    groups = AkawoGroup.objects.filter(organizer=request.user)
-    return render(request, "organizer_dashboard.html", {"groups": groups})
+    context = dashboards.cached_context("organizer_dashboard", request.user, lambda: {
+        "groups": list(
+            AkawoGroup.objects.filter(organizer=request.user)
+            .with_summary(prefetch_members=False)
+        ),
+    })
+    return render(request, "organizer_dashboard.html", context)
+
+
+@login_required
+def organizer_dash(request):
+    context = dashboards.cached_context("organizer_dash", request.user, lambda: {
+        "groups": list(
+            AkawoGroup.objects.filter(organizer=request.user)
+            .with_summary(prefetch_members=False)
+            .order_by("-created_at")
+        ),
+    })
+    return render(request, "organizer_dash.html", context)
 
 
 @login_required
 def contributor_dashboard(request):
-    groups = GroupMember.objects.filter(user=request.user)
-    return render(request, "contributor_dashboard.html", {"groups": groups})
+    context = dashboards.cached_context("contributor_dashboard", request.user, lambda: {
+        "groups": list(
+            GroupMember.objects.filter(user=request.user).select_related("group")
+        ),
+    })
+    return render(request, "contributor_dashboard.html", context)
+
+
+@login_required
+def contributor_dash(request):
+    context = dashboards.cached_context("contributor_dash", request.user, lambda: {
+        "groups": list(
+            AkawoGroup.objects.filter(group_members__user=request.user)
+            .with_summary(prefetch_members=False)
+            .order_by("-created_at")
+        ),
+    })
+    return render(request, "contributor_dash.html", context)
+
+
+@login_required
+def contributor_dashboard2(request, group_id):
+    member = get_object_or_404(
+        GroupMember.objects.select_related("group"), user=request.user, group_id=group_id
+    )
+    group = member.group
+    contributions = list(member.contributions.order_by("-contributed_at", "-id")[:50])
+
+    start = group.current_cycle_month or cycles.cycle_start(
+        group.contribution_cycle, timezone.localdate()
+    )
+    return render(request, "contributor_dashboard2.html", {
+        "group": group,
+        "member": member,
+        "contributions": contributions,
+        "total_contributions": member.total_contributed,
+        "last_contribution": next(
+            (c for c in contributions if c.status == "completed"), None
+        ),
+        "next_due_date": cycles.cycle_end(group.contribution_cycle, start),
+    })
+
+
+@login_required
+def contributor_groups(request):
+    groups = AkawoGroup.objects.filter(group_members__user=request.user).order_by("-created_at")
+    invites = request.user.group_invites.select_related("group").order_by("-invited_at")
+    return render(request, "contributor_groups.html", {"groups": groups, "invites": invites})
+
+
+@login_required
+def contributor_groups2(request):
+    memberships = (
+        GroupMember.objects.filter(user=request.user)
+        .select_related("group__organizer")
+        .order_by("-joined_at")
+    )
+    return render(request, "contributor_groups2.html", {"groups": memberships})
+
+
+@login_required
+def contributor_paydetails(request):
+    return render(request, "contributor_paydetails.html", {
+        "groups": _member_groups(request.user),
+    })
+
+
+@login_required
+def contributor_wallet(request):
+    return render(request, "contributor_wallet.html", {
+        "groups": _member_groups(request.user),
+    })
+
+
+@login_required
+def contributor_report(request, group_id):
+    member = get_object_or_404(
+        GroupMember.objects.select_related("group"), user=request.user, group_id=group_id
+    )
+
+    if request.method == "POST":
+        subject = request.POST.get("subject", "").strip()
+        message = request.POST.get("message", "").strip()
+        if message:
+            Report.objects.create(
+                group=member.group,
+                contributor=request.user,
+                message=f"{subject}\n\n{message}" if subject else message,
+            )
+            messages.success(request, "Report sent")
+            return redirect("contributor_dashboard")
+        messages.error(request, "Write a message to send a report")
+
+    return render(request, "contributor_report.html", {"group": member.group})
+
+
+def _member_groups(user):
+    return (
+        AkawoGroup.objects.filter(group_members__user=user)
+        .with_summary(prefetch_members=False)
+        .order_by("-created_at")
+    )
 
 
 # ======================
-# PAYSTACK HELPERS
+# CHECKOUT
 # ======================
+# Shared by the sync payment views and their async twins further down, so
+# references, amounts and the failure responses can't drift between them.
+
+def _checkout(request, members, email, reference):
+    # Unsaved Payment rows plus the Paystack initialize arguments. Several
+    # members share one charge for the total; each keeps their own row so
+    # settlement can fan out into per-member contributions.
+    amount = members[0].group.contribution_amount
+
+    if len(members) == 1:
+        payments = [Payment(
+            contributor=members[0],
+            amount=amount,
+            reference=reference,
+            status="initiated"
+        )]
+    else:
+        payments = [
+            Payment(
+                contributor=member,
+                amount=amount,
+                reference=f"{reference}_{member.id}",
+                parent_reference=reference,
+                status="initiated"
+            )
+            for member in members
+        ]
 
-def initialize_payment(email, amount, reference, callback_url):
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    data = {
+    charge = {
         "email": email,
-        "amount": int(amount * 100),  # convert to kobo
+        "amount": amount * len(members),
         "reference": reference,
-        "callback_url": callback_url,
+        "callback_url": request.build_absolute_uri("/payment/callback/"),
     }
+    return payments, charge
+
+
+def _organizer_reference():
+    return f"org_{uuid.uuid4().hex[:10]}"
 
-    res = requests.post(
-        "https://api.paystack.co/transaction/initialize",
-        headers=headers,
-        json=data
-    )
 
-    return res.json()
+def _selected_contributors(request, group_id):
+    # The organizer's batch checkboxes, or the single contributor_id button.
+    contributor_ids = request.POST.getlist("contributor_ids") or [request.POST.get("contributor_id")]
+    return GroupMember.objects.filter(
+        id__in=[cid for cid in contributor_ids if cid], group_id=group_id
+    ).select_related("group")
+
+
+def _checkout_response(request, response, failed):
+    if response.get("status"):
+        return redirect(response["data"]["authorization_url"])
+    if response.get("unavailable"):
+        return paystack_unavailable(request, response)
+    return failed(request)
+
+
+def _contribution_failed(request):
+    return HttpResponse("Payment init failed")
+
+
+def _organizer_checkout_failed(request):
+    messages.error(request, "Payment init failed")
+    return redirect("organizer_dashboard")
 
 
 # ======================
@@ -158,28 +478,35 @@ def initialize_payment(email, amount, reference, callback_url):
 
 @login_required
 def start_contribution_payment(request, member_id):
-    member = get_object_or_404(GroupMember, id=member_id)
+    member = get_object_or_404(GroupMember.objects.select_related("group", "user"), id=member_id)
 
-    reference = str(uuid.uuid4())
+    payments, charge = _checkout(request, [member], member.user.email, str(uuid.uuid4()))
+    Payment.objects.bulk_create(payments)
 
-    Payment.objects.create(
-        contributor=member,
-        amount=member.group.contribution_amount,
-        reference=reference,
-        status="initiated"
-    )
+    response = paystack.get_client().initialize_transaction(**charge)
+    return _checkout_response(request, response, _contribution_failed)
 
-    response = initialize_payment(
-        email=member.user.email,
-        amount=member.group.contribution_amount,
-        reference=reference,
-        callback_url=request.build_absolute_uri("/payment/callback/")
+
+@login_required
+def start_contribution_withdrawal(request):
+    if request.method != "POST":
+        return redirect("contributor_wallet")
+
+    member = get_object_or_404(
+        GroupMember, user=request.user, group_id=request.POST.get("group_id")
     )
+    try:
+        amount = Decimal(request.POST.get("amount", ""))
+    except ArithmeticError:
+        amount = Decimal("0")
 
-    if response.get("status"):
-        return redirect(response["data"]["authorization_url"])
+    if amount <= 0 or amount > member.total_contributed:
+        messages.error(request, "Enter an amount up to your contributed balance")
+    else:
+        Withdrawal.objects.create(member=member, group_id=member.group_id, amount=amount)
+        messages.success(request, "Withdrawal requested")
 
-    return HttpResponse("Payment init failed")
+    return redirect("contributor_withdrawals", group_id=member.group_id)
 
 
 # ======================
@@ -188,31 +515,161 @@ def start_contribution_payment(request, member_id):
 
 @login_required
 def pay_for_contributor(request, group_id):
-    if request.method == "POST":
-        contributor_id = request.POST.get("contributor_id")
+    if request.method != "POST":
+        return redirect("organizer_dashboard")
 
-        member = get_object_or_404(GroupMember, id=contributor_id, group_id=group_id)
+    members = list(_selected_contributors(request, group_id))
+    if not members:
+        raise Http404("No matching contributors")
 
-        reference = f"org_{uuid.uuid4().hex[:10]}"
+    # The organizer pays, so Paystack bills their email.
+    payments, charge = _checkout(request, members, request.user.email, _organizer_reference())
+    Payment.objects.bulk_create(payments)
 
-        Payment.objects.create(
-            contributor=member,
-            amount=member.group.contribution_amount,
-            reference=reference,
-            status="initiated"
-        )
+    response = paystack.get_client().initialize_transaction(**charge)
+    return _checkout_response(request, response, _organizer_checkout_failed)
 
-        response = initialize_payment(
-            email=request.user.email,  # organizer pays
-            amount=member.group.contribution_amount,
-            reference=reference,
-            callback_url=request.build_absolute_uri("/payment/callback/")
-        )
 
-        if response.get("status"):
-            return redirect(response["data"]["authorization_url"])
+# ======================
+# REPORTS
+# ======================
+
+@login_required
+def organizer_reports(request):
+    groups = (
+        AkawoGroup.objects.filter(organizer=request.user)
+        .with_summary(prefetch_members=False)
+        .order_by("-created_at")
+    )
+    return render(request, "organizer_reports.html", {"groups": groups})
 
-    return redirect("organizer_dashboard")
+
+@login_required
+def reports_page(request, group_id):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    reports = group.reports.select_related("contributor").order_by("-created_at")
+    return render(request, "reports.html", {"group": group, "reports": reports})
+
+
+@login_required
+def group_contributions(request, group_id):
+    group = get_object_or_404(AkawoGroup, id=group_id)
+    contributions = (
+        Contribution.objects.filter(member__group=group)
+        .order_by("-contributed_at", "-id")
+    )
+
+    # Organizers see everyone's payments; a member sees their own.
+    if group.organizer_id == request.user.pk:
+        return render(request, "contribution.html", {
+            "group": group,
+            "contributions": contributions.select_related("member__user")[:200],
+        })
+
+    member = get_object_or_404(GroupMember, user=request.user, group=group)
+    return render(request, "paydetails.html", {
+        "group": group,
+        "contributions": contributions.filter(member=member)[:200],
+    })
+
+
+@login_required
+def group_withdrawals(request, group_id):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    withdrawals = group.withdrawals.order_by("-created_at")
+    return render(request, "withdrawals.html", {"group": group, "withdrawals": withdrawals})
+
+
+# Streamed downloads of a group's ledger; see core.exports for the filters.
+
+def _export_name(group, ledger):
+    return f"{slugify(group.group_name) or 'group'}-{ledger}-{timezone.localdate():%Y%m%d}"
+
+
+@login_required
+def export_contributions(request, group_id, fmt):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    header, rows = exports.contributions(
+        group, **exports.filters(request.GET, exports.CONTRIBUTION_STATUSES)
+    )
+    return exports.response(fmt, _export_name(group, "contributions"), header, rows)
+
+
+@login_required
+def export_withdrawals(request, group_id, fmt):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+    header, rows = exports.withdrawals(
+        group, **exports.filters(request.GET, exports.WITHDRAWAL_STATUSES)
+    )
+    return exports.response(fmt, _export_name(group, "withdrawals"), header, rows)
+
+
+@login_required
+def export_reports(request, fmt):
+    header, rows = exports.reports(
+        request.user, **exports.filters(request.GET, exports.REPORT_STATUSES)
+    )
+    return exports.response(fmt, f"reports-{timezone.localdate():%Y%m%d}", header, rows)
+
+
+@login_required
+def organizer_contribution(request):
+    return render(request, "organizer_contribution.html", {
+        "groups": _organized_groups(request.user),
+    })
+
+
+@login_required
+def organizer_withdrawal(request):
+    return render(request, "organizer_withdrawal.html", {
+        "groups": _organized_groups(request.user),
+    })
+
+
+@login_required
+def organizer_list(request):
+    return render(request, "organizer_list.html", {
+        "groups": _organized_groups(request.user),
+    })
+
+
+ORGANIZER_COMMISSION = Decimal("0.02")
+
+
+@login_required
+def organizer_wallet(request, group_id):
+    group = get_object_or_404(
+        AkawoGroup.objects.with_summary(prefetch_members=False),
+        id=group_id, organizer=request.user,
+    )
+    return render(request, "organizer_wallet.html", {
+        "group": group,
+        "total_contributions": group.total_contributions,
+        "commission": (group.monthly_total * ORGANIZER_COMMISSION).quantize(Decimal("0.01")),
+    })
+
+
+def _organized_groups(user):
+    return (
+        AkawoGroup.objects.filter(organizer=user)
+        .with_summary(prefetch_members=False)
+        .order_by("-created_at")
+    )
+
+
+@login_required
+def send_reminder(request, group_id):
+    group = get_object_or_404(AkawoGroup, id=group_id, organizer=request.user)
+
+    if request.method == "POST":
+        message = request.POST.get("message", "").strip() or (
+            f"Your {group.contribution_cycle} contribution of "
+            f"₦{group.contribution_amount} to {group.group_name} is due."
+        )
+        count = reminders.send_reminder(group, message)
+        messages.success(request, f"Reminder sent to {count} member(s)")
+
+    return redirect("manage_page", group_id=group.id)
 
 
 # ======================
@@ -222,35 +679,99 @@ def pay_for_contributor(request, group_id):
 def payment_callback(request):
     reference = request.GET.get("reference")
 
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"
-    }
+    # Refreshes and repeated redirects for a settled reference skip Paystack,
+    # and so do references we never issued.
+    state = references.lookup(reference)
+    if state == references.SETTLED:
+        return render(request, "success.html")
+    if state is None:
+        raise Http404("Payment not found")
 
-    res = requests.get(
-        f"https://api.paystack.co/transaction/verify/{reference}",
-        headers=headers
-    )
-
-    data = res.json()
+    data = references.verify(reference)
 
     if data.get("status") and data["data"]["status"] == "success":
-        payment = get_object_or_404(Payment, reference=reference)
-
-        if payment.status != "success":
-            payment.status = "success"
-            payment.save()
-
-            Contribution.objects.create(
-                member=payment.contributor,
-                amount=payment.amount,
-                paid_by="organizer" if reference.startswith("org_") else "self",
-                payment_reference=reference,
-                status="completed"
-            )
+        _settle_reference(reference)
+    elif data.get("unavailable"):
+        # The webhook or reconcile_payments settles it if it went through.
+        return paystack_unavailable(request, data)
 
     return render(request, "success.html")
 
 
+def _settle_reference(reference):
+    # A webhook may have settled it first; then this is a no-op.
+    settlement.settle([reference])
+    references.mark_settled(reference)
+
+
+def verify_payment(request):
+    return payment_callback(request)
+
+
+def paystack_unavailable(request, response):
+    # Shown while the outbound guard sheds Paystack calls (core.paystack).
+    retry_after = response.get("retry_after") or 5
+    page = render(request, "payment_unavailable.html", {"retry_after": retry_after}, status=503)
+    page["Retry-After"] = str(retry_after)
+    return page
+
+
+# ======================
+# ASYNC PAYMENT VIEWS
+# ======================
+# Same flows for an ASGI server (ASYNC_PAYMENTS=True): the Paystack round
+# trip is awaited, so one worker keeps serving other requests meanwhile.
+# Transactions and template rendering (the context processors read the
+# user) stay sync and run via sync_to_async.
+
+@login_required
+async def start_contribution_payment_async(request, member_id):
+    member = await aget_object_or_404(
+        GroupMember.objects.select_related("group", "user"), id=member_id
+    )
+
+    payments, charge = _checkout(request, [member], member.user.email, str(uuid.uuid4()))
+    await Payment.objects.abulk_create(payments)
+
+    response = await paystack.get_async_client().initialize_transaction(**charge)
+    return await sync_to_async(_checkout_response)(request, response, _contribution_failed)
+
+
+@login_required
+async def pay_for_contributor_async(request, group_id):
+    if request.method != "POST":
+        return redirect("organizer_dashboard")
+
+    members = [member async for member in _selected_contributors(request, group_id)]
+    if not members:
+        raise Http404("No matching contributors")
+
+    user = await request.auser()
+    payments, charge = _checkout(request, members, user.email, _organizer_reference())
+    await Payment.objects.abulk_create(payments)
+
+    response = await paystack.get_async_client().initialize_transaction(**charge)
+    return await sync_to_async(_checkout_response)(request, response, _organizer_checkout_failed)
+
+
+async def payment_callback_async(request):
+    reference = request.GET.get("reference")
+
+    state = await references.alookup(reference)
+    if state is None:
+        raise Http404("Payment not found")
+
+    if state != references.SETTLED:
+        data = await references.averify(reference)
+
+        if data.get("status") and data["data"]["status"] == "success":
+            await sync_to_async(_settle_reference)(reference)
+        elif data.get("unavailable"):
+            return await sync_to_async(paystack_unavailable)(request, data)
+
+    return await sync_to_async(render)(request, "success.html")
+
+
 # ======================
 # WEBHOOK (backup)
 # ======================
@@ -260,35 +781,169 @@ def paystack_webhook(request):
     payload = request.body
 
     signature = request.META.get("HTTP_X_PAYSTACK_SIGNATURE")
-    secret = settings.PAYSTACK_SECRET_KEY.encode()
 
-    expected = hmac.new(secret, payload, hashlib.sha512).hexdigest()
+    if not paystack.verify_signature(payload, signature):
+        return HttpResponse(status=400)
 
-    if signature != expected:
+    # Settlement happens in `manage.py process_webhooks`; keep the request
+    # down to one INSERT so bursts don't queue workers on the write lock.
+    try:
+        webhooks.ingest(payload)
+    except ValueError:
         return HttpResponse(status=400)
 
-    data = json.loads(payload)
+    return HttpResponse(status=200)
 
-    if data.get("event") == "charge.success":
-        reference = data["data"]["reference"]
 
-        try:
-            payment = Payment.objects.get(reference=reference)
+# ======================
+# NOTIFICATIONS
+# ======================
 
-            if payment.status != "success":
-                payment.status = "success"
-                payment.save()
+@login_required
+def notifications_list(request):
+    items, next_cursor, prev_cursor = keyset_page(
+        Notification.objects.filter(user=request.user),
+        before=request.GET.get("before"),
+        after=request.GET.get("after"),
+    )
+    return render(request, "notifications.html", {
+        "notifications": items,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
 
-        except Payment.DoesNotExist:
-            pass
 
-    return HttpResponse(status=200)
+@login_required
+def mark_as_read(request, notification_id):
+    if request.method == "POST":
+        notifications.mark_read(request.user, ids=[notification_id])
+    return redirect("notifications")
+
+
+@login_required
+def mark_notifications_read(request):
+    if request.method == "POST":
+        if request.POST.get("all"):
+            notifications.mark_read(request.user)
+        else:
+            ids = [i for i in request.POST.getlist("ids") if i.isdigit()]
+            notifications.mark_read(request.user, ids=ids)
+    return redirect("notifications")
+
+
+# ======================
+# TRANSACTIONS
+# ======================
+
+@login_required
+def transaction_history(request):
+    transactions, next_cursor, prev_cursor = keyset_page(
+        Transaction.objects.filter(user=request.user),
+        before=request.GET.get("before"),
+        after=request.GET.get("after"),
+    )
+    return render(request, "transaction_history.html", {
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
+
+
+# ======================
+# METRICS
+# ======================
+
+@staff_member_required
+def metrics_view(request):
+    # Counters are per worker process; each hit reports the worker it lands on.
+    return JsonResponse(metrics.snapshot(request.GET.get("prefix", "")))
+
+
+# ======================
+# ACCOUNT
+# ======================
+
+@login_required
+def account_settings(request):
+    return _settings_page(request, "account_settings.html")
+
+
+@login_required
+def contributor_setting(request):
+    return _settings_page(request, "contributor_setting.html")
+
+
+def _settings_page(request, template):
+    user = request.user
+    try:
+        profile = user.profile
+    except UserProfile.DoesNotExist:
+        profile = roles.rebuild_profile(user)
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+
+        if action == "delete_account":
+            logout(request)
+            user.delete()
+            messages.success(request, "Account deleted")
+            return redirect("index")
+
+        # Only the edited field: a full save would write back the membership
+        # counters as loaded and undo concurrent F() increments.
+        if action == "upload_avatar" and request.FILES.get("profile_picture"):
+            profile.image = request.FILES["profile_picture"]
+            changed = ["image"]
+        elif action == "remove_avatar":
+            if profile.image and not uploads.in_use(profile.image):
+                images.delete_variants(profile.image)
+                profile.image.delete(save=False)
+            profile.image = None
+            changed = ["image"]
+        else:
+            user.first_name = request.POST.get("first_name", user.first_name)
+            user.last_name = request.POST.get("last_name", user.last_name)
+            user.save(update_fields=["first_name", "last_name"])
+            profile.phone_number = request.POST.get("phone_number", profile.phone_number)
+            changed = ["phone_number"]
+            member_import.claim_by_phone(user, profile.phone_number)
+
+        profile.save(update_fields=changed)
+        messages.success(request, "Settings saved")
+        return redirect(request.path)
+
+    return render(request, template)
+
+
+@login_required
+def me_view(request):
+    organizer = roles.resolve(request) == "organizer"
+    return render(request, "me.html", {
+        "reports_url": reverse("organizer_reports" if organizer else "contributor_groups"),
+        "profile_url": reverse("account_settings" if organizer else "contributor_setting"),
+    })
 
 
 # ======================
 # SIMPLE VIEWS
 # ======================
 
+def more_view(request):
+    return render(request, "more.html")
+
+
+@login_required
+def refer_view(request):
+    return render(request, "refer.html")
+
+
+@login_required
+def help_support(request):
+    return render(request, "support.html", {
+        "is_organizer": roles.resolve(request) == "organizer",
+    })
+
+
 @login_required
 def contributor_withdrawals(request, group_id):
     member = get_object_or_404(GroupMember, user=request.user, group_id=group_id)
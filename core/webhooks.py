@@ -0,0 +1,111 @@
+import json
+import traceback
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics, settlement
+from .models import WebhookEvent
+
+
+# ======================
+# WEBHOOK INBOX
+# ======================
+# The webhook view only verifies the signature and appends the raw body to
+# WebhookEvent. `manage.py process_webhooks` drains the inbox in batches so a
+# settlement burst costs one write transaction per batch, not per event.
+# If the batch fails, its events are retried one at a time so a bad event
+# can't hold up the rest; it is retried on later drains and given up after
+# MAX_ATTEMPTS.
+
+MAX_ATTEMPTS = 5
+
+
+def event_id_for(data):
+    # Paystack has no envelope id; the event name plus the transaction id is
+    # stable across redeliveries of the same event.
+    body = data.get("data")
+    if not isinstance(body, dict):
+        body = {}
+    return f"{data.get('event')}:{body.get('id') or body.get('reference')}"
+
+
+def ingest(payload):
+    # ValueError (bad JSON or not an object) is the view's 400.
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("Webhook payload must be a JSON object")
+
+    # ignore_conflicts turns a redelivery into a no-op instead of an
+    # IntegrityError, without a SELECT first.
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            event_id=event_id_for(data),
+            event=data.get("event", ""),
+            payload=payload.decode() if isinstance(payload, bytes) else payload,
+        )
+    ], ignore_conflicts=True)
+
+
+def apply_events(events):
+    references = {
+        data["data"]["reference"]
+        for data in events
+        if data.get("event") == "charge.success" and data.get("data", {}).get("reference")
+    }
+    if not references:
+        return 0
+
+    return len(settlement.settle(references))
+
+
+def _apply_one(event, now):
+    try:
+        with transaction.atomic():
+            settled = apply_events([json.loads(event.payload)])
+            WebhookEvent.objects.filter(id=event.id).update(processed_at=now)
+        return settled
+    except Exception:
+        error = traceback.format_exc()
+
+    metrics.incr("webhooks.failed")
+    attempts = event.attempts + 1
+    WebhookEvent.objects.filter(id=event.id).update(
+        attempts=attempts,
+        last_error=error,
+        processed_at=now if attempts >= MAX_ATTEMPTS else None,
+    )
+    return 0
+
+
+def drain(batch_size=500):
+    pending = list(
+        WebhookEvent.objects.filter(processed_at__isnull=True)
+        .order_by("id")[:batch_size]
+    )
+    if not pending:
+        return 0, 0
+
+    now = timezone.now()
+    events, invalid = [], []
+    for event in pending:
+        try:
+            events.append(json.loads(event.payload))
+        except ValueError:
+            invalid.append(event.id)
+    if invalid:
+        WebhookEvent.objects.filter(id__in=invalid).update(
+            processed_at=now, last_error="Invalid JSON"
+        )
+
+    try:
+        with transaction.atomic():
+            settled = apply_events(events)
+            WebhookEvent.objects.filter(
+                id__in=[e.id for e in pending if e.id not in invalid]
+            ).update(processed_at=now)
+    except Exception:
+        metrics.incr("webhooks.batch_failed")
+        settled = sum(_apply_one(event, now) for event in pending if event.id not in invalid)
+
+    return len(pending), settled